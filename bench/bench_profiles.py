@@ -0,0 +1,64 @@
+# Запуск из корня репозитория: python -m bench.bench_profiles
+import argparse
+import contextlib
+import os
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+from src.plotter import Plotter, warm_font_cache
+from src.profiles import RENDER_PROFILES
+from bench.synthetic import make_stats
+
+DEFAULT_USERS = (20, 10 ** 4)
+
+
+def measure(plotter: Plotter, chart: str, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = plotter.render(chart, fmt=plotter.profile.fmt)
+        best = min(best, time.perf_counter() - start)
+    return best, len(image)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare render time and file size of the render "
+                    "profiles.")
+    parser.add_argument("--users", type=int, nargs="+",
+                        default=list(DEFAULT_USERS),
+                        help="Numbers of users in the synthetic runs")
+    parser.add_argument("--profiles", nargs="+",
+                        default=list(RENDER_PROFILES),
+                        choices=RENDER_PROFILES,
+                        help="Profiles to measure")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions per measurement, best is reported")
+    args = parser.parse_args()
+
+    # Построение графика одинаково во всех профилях, разница во времени —
+    # кодирование изображения и проход отрисовки для обрезки полей
+    warm_font_cache()
+    print(f"{'users':>6} {'profile':>8} {'chart':<55} "
+          f"{'time, s':>8} {'size, KiB':>10}")
+    for users in args.users:
+        stats = make_stats(users)
+        for name in args.profiles:
+            plotter = Plotter(stats, profile=name)
+            total_time = total_size = 0
+            for chart, _ in plotter.charts():
+                with open(os.devnull, 'w') as devnull, \
+                        contextlib.redirect_stdout(devnull):
+                    seconds, size = measure(plotter, chart, args.repeat)
+                total_time += seconds
+                total_size += size
+                print(f"{users:>6} {name:>8} {chart:<55} "
+                      f"{seconds:>8.3f} {size / 1024:>10.1f}")
+            print(f"{users:>6} {name:>8} {'всего':<55} "
+                  f"{total_time:>8.3f} {total_size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Запуск из корня репозитория: python -m bench.bench_yaml_loading
+import argparse
+import os
+import tempfile
+import time
+
+import yaml
+
+from src.stats import load_stats_from_yaml
+from bench.synthetic import write_synthetic_stats
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+# Прежний путь загрузки: чистый Python-загрузчик и словари
+def load_with_safe_load(path: str):
+    with open(path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+def measure(fn, path: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare yaml.safe_load with load_stats_from_yaml.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(DEFAULT_SIZES),
+                        help="Numbers of users in the synthetic files")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions per measurement, best is reported")
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'safe_load, s':>14} {'fast path, s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for users in args.sizes:
+            path = os.path.join(temp_dir, f"stats_{users}.yaml")
+            write_synthetic_stats(path, users)
+            old = measure(load_with_safe_load, path, args.repeat)
+            new = measure(load_stats_from_yaml, path, args.repeat)
+            print(f"{users:>10} {old:>14.4f} {new:>14.4f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
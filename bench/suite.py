@@ -0,0 +1,192 @@
+# Запуск из корня репозитория: python -m bench.suite --output results.json
+#
+# Каждый замер выполняется в отдельном свежем процессе, поэтому пиковый
+# RSS (ru_maxrss) относится только к этому замеру. Нужны только CPU и
+# локальная файловая система, сеть и дисплей не используются.
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+DEFAULT_SCALES = (10, 10 ** 3, 10 ** 5, 10 ** 6)
+# Столбчатый график очередей строит подпись на каждую очередь и растёт
+# сверхлинейно, поэтому число очередей ограничено отдельно
+DEFAULT_MAX_QUEUES = 1000
+DEFAULT_THRESHOLD = 0.2
+LOAD_CASE = "load_stats_from_yaml"
+RUN_CASE = "run"
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss в Linux измеряется в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _run_case(case: str, users: int, queues: int, yaml_path: str,
+              output_dir: str, repeat: int) -> Dict[str, Any]:
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from bench.synthetic import make_stats
+    from src.plotter import Plotter
+    from src.stats import load_stats_from_yaml
+
+    stats = make_stats(users, queues)
+    plotter = Plotter(stats, output_dir)
+    charts = dict(plotter.charts())
+
+    if case == LOAD_CASE:
+        def call():
+            load_stats_from_yaml(yaml_path)
+    elif case == RUN_CASE:
+        call = plotter.run
+    else:
+        def call():
+            getattr(plotter, case)(*charts[case])
+
+    best = float("inf")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - start)
+
+    return {"seconds": best, "peak_rss_bytes": _peak_rss_bytes()}
+
+
+def _measure(case: str, users: int, queues: int, yaml_path: str,
+             output_dir: str, repeat: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_run_case, case, users, queues, yaml_path,
+                           output_dir, repeat).result()
+
+
+def _case_names(users: int, queues: int) -> List[str]:
+    from bench.synthetic import make_stats
+    from src.plotter import Plotter
+
+    charts = Plotter(make_stats(users, queues)).charts()
+    return [LOAD_CASE] + [name for name, _ in charts] + [RUN_CASE]
+
+
+def run_suite(scales: List[int], max_queues: int,
+              repeat: int) -> Dict[str, Any]:
+    '''
+    Measure loading, every chart and the full run at every scale.
+
+    Returns:
+        JSON-serialisable results with environment metadata
+    '''
+    import matplotlib
+    import numpy
+
+    from bench.synthetic import write_synthetic_stats
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for users in scales:
+            queues = min(users, max_queues)
+            yaml_path = os.path.join(temp_dir, f"stats_{users}.yaml")
+            write_synthetic_stats(yaml_path, users, queues)
+            output_dir = os.path.join(temp_dir, f"output_{users}")
+            os.makedirs(output_dir)
+
+            for case in _case_names(users, queues):
+                measurement = _measure(case, users, queues, yaml_path,
+                                       output_dir, repeat)
+                result = {"users": users, "queues": queues, "case": case,
+                          **measurement}
+                results.append(result)
+                print(f"{users:>8} {queues:>6} {case:<55} "
+                      f"{result['seconds']:>9.3f} с "
+                      f"{result['peak_rss_bytes'] / 2 ** 20:>8.1f} МиБ",
+                      flush=True)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": numpy.__version__,
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float) -> List[str]:
+    '''
+    Find measurements that got worse than the baseline by more than
+    the threshold.
+
+    Args:
+        baseline: Results of the reference commit
+        current: Results of the commit under test
+        threshold: Allowed relative growth, 0.2 means 20%
+
+    Returns:
+        Human-readable descriptions of the regressions
+    '''
+    reference = {(r["users"], r["case"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = reference.get((result["users"], result["case"]))
+        if base is None:
+            continue
+        for metric in ("seconds", "peak_rss_bytes"):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{result['case']} ({result['users']} пользователей): "
+                    f"{metric} {base[metric]:.4g} -> {result[metric]:.4g} "
+                    f"(+{(result[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark stats loading and chart rendering.")
+    parser.add_argument("--scales", type=int, nargs="+",
+                        default=list(DEFAULT_SCALES),
+                        help="Numbers of users of the synthetic stats")
+    parser.add_argument("--max-queues", type=int, default=DEFAULT_MAX_QUEUES,
+                        help="Upper bound of the number of queues")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions per measurement, best is reported")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Results JSON of the reference commit")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown or memory growth")
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.max_queues, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import numpy as np
+
+from src.stats import Stats
+
+QUEUES = 16
+
+
+def make_stats(users: int, queues: int = QUEUES, seed: int = 0) -> Stats:
+    '''
+    Build deterministic synthetic Stats.
+
+    Args:
+        users: Number of users
+        queues: Number of queues
+        seed: Random generator seed
+    '''
+    rng = np.random.default_rng(seed)
+    return Stats(
+        scheduler_total_time=100.0,
+        scheduler_processing_time=80.0,
+        scheduler_idle_time=15.0,
+        scheduler_wait_time=5.0,
+        scheduler_packet_processing_delay=0.005,
+        queue_packet_processing_delays=(np.arange(queues),
+                                        rng.random(queues) / 100),
+        user_packet_processing_delays=(np.arange(users),
+                                       rng.random(users) / 100),
+        scheduler_throughput=50.5,
+        max_scheduler_throughput=100.0,
+        scheduler_unused_resources=0.3,
+    )
+
+
+# Синтетический файл статистики в формате YAML
+def write_synthetic_stats(path: str, users: int, queues: int = QUEUES,
+                          seed: int = 0):
+    stats = make_stats(users, queues, seed)
+    with open(path, 'w') as file:
+        for field in ("scheduler_total_time", "scheduler_processing_time",
+                      "scheduler_idle_time", "scheduler_wait_time",
+                      "scheduler_packet_processing_delay",
+                      "scheduler_throughput", "max_scheduler_throughput",
+                      "scheduler_unused_resources"):
+            file.write(f"{field}: {getattr(stats, field)!r}\n")
+        for field in ("queue_packet_processing_delays",
+                      "user_packet_processing_delays"):
+            file.write(f"{field}:\n")
+            for idx, value in getattr(stats, field).items():
+                file.write(f"  {idx}: {value!r}\n")
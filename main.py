@@ -1,35 +1,365 @@
-import yaml
 import argparse
-import time
+import os
+import sys
 
+# matplotlib, numpy и yaml импортируются внутри функций, которым они
+# нужны: --help и ошибки в аргументах не ждут их загрузки. Модули
+# ниже их не импортируют
+from src.defaults import (OUTPUT_DIR, USER_BAR_CHART_LIMIT, CACHE_DIR_NAME,
+                          PDF_REPORT_NAME)
+from src.profiles import RENDER_PROFILES, DEFAULT_PROFILE
+from src.charts import CHART_NAMES, select_charts, needs_sketches
 
-from src.stats import load_stats_from_yaml
-from src.plotter import Plotter
+# Графики только сохраняются в файлы: неинтерактивный бэкенд избавляет
+# matplotlib от поиска графических библиотек при запуске
+os.environ.setdefault("MPLBACKEND", "Agg")
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Process a file path.")
 
-    parser.add_argument("-f", "--file", required=True, help="Path to the file")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-f", "--file", help="Path to the file")
+    source.add_argument("-b", "--batch",
+                        help="Directory or glob pattern of stats files")
+    source.add_argument("-m", "--multi", metavar="FILE",
+                        help="Multi-document YAML or JSON Lines file with "
+                             "many runs; runs are rendered while the file "
+                             "is read, one output subfolder per run")
+    source.add_argument("-w", "--watch", metavar="DIR",
+                        help="Render stats files written into DIR "
+                             "until interrupted")
+    source.add_argument("-r", "--replicas",
+                        help="Directory or glob pattern of the stats files "
+                             "of one scenario run with different seeds; "
+                             "charts show means with 95%% confidence "
+                             "intervals")
+    source.add_argument("-c", "--compare", nargs="+", metavar="LABEL=PATH",
+                        help="Compare schedulers in one chart per metric; "
+                             "PATH is a stats file or a directory or glob "
+                             "of replicas")
+    source.add_argument("-d", "--diff", nargs=2,
+                        metavar=("BASELINE", "CANDIDATE"),
+                        help="Compare per-queue and per-user delays of two "
+                             "stats files, draw the changed ones and exit "
+                             "with code 1 if any got slower, 2 on errors")
+    source.add_argument("--warm-up", action="store_true",
+                        help="Build the matplotlib font cache and exit, "
+                             "for example while building a job image")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR,
+                        help="Output directory of the charts, PDF report "
+                             "and render cache in every mode")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes used to draw charts")
+    parser.add_argument("--threads", action="store_true",
+                        help="Draw charts of a run with worker threads "
+                             "instead of worker processes")
+    parser.add_argument("--user-bar-limit", type=int,
+                        default=USER_BAR_CHART_LIMIT,
+                        help="Above this number of users the per-user bar "
+                             "chart is replaced by a delay distribution chart")
+    parser.add_argument("--convert", metavar="OUT",
+                        help="Convert the input file into the binary "
+                             "stats format and exit")
+    parser.add_argument("--trace",
+                        help="Per-TTI trace (CSV or binary) to plot as time series")
+    parser.add_argument("--allocation",
+                        help="Users x TTIs resource block matrix (.npy, "
+                             "memory-mapped) to plot as a heatmap")
+    parser.add_argument("--delays",
+                        help="Binary file of raw per-packet delays; adds "
+                             "p50/p95/p99/p99.9 charts by queue and user")
+    parser.add_argument("--metrics", metavar="OUT",
+                        help="Record per-chart time and memory into a JSON "
+                             "Lines file and print a summary table")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse charts rendered from unchanged stats")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="Render cache size limit in megabytes")
+    parser.add_argument("--templates", action="store_true",
+                        help="Build every chart figure once and only update "
+                             "its data for the following runs")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Draw all charts of a run as one figure "
+                             "saved into a single file")
+    parser.add_argument("--pdf", action="store_true",
+                        help=f"Also write all charts of a run into a "
+                             f"multi-page {PDF_REPORT_NAME}")
+    parser.add_argument("--profile", choices=RENDER_PROFILES,
+                        default=DEFAULT_PROFILE,
+                        help="Output format, resolution and encoding of "
+                             "the charts: preview is fastest, report is "
+                             "the 300 dpi PNG default, print and vector "
+                             "are PDF and SVG")
+    parser.add_argument("--charts", nargs="+", metavar="NAME",
+                        help=f"Draw only these charts of a run; charts "
+                             f"whose stats fields are missing or empty are "
+                             f"skipped. Names: {', '.join(CHART_NAMES)}")
+    parser.add_argument("--threshold", type=float, default=5.0,
+                        metavar="PCT",
+                        help="Diff: smallest flagged delay change, percent "
+                             "of the baseline delay")
+    parser.add_argument("--min-delta", type=float, default=0.0, metavar="MS",
+                        help="Diff: smallest flagged delay change in "
+                             "milliseconds")
+    parser.add_argument("--summary", action="store_true",
+                        help="Print utilisation and per-user delay fairness "
+                             "(Jain, max/min, Gini) of the runs instead of "
+                             "drawing charts")
 
     args = parser.parse_args()
+    if args.summary and (args.watch or args.compare or args.diff
+                         or args.warm_up):
+        parser.error("--summary works with --file, --batch, --multi "
+                     "and --replicas")
+    if args.charts is not None:
+        if args.compare or args.diff or args.summary or args.warm_up:
+            parser.error("--charts works with --file, --batch, --multi, "
+                         "--watch and --replicas")
+        try:
+            select_charts(args.charts)
+        except ValueError as e:
+            parser.error(str(e))
     
     return args
 
 
+def create_cache(args):
+    if not args.cache:
+        return None
+    from src.cache import RenderCache
+    return RenderCache(os.path.join(args.output, CACHE_DIR_NAME),
+                       args.cache_size * 1024 * 1024)
+
+
+def render_options(args):
+    from src.batch import RenderOptions
+    return RenderOptions(args.templates, args.dashboard, args.pdf,
+                         args.profile, args.charts, args.user_bar_limit)
+
+
+def pdf_path(args, output_dir):
+    return os.path.join(output_dir, PDF_REPORT_NAME) if args.pdf else None
+
+
+def run_summary_mode(args):
+    from src.analytics import run_metrics, batch_metrics
+    from src.batch import find_stats_files
+    from src.stats import load_stats, iter_stats
+    if args.file:
+        print(run_metrics(load_stats(args.file)))
+        return
+    if args.multi:
+        runs = iter_stats(args.multi)
+    else:
+        paths = find_stats_files(args.batch or args.replicas)
+        if not paths:
+            print(f"Файлы статистики не найдены: {args.batch or args.replicas}")
+            return
+        runs = (load_stats(path) for path in paths)
+    print(batch_metrics(runs))
+
+
+def run_batch_mode(args):
+    from src.batch import find_stats_files, run_batch
+    paths = find_stats_files(args.batch)
+    if not paths:
+        print(f"Файлы статистики не найдены: {args.batch}")
+        return
+
+    result = run_batch(paths, args.output, workers=args.jobs,
+                       cache=create_cache(args),
+                       options=render_options(args))
+    print(result)
+
+
+def run_multi_mode(args):
+    from src.batch import run_stream
+    result = run_stream(args.multi, args.output, workers=args.jobs,
+                        cache=create_cache(args),
+                        options=render_options(args))
+    print(result)
+
+
+def run_replicas_mode(args):
+    from src.aggregate import load_replicas
+    from src.batch import find_stats_files
+    from src.plotter import Plotter
+    paths = find_stats_files(args.replicas)
+    if not paths:
+        print(f"Файлы статистики не найдены: {args.replicas}")
+        return
+
+    stats = load_replicas(paths)
+    print(f"{stats}\n")
+    os.makedirs(args.output, exist_ok=True)
+    Plotter(stats, args.output, create_cache(args),
+            user_bar_limit=args.user_bar_limit, profile=args.profile,
+            chart_names=args.charts).run(
+                workers=args.jobs, threads=args.threads,
+                dashboard=args.dashboard, pdf=pdf_path(args, args.output))
+
+
+def parse_comparison(items):
+    runs = []
+    for item in items:
+        label, separator, path = item.partition("=")
+        if not separator or not label or not path:
+            raise ValueError(f"Ожидается LABEL=PATH: {item}")
+        runs.append((label, path))
+    return runs
+
+
+def run_compare_mode(args):
+    from src.aggregate import load_replicas
+    from src.batch import find_stats_files
+    from src.compare import ComparisonPlotter
+    from src.stats import load_stats
+    runs = []
+    for label, path in parse_comparison(args.compare):
+        if os.path.isfile(path):
+            runs.append((label, load_stats(path)))
+            continue
+        paths = find_stats_files(path)
+        if not paths:
+            raise ValueError(f"Файлы статистики не найдены: {path}")
+        runs.append((label, load_replicas(paths)))
+
+    os.makedirs(args.output, exist_ok=True)
+    ComparisonPlotter(runs, args.output, create_cache(args),
+                      user_bar_limit=args.user_bar_limit,
+                      profile=args.profile).run(
+                          workers=args.jobs, threads=args.threads,
+                          dashboard=args.dashboard,
+                          pdf=pdf_path(args, args.output))
+
+
+def run_diff_mode(args):
+    from src.diff import StatsDiff, DiffPlotter
+    from src.stats import load_stats
+    # Код 2 отличает ошибку от найденной регрессии (код 1)
+    try:
+        baseline, candidate = (load_stats(path) for path in args.diff)
+        diff = StatsDiff(baseline, candidate, args.threshold / 100,
+                         args.min_delta / 1000)
+        print(f"{diff}\n")
+        os.makedirs(args.output, exist_ok=True)
+        DiffPlotter(diff, candidate, args.output, create_cache(args),
+                    profile=args.profile).run()
+    except Exception as e:
+        print(e)
+        return 2
+    return 1 if diff.regressions else 0
+
+
+def run_watch_mode(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.batch import create_pool
+    from src.watch import watch
+    pool = None
+    if args.jobs > 1:
+        pool = (ThreadPoolExecutor(args.jobs) if args.threads
+                else create_pool(args.jobs))
+    try:
+        watch(args.watch, args.output, pool, create_cache(args),
+              options=render_options(args))
+    except KeyboardInterrupt:
+        print("Наблюдение остановлено")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def report_metrics(recorder, args):
+    if recorder is None:
+        return
+    recorder.write_jsonl(args.metrics)
+    print(recorder.summary_table())
+
+
+def run_file_mode(args, recorder):
+    from src.stats import load_stats, save_stats_to_binary
+    try:
+        stats = load_stats(args.file)
+        if args.convert:
+            save_stats_to_binary(stats, args.convert)
+            print(f"Сохранено в {os.path.abspath(args.convert)}\n")
+            return
+        # Скетчи задержек строятся, только если выбран график квантилей
+        sketches = None
+        if args.delays and needs_sketches(args.charts):
+            from src.sketch import sketch_delays
+            sketches = sketch_delays(args.delays, workers=args.jobs)
+    except Exception as e:
+        print(e)
+        return
+
+    from src.plotter import Plotter
+    from src.trace import read_trace, load_allocation
+    os.makedirs(args.output, exist_ok=True)
+    plotter = Plotter(stats, args.output, create_cache(args),
+                      user_bar_limit=args.user_bar_limit, sketches=sketches,
+                      profile=args.profile, chart_names=args.charts)
+    plotter.run(workers=args.jobs, threads=args.threads,
+                dashboard=args.dashboard, pdf=pdf_path(args, args.output))
+    if args.trace:
+        plotter.draw_tti_trace_chart(read_trace(args.trace))
+    if args.allocation:
+        plotter.draw_resource_allocation_heatmap(
+            load_allocation(args.allocation))
+    report_metrics(recorder, args)
+
 
 def main():
+    recorder = None
     try:
         print("\n--------------\n")
         print("Модуль визуализации запущен...\n")
         args = parse_args()
-        stats = load_stats_from_yaml(args.file)
+        if args.file and not os.path.isfile(args.file):
+            print(f"Файл не найден: {args.file}")
+            return
+        if args.warm_up:
+            from src.plotter import warm_font_cache
+            warm_font_cache()
+            print("Кэш шрифтов matplotlib готов\n")
+            return
+        if args.summary:
+            run_summary_mode(args)
+            return
+        if args.metrics:
+            from src.metrics import enable_metrics
+            recorder = enable_metrics()
+        if args.batch:
+            run_batch_mode(args)
+            report_metrics(recorder, args)
+            return
+        if args.multi:
+            run_multi_mode(args)
+            report_metrics(recorder, args)
+            return
+        if args.watch:
+            run_watch_mode(args)
+            report_metrics(recorder, args)
+            return
+        if args.replicas:
+            run_replicas_mode(args)
+            report_metrics(recorder, args)
+            return
+        if args.compare:
+            run_compare_mode(args)
+            report_metrics(recorder, args)
+            return
+        if args.diff:
+            code = run_diff_mode(args)
+            report_metrics(recorder, args)
+            return code
     except Exception as e:
         print(e)
+        return 2
     else:
-        plotter = Plotter(stats)
-        plotter.run()
+        run_file_mode(args, recorder)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
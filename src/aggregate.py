@@ -0,0 +1,227 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from src.stats import (Stats, DelayMap, DELAY_MAP_FIELDS, SCALAR_FIELDS,
+                       load_stats)
+
+# Двусторонние критические значения t-распределения Стьюдента для 95%
+# доверительного интервала, по числу степеней свободы от 1 до 30
+_T_TABLE_95 = np.array([
+    np.nan, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+    2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093,
+    2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045,
+    2.042])
+_Z_95 = 1.959964
+
+
+def t_critical(df: np.ndarray) -> np.ndarray:
+    '''
+    Two-sided 95% critical value of Student's t distribution.
+
+    Args:
+        df: Degrees of freedom; values below 1 give NaN
+
+    Returns:
+        Critical values of the shape of df
+    '''
+    df = np.asarray(df, dtype=np.float64)
+    # Выше таблицы — разложение Корниша — Фишера по степеням 1/df,
+    # его погрешность при df > 30 меньше 1e-4
+    z = _Z_95
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    safe_df = np.maximum(df, 1.0)
+    expansion = z + g1 / safe_df + g2 / safe_df ** 2 + g3 / safe_df ** 3
+
+    table_index = np.clip(df, 0, _T_TABLE_95.size - 1).astype(np.int64)
+    return np.where(df < 1, np.nan,
+                    np.where(df < _T_TABLE_95.size,
+                             _T_TABLE_95[table_index], expansion))
+
+
+class RunningMoments:
+    def __init__(self):
+        '''
+        Mean and variance per identifier updated one replica at a time
+        (Welford's algorithm), so memory does not grow with the number
+        of replicas. Identifiers missing from some replicas are counted
+        only in the replicas that contain them.
+        '''
+        self.ids = np.empty(0, dtype=np.int64)
+        self.count = np.empty(0, dtype=np.int64)
+        self.mean = np.empty(0, dtype=np.float64)
+        self.m2 = np.empty(0, dtype=np.float64)
+
+    def _expand(self, ids: np.ndarray):
+        union = np.union1d(self.ids, ids)
+        if union.size == self.ids.size:
+            return
+        positions = np.searchsorted(union, self.ids)
+        for name in ("count", "mean", "m2"):
+            values = np.zeros(union.size, dtype=getattr(self, name).dtype)
+            values[positions] = getattr(self, name)
+            setattr(self, name, values)
+        self.ids = union
+
+    def update(self, ids: np.ndarray, values: np.ndarray):
+        '''
+        Add the values of one replica.
+
+        Args:
+            ids: Unique identifiers of the replica
+            values: Values in the order of ids
+        '''
+        # Во всех повторах обычно одни и те же идентификаторы в одном
+        # порядке: тогда обновление — несколько векторных операций
+        if np.array_equal(ids, self.ids):
+            index = slice(None)
+        else:
+            self._expand(ids)
+            index = np.searchsorted(self.ids, ids)
+
+        count = self.count[index] + 1
+        mean = self.mean[index]
+        delta = values - mean
+        mean = mean + delta / count
+        self.m2[index] += delta * (values - mean)
+        self.mean[index] = mean
+        self.count[index] = count
+
+    def estimate(self) -> "Estimate":
+        return Estimate(self.ids, self.count, self.mean, self.m2)
+
+
+class Estimate:
+    __slots__ = ("ids", "mean", "std", "half_width", "count")
+
+    def __init__(self, ids: np.ndarray, count: np.ndarray,
+                 mean: np.ndarray, m2: np.ndarray):
+        '''
+        Mean, sample standard deviation and 95% confidence interval
+        half-width of values observed over replicas. With a single
+        observation the deviation and the interval are NaN.
+
+        Args:
+            ids: Identifiers
+            count: Number of replicas per identifier
+            mean: Mean per identifier
+            m2: Sum of squared deviations from the mean per identifier
+        '''
+        self.ids = ids
+        self.count = count
+        self.mean = mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.std = np.sqrt(m2 / (count - 1))
+            self.half_width = t_critical(count - 1) * self.std / np.sqrt(count)
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.mean - self.half_width
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.mean + self.half_width
+
+
+class ReplicatedStats(Stats):
+    __slots__ = ("replicas", "estimates")
+
+    def __init__(self, replicas: int, estimates: Dict[str, Estimate]):
+        '''
+        Statistics of a scenario averaged over replicas with different
+        random seeds. The Stats fields hold the means, so the result can
+        be drawn by Plotter like a single run; the delay maps carry the
+        confidence interval half-widths as errors.
+
+        Args:
+            replicas: Number of aggregated runs
+            estimates: Estimate per Stats field; scalar fields have
+                a single identifier 0
+        '''
+        self.replicas = replicas
+        self.estimates = estimates
+
+        scalars = {name: float(estimates[name].mean[0])
+                   for name in SCALAR_FIELDS}
+        maps = {name: DelayMap(estimates[name].ids, estimates[name].mean,
+                               np.nan_to_num(estimates[name].half_width))
+                for name in DELAY_MAP_FIELDS}
+        super().__init__(**scalars, **maps)
+
+    @property
+    def errors(self) -> Dict[str, float]:
+        '''
+        Confidence interval half-widths of the scalar fields.
+        '''
+        return {name: float(np.nan_to_num(self.estimates[name].half_width[0]))
+                for name in SCALAR_FIELDS}
+
+    def __str__(self):
+        lines = [f"Повторов: {self.replicas}"]
+        for name in SCALAR_FIELDS:
+            estimate = self.estimates[name]
+            lines.append(f"{name}={estimate.mean[0]:.6f} "
+                         f"± {estimate.half_width[0]:.6f} "
+                         f"(ско {estimate.std[0]:.6f})")
+        return "\n".join(lines)
+
+
+def aggregate_stats(runs: Iterable[Stats]) -> ReplicatedStats:
+    '''
+    Aggregate replicas of a scenario in one streaming pass: only the
+    current replica and the per-identifier moments are kept in memory.
+
+    Args:
+        runs: Stats of every replica
+
+    Returns:
+        Means, deviations and 95% confidence intervals
+
+    Raises:
+        ValueError: No replicas were given
+    '''
+    scalar_ids = np.arange(len(SCALAR_FIELDS), dtype=np.int64)
+    scalars = RunningMoments()
+    scalars._expand(scalar_ids)
+    maps = {name: RunningMoments() for name in DELAY_MAP_FIELDS}
+
+    replicas = 0
+    for stats in runs:
+        values = np.array([getattr(stats, name) for name in SCALAR_FIELDS],
+                          dtype=np.float64)
+        # Поля, которых нет в файле (NaN), учитываются только в повторах,
+        # где они есть, как и идентификаторы карт задержек
+        present = np.isfinite(values)
+        scalars.update(scalar_ids[present], values[present])
+        for name, moments in maps.items():
+            delays = getattr(stats, name)
+            order = np.argsort(delays.ids, kind="stable")
+            moments.update(delays.ids[order], delays.delays[order])
+        replicas += 1
+
+    if replicas == 0:
+        raise ValueError("no replicas to aggregate")
+
+    # Поле, которого нет ни в одном повторе, остаётся NaN
+    scalars.mean[scalars.count == 0] = np.nan
+    estimates = {}
+    for position, name in enumerate(SCALAR_FIELDS):
+        field = slice(position, position + 1)
+        estimates[name] = Estimate(np.zeros(1, dtype=np.int64),
+                                   scalars.count[field], scalars.mean[field],
+                                   scalars.m2[field])
+    for name, moments in maps.items():
+        estimates[name] = moments.estimate()
+    return ReplicatedStats(replicas, estimates)
+
+
+def load_replicas(paths: List[str]) -> ReplicatedStats:
+    '''
+    Load the stats files of a scenario one by one and aggregate them.
+
+    Args:
+        paths: Stats files of the replicas (YAML or binary)
+    '''
+    return aggregate_stats(load_stats(path) for path in paths)
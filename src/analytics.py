@@ -0,0 +1,215 @@
+from typing import Dict, Iterable, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.stats import Stats
+
+ArrayLike = Union[float, np.ndarray]
+
+UTILISATION_FIELDS = ("busy_ratio",
+                      "wait_ratio",
+                      "throughput_utilisation",
+                      "resource_utilisation")
+FAIRNESS_FIELDS = ("jain_index",
+                   "max_min_ratio",
+                   "gini")
+METRIC_LABELS = {
+    "busy_ratio": "Доля времени работы",
+    "wait_ratio": "Доля времени простоя",
+    "throughput_utilisation": "Использование пропускной способности",
+    "resource_utilisation": "Использование ресурсных блоков",
+    "jain_index": "Индекс справедливости Джейна",
+    "max_min_ratio": "Отношение макс./мин. задержки",
+    "gini": "Коэффициент Джини задержек",
+}
+
+
+def utilisation(used: ArrayLike, maximum: ArrayLike) -> ArrayLike:
+    '''
+    Used share of a maximum; NaN where the maximum is zero.
+    '''
+    used = np.asarray(used, dtype=np.float64)
+    maximum = np.asarray(maximum, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(maximum != 0, used / maximum, np.nan)
+    return result if result.ndim else float(result)
+
+
+def time_ratios(processing_time: ArrayLike, idle_time: ArrayLike,
+                wait_time: ArrayLike) -> Tuple[ArrayLike, ArrayLike]:
+    '''
+    Busy (processing and idle) and wait shares of the scheduler time.
+    '''
+    # Доли считаются от суммы составляющих, а не от
+    # scheduler_total_time: так они в сумме дают 1 и совпадают
+    # с круговой диаграммой
+    busy_time = np.add(processing_time, idle_time)
+    total_time = np.add(busy_time, wait_time)
+    return (utilisation(busy_time, total_time),
+            utilisation(wait_time, total_time))
+
+
+def stack_delays(delays: Sequence[np.ndarray]) -> np.ndarray:
+    '''
+    Stack per-run delay arrays of different lengths into one matrix.
+
+    Returns:
+        Array of shape (runs, longest run) padded with NaN
+    '''
+    lengths = np.fromiter((values.size for values in delays),
+                          dtype=np.int64, count=len(delays))
+    matrix = np.full((len(delays), lengths.max(initial=0)), np.nan)
+    # Одна векторная запись всех значений: строка — номер запуска,
+    # столбец — позиция значения внутри запуска
+    rows = np.repeat(np.arange(len(delays)), lengths)
+    columns = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+    if rows.size:
+        matrix[rows, columns] = np.concatenate(delays)
+    return matrix
+
+
+def fairness(delays: np.ndarray) -> Tuple[ArrayLike, ArrayLike, ArrayLike]:
+    '''
+    Fairness of per-user delays: Jain's index, max/min ratio and
+    Gini coefficient.
+
+    Args:
+        delays: Delays of one run (1-D) or of a batch of runs
+            (runs, users) padded with NaN, for example by stack_delays
+
+    Returns:
+        Jain's index (1 when all users are equal, 1/n at worst),
+        max/min ratio and Gini coefficient (0 when all users are
+        equal); one value per run, NaN for runs without users
+    '''
+    delays = np.asarray(delays, dtype=np.float64)
+    matrix = np.atleast_2d(delays)
+    if matrix.shape[1] == 0:
+        matrix = np.full((matrix.shape[0], 1), np.nan)
+    # Сортировка по строкам нужна для коэффициента Джини; NaN уходят
+    # в конец строки, поэтому ранги значений идут с начала
+    ordered = np.sort(matrix, axis=1)
+    valid = ~np.isnan(ordered)
+    count = valid.sum(axis=1)
+    values = np.where(valid, ordered, 0.0)
+    total = values.sum(axis=1)
+    ranks = np.arange(1, matrix.shape[1] + 1)
+    weights = np.where(valid, 2 * ranks - count[:, np.newaxis] - 1, 0)
+    largest = np.take_along_axis(
+        ordered, np.maximum(count - 1, 0)[:, np.newaxis], axis=1)[:, 0]
+
+    jain = utilisation(total * total, count * (values * values).sum(axis=1))
+    max_min = utilisation(largest, ordered[:, 0])
+    gini = utilisation((weights * values).sum(axis=1), count * total)
+
+    if delays.ndim == 1:
+        return float(jain[0]), float(max_min[0]), float(gini[0])
+    return jain, max_min, gini
+
+
+class RunMetrics:
+    __slots__ = UTILISATION_FIELDS + FAIRNESS_FIELDS + ("runs",)
+
+    def __init__(self, processing_time: ArrayLike, idle_time: ArrayLike,
+                 wait_time: ArrayLike,
+                 throughput: ArrayLike, max_throughput: ArrayLike,
+                 unused_resources: ArrayLike, user_delays: np.ndarray):
+        '''
+        Derived metrics of one run or of a batch of runs. Every field is
+        a float for one run or an array with one value per run.
+
+        Args:
+            processing_time, idle_time, wait_time: Scheduler time
+                components
+            throughput, max_throughput: Average and maximum throughput
+            unused_resources: Share of unused resource blocks
+            user_delays: Per-user delays, 1-D for one run or
+                (runs, users) padded with NaN
+        '''
+        self.busy_ratio, self.wait_ratio = time_ratios(
+            processing_time, idle_time, wait_time)
+        self.throughput_utilisation = utilisation(throughput, max_throughput)
+        self.resource_utilisation = utilisation(
+            np.subtract(1, unused_resources), 1)
+        self.jain_index, self.max_min_ratio, self.gini = fairness(user_delays)
+        self.runs = np.size(self.busy_ratio)
+
+    def as_dict(self) -> Dict[str, ArrayLike]:
+        return {field: getattr(self, field)
+                for field in UTILISATION_FIELDS + FAIRNESS_FIELDS}
+
+    def summary_table(self) -> str:
+        '''
+        Text table of the metrics; for a batch the mean, minimum and
+        maximum over the runs (NaN runs skipped).
+        '''
+        if isinstance(self.busy_ratio, float):
+            header = f"{'Показатель':<40} {'Значение':>10}"
+            lines = [header, "-" * len(header)]
+            for field, value in self.as_dict().items():
+                lines.append(f"{METRIC_LABELS[field]:<40} {value:>10.4f}")
+            return "\n".join(lines)
+
+        header = (f"{'Показатель':<40} {'Среднее':>10} {'Мин.':>10} "
+                  f"{'Макс.':>10}")
+        lines = [f"Запусков: {self.runs}", header, "-" * len(header)]
+        for field, values in self.as_dict().items():
+            values = values[~np.isnan(values)]
+            mean, low, high = ((values.mean(), values.min(), values.max())
+                               if values.size else (np.nan,) * 3)
+            lines.append(f"{METRIC_LABELS[field]:<40} {mean:>10.4f} "
+                         f"{low:>10.4f} {high:>10.4f}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary_table()
+
+
+def run_metrics(stats: Stats) -> RunMetrics:
+    '''
+    Derived metrics of one run. Computed on each call and not cached on
+    Stats: the charts read only time_ratios and utilisation, which cost
+    a few scalar operations, while the fairness indices sort every
+    user delay.
+    '''
+    return RunMetrics(stats.scheduler_processing_time,
+                      stats.scheduler_idle_time,
+                      stats.scheduler_wait_time,
+                      stats.scheduler_throughput,
+                      stats.max_scheduler_throughput,
+                      stats.scheduler_unused_resources,
+                      stats.user_packet_processing_delays.delays)
+
+
+def batch_metrics(runs: Iterable[Stats]) -> RunMetrics:
+    '''
+    Derived metrics of many runs computed together: the runs are read
+    once (a stream from iter_stats works) and every metric is one
+    vectorised pass over the stacked values.
+
+    Returns:
+        RunMetrics with one value per run in every field
+    '''
+    columns = {name: [] for name in ("processing", "idle", "wait",
+                                     "throughput", "max_throughput",
+                                     "unused")}
+    delays = []
+    for stats in runs:
+        columns["processing"].append(stats.scheduler_processing_time)
+        columns["idle"].append(stats.scheduler_idle_time)
+        columns["wait"].append(stats.scheduler_wait_time)
+        columns["throughput"].append(stats.scheduler_throughput)
+        columns["max_throughput"].append(stats.max_scheduler_throughput)
+        columns["unused"].append(stats.scheduler_unused_resources)
+        # Копия: массивы бинарного файла отображены в память
+        delays.append(np.array(stats.user_packet_processing_delays.delays))
+    if not delays:
+        raise ValueError("no runs to compute metrics for")
+
+    arrays = {name: np.asarray(values, dtype=np.float64)
+              for name, values in columns.items()}
+    return RunMetrics(arrays["processing"], arrays["idle"], arrays["wait"],
+                      arrays["throughput"],
+                      arrays["max_throughput"], arrays["unused"],
+                      stack_delays(delays))
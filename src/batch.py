@@ -0,0 +1,313 @@
+import glob
+import os
+import threading
+import time
+from concurrent.futures import (Executor, ProcessPoolExecutor, as_completed,
+                                wait, FIRST_COMPLETED)
+from typing import List, Optional, Tuple
+
+from src.stats import Stats, load_stats, iter_stats
+from src.plotter import Plotter, OUTPUT_DIR, init_worker
+from src.cache import RenderCache
+from src.defaults import PDF_REPORT_NAME, USER_BAR_CHART_LIMIT
+from src.profiles import DEFAULT_PROFILE
+from src.metrics import active_recorder, enable_metrics, disable_metrics
+from src.templates import TemplateStore
+
+STATS_FILE_PATTERNS = ("*.yaml", "*.yml", "*.stats")
+
+# Шаблоны графиков исполнителя: переиспользуются всеми запусками,
+# которые обрабатывает этот поток
+_local = threading.local()
+
+
+class BatchResult:
+    def __init__(self, runs: int, failed_runs: int, charts: int,
+                 elapsed: float):
+        '''
+        Summary of a batch rendering.
+
+        Args:
+            runs: Number of stats files processed
+            failed_runs: Number of stats files that could not be rendered
+            charts: Number of saved charts
+            elapsed: Wall-clock duration of the batch in seconds
+        '''
+        self.runs = runs
+        self.failed_runs = failed_runs
+        self.charts = charts
+        self.elapsed = elapsed
+
+    @property
+    def runs_per_second(self) -> float:
+        return self.runs / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def charts_per_second(self) -> float:
+        return self.charts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"Обработано запусков: {self.runs} "
+                f"(с ошибками: {self.failed_runs}), "
+                f"графиков: {self.charts} за {self.elapsed:.2f} с\n"
+                f"Запусков/с: {self.runs_per_second:.2f}, "
+                f"графиков/с: {self.charts_per_second:.2f}")
+
+
+class RenderOptions:
+    __slots__ = ("templates", "dashboard", "pdf", "profile", "chart_names",
+                 "user_bar_limit")
+
+    def __init__(self, templates: bool = False, dashboard: bool = False,
+                 pdf: bool = False, profile: str = DEFAULT_PROFILE,
+                 chart_names: Optional[List[str]] = None,
+                 user_bar_limit: int = USER_BAR_CHART_LIMIT):
+        '''
+        How the charts of every run of a batch are drawn. The options
+        are passed unchanged to the workers.
+
+        Args:
+            templates: Reuse chart figures between the runs drawn by
+                the same worker and update only their data
+            dashboard: Draw the charts of every run as one figure
+            pdf: Also write the charts of every run into PDF_REPORT_NAME
+            profile: Name of the render profile of the charts
+            chart_names: Charts to draw for every run; None draws all
+            user_bar_limit: Above this number of users the per-user bar
+                chart is replaced by a delay distribution chart
+        '''
+        self.templates = templates
+        self.dashboard = dashboard
+        self.pdf = pdf
+        self.profile = profile
+        self.chart_names = chart_names
+        self.user_bar_limit = user_bar_limit
+
+    def plotter(self, stats: Stats, output_dir: str,
+                cache: Optional[RenderCache] = None,
+                templates: Optional[TemplateStore] = None) -> Plotter:
+        return Plotter(stats, output_dir, cache, self.user_bar_limit,
+                       templates=templates, profile=self.profile,
+                       chart_names=self.chart_names)
+
+    def pdf_path(self, output_dir: str) -> Optional[str]:
+        return os.path.join(output_dir, PDF_REPORT_NAME) if self.pdf else None
+
+
+# Поиск файлов статистики по каталогу или glob-шаблону
+def find_stats_files(source: str) -> List[str]:
+    if os.path.isdir(source):
+        files = []
+        for pattern in STATS_FILE_PATTERNS:
+            files.extend(glob.glob(os.path.join(source, pattern)))
+    else:
+        files = glob.glob(source, recursive=True)
+
+    return sorted(files)
+
+
+# Каталог с графиками отдельного запуска
+def run_output_dir(stats_path: str, output_root: str) -> str:
+    name = os.path.splitext(os.path.basename(stats_path))[0]
+    return os.path.join(output_root, name)
+
+
+def run_output_dirs(stats_paths: List[str], output_root: str) -> List[str]:
+    '''
+    Output folders of the runs of a batch, checked to be distinct.
+
+    Raises:
+        ValueError: Several stats files map to one folder, for example
+            run.yaml and run.stats converted from it, or files of the
+            same name found by a recursive glob
+    '''
+    output_dirs = [run_output_dir(path, output_root) for path in stats_paths]
+    sources = {}
+    clashes = []
+    for path, output_dir in zip(stats_paths, output_dirs):
+        source = sources.setdefault(output_dir, path)
+        if source != path:
+            clashes.append(f"{source}, {path} -> {output_dir}")
+    if clashes:
+        raise ValueError("stats files share an output folder: "
+                         + "; ".join(clashes))
+    return output_dirs
+
+
+def worker_templates() -> TemplateStore:
+    if not hasattr(_local, "templates"):
+        _local.templates = TemplateStore()
+    return _local.templates
+
+
+# Отрисовка всех графиков одного запуска (выполняется в процессе пула)
+def render_run(stats_path: str, output_dir: str,
+               cache: Optional[RenderCache] = None,
+               collect_metrics: bool = False,
+               options: Optional[RenderOptions] = None
+               ) -> Tuple[int, List[dict]]:
+    return render_stats(load_stats(stats_path), output_dir, cache,
+                        collect_metrics, options)
+
+
+def render_stats(stats: Stats, output_dir: str,
+                 cache: Optional[RenderCache] = None,
+                 collect_metrics: bool = False,
+                 options: Optional[RenderOptions] = None
+                 ) -> Tuple[int, List[dict]]:
+    options = options or RenderOptions()
+    os.makedirs(output_dir, exist_ok=True)
+    plotter = options.plotter(
+        stats, output_dir, cache,
+        worker_templates() if options.templates else None)
+    pdf_path = options.pdf_path(output_dir)
+    if not collect_metrics:
+        return len(plotter.run(dashboard=options.dashboard, pdf=pdf_path)), []
+
+    recorder = enable_metrics()
+    try:
+        return (len(plotter.run(dashboard=options.dashboard, pdf=pdf_path)),
+                recorder.records)
+    finally:
+        disable_metrics()
+
+
+# Каталог с графиками запуска с номером index из файла с несколькими запусками
+def stream_output_dir(stats_path: str, output_root: str, index: int) -> str:
+    return os.path.join(run_output_dir(stats_path, output_root),
+                        f"run_{index:05d}")
+
+
+def create_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    '''
+    Create a pool of warm worker processes that can be reused
+    across batches.
+
+    Args:
+        workers: Number of worker processes, defaults to the CPU count
+    '''
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+
+def run_batch(stats_paths: List[str],
+              output_root: str = OUTPUT_DIR,
+              workers: Optional[int] = None,
+              pool: Optional[Executor] = None,
+              cache: Optional[RenderCache] = None,
+              options: Optional[RenderOptions] = None) -> BatchResult:
+    '''
+    Render charts for many stats files, one output subfolder per run.
+
+    Args:
+        stats_paths: Stats files to render
+        output_root: Directory that receives one subfolder per run
+        workers: Number of worker processes when no pool is given
+        pool: Reusable executor; it is left running after the batch
+        cache: Render cache shared by all runs
+        options: How the charts of every run are drawn; defaults to
+            RenderOptions()
+
+    Returns:
+        Throughput summary of the batch
+    '''
+    # Два процесса не должны писать графики в один каталог
+    output_dirs = run_output_dirs(stats_paths, output_root)
+    own_pool = pool is None
+    if own_pool:
+        pool = create_pool(workers)
+
+    recorder = active_recorder()
+    start = time.perf_counter()
+    charts = 0
+    failed_runs = 0
+    try:
+        futures = {
+            pool.submit(render_run, path, output_dir, cache,
+                        recorder is not None, options): path
+            for path, output_dir in zip(stats_paths, output_dirs)
+        }
+        for future in as_completed(futures):
+            try:
+                run_charts, records = future.result()
+            except Exception as e:
+                failed_runs += 1
+                print(f"{futures[future]}: {e}")
+                continue
+            charts += run_charts
+            if recorder is not None:
+                recorder.records.extend(records)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    return BatchResult(len(stats_paths), failed_runs, charts,
+                       time.perf_counter() - start)
+
+
+def run_stream(stats_path: str,
+               output_root: str = OUTPUT_DIR,
+               workers: Optional[int] = None,
+               pool: Optional[Executor] = None,
+               cache: Optional[RenderCache] = None,
+               options: Optional[RenderOptions] = None) -> BatchResult:
+    '''
+    Render the runs of one multi-run file (multi-document YAML or
+    JSON Lines) while it is being read: every run is submitted to the
+    workers as soon as it is parsed, and at most two runs per worker
+    are held in memory at a time.
+
+    Args:
+        stats_path: Multi-run stats file; its charts go into
+            stream_output_dir(stats_path, output_root, index)
+        output_root: Directory that receives the folder of the file
+        workers: Number of worker processes, or the size of the given
+            pool; defaults to the CPU count
+        pool: Reusable executor; it is left running after the batch
+        cache: Render cache shared by all runs
+        options: How the charts of every run are drawn; defaults to
+            RenderOptions()
+
+    Returns:
+        Throughput summary of the batch
+    '''
+    own_pool = pool is None
+    if own_pool:
+        pool = create_pool(workers)
+    # Ограничение числа прочитанных, но ещё не отрисованных запусков
+    limit = 2 * (workers or os.cpu_count() or 1)
+
+    recorder = active_recorder()
+    start = time.perf_counter()
+    result = BatchResult(0, 0, 0, 0.0)
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            index = pending.pop(future)
+            try:
+                run_charts, records = future.result()
+            except Exception as e:
+                result.failed_runs += 1
+                print(f"{stats_path} [{index}]: {e}")
+                continue
+            result.charts += run_charts
+            if recorder is not None:
+                recorder.records.extend(records)
+
+    try:
+        for index, stats in enumerate(iter_stats(stats_path), 1):
+            if len(pending) >= limit:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            future = pool.submit(
+                render_stats, stats,
+                stream_output_dir(stats_path, output_root, index), cache,
+                recorder is not None, options)
+            pending[future] = index
+            result.runs += 1
+        collect(as_completed(list(pending)))
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,185 @@
+import hashlib
+import inspect
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Iterator
+from typing import Any, Dict, Optional
+
+import matplotlib
+import numpy as np
+
+from src.stats import DelayMap
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Вытеснение оставляет записи на эту долю max_bytes: следующий обход
+# каталога понадобится только после записи ещё 10% предела
+EVICT_TO = 0.9
+
+# Оценка размера каждого каталога кэша в этом процессе. Она общая для
+# всех экземпляров RenderCache процесса (в пул процессов кэш передаётся
+# копией на каждое задание) и пересчитывается обходом каталога, только
+# когда превышает предел
+_sizes: Dict[str, int] = {}
+_sizes_lock = threading.Lock()
+
+
+# Детерминированное хеширование аргументов графика
+def _update_digest(digest, value: Any):
+    # Отображённый в память файл целиком (не срез) описывается файлом
+    # и его версией: чтение гигабайт ради ключа дороже самой отрисовки
+    if (isinstance(value, np.memmap) and value.filename is not None
+            and isinstance(value.base, mmap.mmap)):
+        stat = os.stat(value.filename)
+        digest.update(f"memmap:{value.filename}:{value.offset}:"
+                      f"{stat.st_size}:{stat.st_mtime_ns}:"
+                      f"{value.dtype.str}:{value.shape};".encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape};".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, DelayMap):
+        digest.update(b"DelayMap;")
+        _update_digest(digest, value.ids)
+        _update_digest(digest, value.delays)
+        _update_digest(digest, value.errors)
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)};".encode())
+        for key, item in value.items():
+            _update_digest(digest, key)
+            _update_digest(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)};".encode())
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def _function_source(fn) -> str:
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return fn.__code__.co_code.hex()
+
+
+def chart_key(fn, args: tuple, kwargs: Dict[str, Any],
+              settings: Dict[str, Any]) -> Optional[str]:
+    '''
+    Build the cache key of a chart.
+
+    Args:
+        fn: Chart drawing function
+        args: Positional chart arguments taken from Stats
+        kwargs: Keyword chart arguments
+        settings: Render settings passed to savefig
+
+    Returns:
+        Hex digest identifying the rendered image, None when the chart
+        reads a stream that cannot be hashed without consuming it
+    '''
+    if any(isinstance(value, Iterator)
+           for value in (*args, *kwargs.values())):
+        return None
+
+    digest = hashlib.sha256()
+    digest.update(f"{fn.__module__}.{fn.__qualname__};".encode())
+    digest.update(_function_source(fn).encode())
+    digest.update(f"matplotlib:{matplotlib.__version__};".encode())
+    _update_digest(digest, args)
+    _update_digest(digest, sorted(kwargs.items()))
+    _update_digest(digest, sorted(settings.items()))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    cache_dir: str
+    max_bytes: int
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        '''
+        Content-addressed on-disk cache of rendered charts with
+        size-based LRU eviction.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Total size of entries kept after eviction
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{extension}")
+
+    def get(self, key: str, extension: str) -> Optional[str]:
+        path = self.entry_path(key, extension)
+        try:
+            # Время изменения служит меткой последнего использования
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, source_path: str) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        extension = os.path.splitext(source_path)[1]
+        path = self.entry_path(key, extension)
+
+        # Запись через временный файл, чтобы параллельные процессы
+        # не увидели недописанную запись
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(source_path, temp_path)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        # Записи других процессов в оценку не попадают; она
+        # уточняется при каждом обходе каталога
+        with _sizes_lock:
+            total = _sizes.get(self.cache_dir)
+            if total is not None:
+                total += size
+                _sizes[self.cache_dir] = total
+        if total is None or total > self.max_bytes:
+            self.evict()
+        return path
+
+    def restore(self, cached_path: str, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(cached_path, path)
+        return path
+
+    def evict(self):
+        '''
+        Scan the cache directory and, if it holds more than max_bytes,
+        remove the least recently used entries down to EVICT_TO of it.
+        '''
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        # Удаление давно не использованных записей
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with _sizes_lock:
+            _sizes[self.cache_dir] = total
@@ -0,0 +1,128 @@
+# Реестр графиков Plotter.run: какие поля Stats читает каждый график
+# и какой метод Plotter строит его аргументы. По именам из реестра
+# main.py проверяет --charts.
+from typing import Iterable, Optional, Tuple
+
+
+def _chart_name(name: str) -> str:
+    return name[len("draw_"):] if name.startswith("draw_") else name
+
+
+class ChartSpec:
+    __slots__ = ("name", "fields", "build", "methods", "sketches")
+
+    def __init__(self, name: str, fields: Tuple[str, ...], build: str,
+                 methods: Optional[Tuple[str, ...]] = None,
+                 sketches: bool = False):
+        '''
+        Chart drawn by Plotter.run and the inputs it needs.
+
+        Args:
+            name: Chart name, the name of its output file
+            fields: Stats fields the chart reads; the chart is skipped
+                when one of them is missing or empty
+            build: Name of the Plotter method that returns the
+                (draw method name, positional arguments) pair
+            methods: Draw methods the chart may use; defaults to
+                draw_<name>
+            sketches: The chart also needs the delay quantile sketches
+                of the run
+        '''
+        self.name = name
+        self.fields = fields
+        self.build = build
+        self.methods = methods or (f"draw_{name}",)
+        self.sketches = sketches
+
+    def matches(self, name: str) -> bool:
+        '''
+        Whether name is the chart name or one of its draw methods,
+        with or without the "draw_" prefix.
+        '''
+        name = _chart_name(name)
+        return name == self.name or any(_chart_name(method) == name
+                                        for method in self.methods)
+
+    def __repr__(self):
+        return f"ChartSpec({self.name!r}, fields={self.fields!r})"
+
+
+CHARTS = (
+    ChartSpec("modelling_time_pie_chart",
+              ("scheduler_processing_time", "scheduler_idle_time",
+               "scheduler_wait_time"),
+              "_modelling_time_chart"),
+    ChartSpec("queue_packet_processing_delay_bar_chart",
+              ("scheduler_packet_processing_delay",
+               "queue_packet_processing_delays"),
+              "_queue_delay_chart"),
+    # Столбцы по пользователям или распределение задержек, если
+    # пользователей больше user_bar_limit
+    ChartSpec("user_packet_processing_delay_chart",
+              ("scheduler_packet_processing_delay",
+               "user_packet_processing_delays"),
+              "_user_delay_chart",
+              methods=("draw_user_packet_processing_delay_bar_chart",
+                       "draw_user_packet_processing_delay_distribution_chart")),
+    ChartSpec("scheduler_throughput_bar_chart",
+              ("scheduler_throughput", "max_scheduler_throughput",
+               "scheduler_unused_resources"),
+              "_throughput_chart"),
+    ChartSpec("queue_delay_quantiles_chart", (), "_queue_quantiles_chart",
+              sketches=True),
+    ChartSpec("user_delay_quantiles_chart", (), "_user_quantiles_chart",
+              sketches=True),
+)
+CHART_NAMES = tuple(spec.name for spec in CHARTS)
+
+
+class ChartUnavailableError(ValueError):
+    def __init__(self, chart: str, missing: Iterable[str]):
+        '''
+        A known chart cannot be drawn for this run.
+
+        Args:
+            chart: Chart name
+            missing: Missing inputs, Stats fields or "sketches"
+        '''
+        self.chart = chart
+        self.missing = list(missing)
+        super().__init__(f"Chart {chart} is not available: no data "
+                         f"({', '.join(self.missing)})")
+
+
+def find_chart(name: str) -> Optional[ChartSpec]:
+    '''
+    Registry entry of a chart name or draw method name, or None.
+    '''
+    return next((spec for spec in CHARTS if spec.matches(name)), None)
+
+
+def select_charts(names: Optional[Iterable[str]] = None
+                  ) -> Tuple[ChartSpec, ...]:
+    '''
+    Resolve chart names into registry entries, in registry order.
+
+    Args:
+        names: Chart names or draw method names; None selects all charts
+
+    Returns:
+        Selected ChartSpec entries
+    '''
+    if names is None:
+        return CHARTS
+    names = list(names)
+    unknown = [name for name in names
+               if not any(spec.matches(name) for spec in CHARTS)]
+    if unknown:
+        raise ValueError(f"Unknown chart: {', '.join(unknown)}; "
+                         f"available: {', '.join(CHART_NAMES)}")
+    return tuple(spec for spec in CHARTS
+                 if any(spec.matches(name) for name in names))
+
+
+def needs_sketches(names: Optional[Iterable[str]] = None) -> bool:
+    '''
+    Whether any of the selected charts draws delay quantiles.
+    '''
+    return any(spec.sketches for spec in select_charts(names))
@@ -0,0 +1,230 @@
+from functools import reduce
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.figure import FigureBase
+
+from src.analytics import utilisation
+from src.cache import RenderCache
+from src.defaults import OUTPUT_DIR, USER_BAR_CHART_LIMIT
+from src.profiles import DEFAULT_PROFILE
+from src.plotter import (Plotter, log_draw, grouped_bars, bars_figsize,
+                         target_figure, fit_layout, CDF_POINTS)
+from src.sinks import Sink
+from src.stats import Stats, DelayMap
+
+
+def align_delays(maps: Sequence[DelayMap]) -> Tuple[
+        np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    '''
+    Align delay maps of several runs by identifier.
+
+    Args:
+        maps: Delay map of every run
+
+    Returns:
+        Sorted union of the identifiers, delays of shape
+        (runs, identifiers) with NaN where a run has no such identifier,
+        and error half-widths of the same shape (zero where missing) or
+        None when no map carries errors
+    '''
+    ids = reduce(np.union1d, (delays.ids for delays in maps),
+                 np.empty(0, dtype=np.int64))
+    values = np.full((len(maps), ids.size), np.nan)
+    errors = (None if all(delays.errors is None for delays in maps)
+              else np.zeros((len(maps), ids.size)))
+    # Цикл только по запускам, сопоставление идентификаторов векторное
+    for row, delays in enumerate(maps):
+        columns = np.searchsorted(ids, delays.ids)
+        values[row, columns] = delays.delays
+        if errors is not None and delays.errors is not None:
+            errors[row, columns] = delays.errors
+    return ids, values, errors
+
+
+def _stats_error(stats: Stats, field: str) -> float:
+    errors = getattr(stats, "errors", None)
+    return 0.0 if errors is None else errors.get(field, 0.0)
+
+
+class ComparisonPlotter(Plotter):
+    runs: List[Tuple[str, Stats]]
+    dashboard_wide_charts = frozenset((
+        "draw_queue_delay_comparison_chart",
+        "draw_user_delay_comparison_chart",
+    ))
+
+    def __init__(self, runs: Sequence[Tuple[str, Stats]],
+                 output_dir: str = f"./{OUTPUT_DIR}",
+                 cache: Optional[RenderCache] = None,
+                 user_bar_limit: int = USER_BAR_CHART_LIMIT,
+                 profile: Any = DEFAULT_PROFILE):
+        '''
+        Draw the runs of several schedulers side by side, one figure
+        per metric.
+
+        Args:
+            runs: (label, Stats) of every scheduler, in legend order;
+                ReplicatedStats are drawn with confidence intervals
+            output_dir: Directory the charts are saved into
+            cache: Render cache, so unchanged charts are not redrawn
+            user_bar_limit: Above this number of users the grouped
+                per-user bars are replaced by overlaid delay CDFs
+            profile: Render profile or its name in RENDER_PROFILES
+        '''
+        if len(runs) < 2:
+            raise ValueError("at least two runs are needed for a comparison")
+        # Графики сравнения описаны в charts(), а не в реестре CHARTS
+        super().__init__(runs[0][1], output_dir, cache, user_bar_limit,
+                         profile=profile, chart_names=())
+        self.runs = list(runs)
+
+    def charts(self) -> List[Tuple[str, tuple]]:
+        labels = tuple(label for label, _ in self.runs)
+        runs = [stats for _, stats in self.runs]
+        delay = "scheduler_packet_processing_delay"
+        means = tuple(getattr(stats, delay) for stats in runs)
+        mean_errors = tuple(_stats_error(stats, delay) for stats in runs)
+        return [
+            ("draw_queue_delay_comparison_chart",
+             (labels,
+              tuple(stats.queue_packet_processing_delays for stats in runs),
+              means, mean_errors)),
+            ("draw_user_delay_comparison_chart",
+             (labels,
+              tuple(stats.user_packet_processing_delays for stats in runs),
+              means, mean_errors, self.user_bar_limit)),
+            ("draw_throughput_comparison_chart",
+             (labels,
+              # Доля NaN при нулевом максимуме: ошибка возникает при
+              # отрисовке этого графика и не мешает остальным
+              tuple(utilisation(stats.scheduler_throughput,
+                                stats.max_scheduler_throughput)
+                    for stats in runs),
+              tuple(stats.scheduler_unused_resources for stats in runs),
+              tuple(utilisation(_stats_error(stats, "scheduler_throughput"),
+                                stats.max_scheduler_throughput)
+                    for stats in runs),
+              tuple(_stats_error(stats, "scheduler_unused_resources")
+                    for stats in runs))),
+        ]
+
+    @log_draw
+    def draw_queue_delay_comparison_chart(
+        self,
+        labels: Sequence[str],
+        queue_packet_processing_delays: Sequence[DelayMap],
+        means: Sequence[float],
+        mean_errors: Sequence[float],
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        path = self.chart_path("queue_delay_comparison_chart")
+
+        ids, values, errors = align_delays(queue_packet_processing_delays)
+        categories = np.append(np.char.add("Очередь ", (ids + 1).astype(str)),
+                               "Среднее")
+        values = np.column_stack([values, means]) * 1000
+        if errors is not None or any(mean_errors):
+            if errors is None:
+                errors = np.zeros((len(labels), ids.size))
+            errors = np.column_stack([errors, mean_errors]) * 1000
+
+        fig = target_figure(figure, figsize=bars_figsize(categories.size,
+                                                         len(labels)))
+        ax = fig.add_subplot()
+        grouped_bars(ax, categories, labels, values, errors)
+        ax.set_title("Задержка обслуживания пакетов в очередях", pad=20)
+        ax.set_xlabel("Номер очереди")
+        ax.set_ylabel("Задержка (мс)")
+        fit_layout(fig)
+        return self._save(fig, path, sink)
+
+    @log_draw
+    def draw_user_delay_comparison_chart(
+        self,
+        labels: Sequence[str],
+        user_packet_processing_delays: Sequence[DelayMap],
+        means: Sequence[float],
+        mean_errors: Sequence[float],
+        user_bar_limit: int,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        # Порог передаётся аргументом, а не берётся из self, чтобы
+        # попасть в ключ кэша
+        path = self.chart_path("user_delay_comparison_chart")
+
+        ids, values, errors = align_delays(user_packet_processing_delays)
+        values = values * 1000
+
+        bars = ids.size <= user_bar_limit
+        fig = target_figure(figure, figsize=bars_figsize(ids.size + 1,
+                                                         len(labels))
+                            if bars else (10, 6))
+        ax = fig.add_subplot()
+        if bars:
+            categories = np.append(
+                np.char.add("Абонент ", (ids + 1).astype(str)), "Среднее")
+            if errors is not None or any(mean_errors):
+                if errors is None:
+                    errors = np.zeros((len(labels), ids.size))
+                errors = np.column_stack([errors, mean_errors]) * 1000
+            grouped_bars(ax, categories, labels,
+                         np.column_stack([values, np.multiply(means, 1000)]),
+                         errors)
+            ax.set_xlabel("Идентификатор пользователя")
+            ax.set_ylabel("Задержка (мс)")
+        else:
+            # Слишком много пользователей для столбцов: функции
+            # распределения задержки всех планировщиков на одном графике
+            for row, label in enumerate(labels):
+                data = np.sort(values[row][~np.isnan(values[row])])
+                positions = np.linspace(0, max(data.size - 1, 0),
+                                        CDF_POINTS).astype(np.int64)
+                line, = ax.plot(data[positions] if data.size else positions,
+                                (positions + 1) / max(data.size, 1),
+                                label=label)
+                ax.axvline(means[row] * 1000, color=line.get_color(),
+                           linestyle='--', linewidth=1)
+            ax.set_xlabel("Задержка (мс)")
+            ax.set_ylabel("Доля пользователей")
+            ax.legend()
+        ax.set_title("Задержка обслуживания пакетов пользователей", pad=20)
+        fit_layout(fig)
+        return self._save(fig, path, sink)
+
+    @log_draw
+    def draw_throughput_comparison_chart(
+        self,
+        labels: Sequence[str],
+        throughput_parts: Sequence[float],
+        unused_resources: Sequence[float],
+        throughput_errors: Sequence[float],
+        unused_resources_errors: Sequence[float],
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        '''
+        Used share of the throughput and of the resource blocks
+        of every scheduler; resources are normalised to 1 as in
+        draw_scheduler_throughput_bar_chart.
+        '''
+        path = self.chart_path("throughput_comparison_chart")
+
+        if np.isnan(throughput_parts).any():
+            raise ValueError("maximum throughput must be non-zero "
+                             "in every run")
+        values = np.column_stack([throughput_parts,
+                                  np.subtract(1, unused_resources)]) * 100
+        errors = np.column_stack([throughput_errors,
+                                  unused_resources_errors]) * 100
+
+        fig = target_figure(figure, figsize=(8, 6))
+        ax = fig.add_subplot()
+        grouped_bars(ax, ['Пропускная способность', 'Ресурсные блоки'],
+                     labels, values, errors if errors.any() else None)
+        ax.set_ylim(0, 100)
+        ax.legend(framealpha=0.9, loc='upper left', bbox_to_anchor=(1.02, 1),
+                  borderaxespad=0)
+        ax.set_ylabel('Использование (%)')
+        ax.set_title('Использование ресурсов канала планировщиками')
+        fit_layout(fig)
+        return self._save(fig, path, sink)
@@ -0,0 +1,11 @@
+# Значения по умолчанию, нужные интерфейсу командной строки до разбора
+# аргументов. Модуль не должен импортировать matplotlib, numpy и yaml,
+# чтобы --help и ошибки в аргументах не ждали их загрузки.
+OUTPUT_DIR = "output/"
+CACHE_DIR_NAME = ".cache"
+# Многостраничный PDF со всеми графиками запуска
+PDF_REPORT_NAME = "report.pdf"
+
+# Выше этого числа пользователей вместо столбца на каждого
+# пользователя строится распределение задержки
+USER_BAR_CHART_LIMIT = 50
@@ -0,0 +1,242 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.figure import FigureBase
+
+from src.cache import RenderCache
+from src.defaults import OUTPUT_DIR
+from src.profiles import DEFAULT_PROFILE
+from src.plotter import Plotter, log_draw, target_figure, fit_layout
+from src.sinks import Sink
+from src.stats import Stats, DelayMap
+
+# Изменение задержки меньше этой доли базовой не считается изменением
+DEFAULT_RELATIVE_THRESHOLD = 0.05
+# ... и меньше этого значения в секундах
+DEFAULT_ABSOLUTE_THRESHOLD = 0.0
+# Сколько изменений с наибольшим модулем показывает график
+DIFF_TOP = 30
+
+
+def _sorted_order(ids: np.ndarray) -> np.ndarray:
+    # Идентификаторы обычно уже отсортированы: проверка дешевле сортировки
+    if np.all(ids[1:] > ids[:-1]):
+        return np.arange(ids.size)
+    return np.argsort(ids)
+
+
+def join_ids(left: np.ndarray, right: np.ndarray) -> Tuple[
+        np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Join two arrays of unique identifiers.
+
+    Returns:
+        Sorted common identifiers, their positions in left and in right,
+        and the sorted identifiers found only in left and only in right
+    '''
+    # Обе стороны сортируются, и поиск идёт по возрастающим ключам:
+    # так он быстрее, чем поиск в случайном порядке или intersect1d
+    left_order = _sorted_order(left)
+    right_order = _sorted_order(right)
+    left_sorted = left[left_order]
+    right_sorted = right[right_order]
+    positions = np.searchsorted(right_sorted, left_sorted)
+    positions[positions == right_sorted.size] = 0
+    found = (right_sorted[positions] == left_sorted
+             if right_sorted.size else np.zeros(left.size, dtype=bool))
+    matched = np.zeros(right.size, dtype=bool)
+    matched[positions[found]] = True
+    return (left_sorted[found], left_order[found],
+            right_order[positions[found]], left_sorted[~found],
+            right_sorted[~matched])
+
+
+class DelayDiff:
+    def __init__(self, baseline: DelayMap, candidate: DelayMap,
+                 relative_threshold: float = DEFAULT_RELATIVE_THRESHOLD,
+                 absolute_threshold: float = DEFAULT_ABSOLUTE_THRESHOLD):
+        '''
+        Per-identifier delay changes between two runs. Identifiers
+        present in both runs are joined with array operations; a change
+        is flagged when it exceeds both thresholds.
+
+        Args:
+            baseline: Delays of the baseline run
+            candidate: Delays of the candidate run
+            relative_threshold: Smallest flagged change as a share of
+                the baseline delay
+            absolute_threshold: Smallest flagged change in seconds
+        '''
+        # Обычно идентификаторы обоих запусков совпадают и идут в одном
+        # порядке: тогда соединение не требует сортировки
+        if np.array_equal(baseline.ids, candidate.ids):
+            self.ids = baseline.ids
+            self.baseline = baseline.delays
+            self.candidate = candidate.delays
+            self.removed = self.added = np.empty(0, dtype=np.int64)
+        else:
+            (self.ids, base_index, candidate_index,
+             self.removed, self.added) = join_ids(baseline.ids, candidate.ids)
+            self.baseline = baseline.delays[base_index]
+            self.candidate = candidate.delays[candidate_index]
+
+        self.delta = self.candidate - self.baseline
+        magnitude = np.abs(self.delta)
+        self.changed = ((magnitude > absolute_threshold)
+                        & (magnitude > relative_threshold
+                           * np.abs(self.baseline)))
+
+    @property
+    def slower(self) -> np.ndarray:
+        '''
+        Mask of the flagged identifiers whose delay grew.
+        '''
+        return self.changed & (self.delta > 0)
+
+    @property
+    def faster(self) -> np.ndarray:
+        return self.changed & (self.delta < 0)
+
+
+class StatsDiff:
+    def __init__(self, baseline: Stats, candidate: Stats,
+                 relative_threshold: float = DEFAULT_RELATIVE_THRESHOLD,
+                 absolute_threshold: float = DEFAULT_ABSOLUTE_THRESHOLD):
+        '''
+        Delay changes of a candidate run against a baseline run: the
+        mean scheduler delay, per queue and per user.
+
+        Args:
+            baseline: Statistics of the baseline run
+            candidate: Statistics of the candidate run
+            relative_threshold: Smallest flagged change as a share of
+                the baseline delay
+            absolute_threshold: Smallest flagged change in seconds
+        '''
+        self.queues = DelayDiff(baseline.queue_packet_processing_delays,
+                                candidate.queue_packet_processing_delays,
+                                relative_threshold, absolute_threshold)
+        self.users = DelayDiff(baseline.user_packet_processing_delays,
+                               candidate.user_packet_processing_delays,
+                               relative_threshold, absolute_threshold)
+        self.mean = DelayDiff(
+            DelayMap([0], [baseline.scheduler_packet_processing_delay]),
+            DelayMap([0], [candidate.scheduler_packet_processing_delay]),
+            relative_threshold, absolute_threshold)
+
+    @property
+    def regressions(self) -> int:
+        '''
+        Number of flagged slowdowns: the mean delay, queues and users.
+        '''
+        return int(sum(np.count_nonzero(diff.slower)
+                       for diff in (self.mean, self.queues, self.users)))
+
+    def changed_entries(self, top: Optional[int] = None
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Labels and delay changes (seconds) of the flagged queues and
+        users, queues first, each part in identifier order.
+
+        Args:
+            top: Keep only this many entries with the largest change
+        '''
+        labels, deltas = [], []
+        for prefix, diff in (("Очередь ", self.queues),
+                             ("Абонент ", self.users)):
+            changed = np.flatnonzero(diff.changed)
+            labels.append(np.char.add(prefix,
+                                      (diff.ids[changed] + 1).astype(str)))
+            deltas.append(diff.delta[changed])
+        labels = np.concatenate(labels)
+        deltas = np.concatenate(deltas)
+        if top is not None and deltas.size > top:
+            keep = np.sort(np.argpartition(np.abs(deltas),
+                                           deltas.size - top)[-top:])
+            labels, deltas = labels[keep], deltas[keep]
+        return labels, deltas
+
+    def __str__(self):
+        lines = []
+        for title, diff in (("Средняя задержка", self.mean),
+                            ("Очереди", self.queues),
+                            ("Пользователи", self.users)):
+            lines.append(f"{title}: медленнее {np.count_nonzero(diff.slower)}, "
+                         f"быстрее {np.count_nonzero(diff.faster)} "
+                         f"из {diff.ids.size}"
+                         + (f", только в базовом {diff.removed.size}"
+                            if diff.removed.size else "")
+                         + (f", только в новом {diff.added.size}"
+                            if diff.added.size else ""))
+        lines.append(f"Регрессий: {self.regressions}")
+        return "\n".join(lines)
+
+
+class DiffPlotter(Plotter):
+    diff: StatsDiff
+    top: int
+
+    def __init__(self, diff: StatsDiff, candidate: Stats,
+                 output_dir: str = f"./{OUTPUT_DIR}",
+                 cache: Optional[RenderCache] = None,
+                 top: int = DIFF_TOP,
+                 profile: Any = DEFAULT_PROFILE):
+        '''
+        Draw the delay changes of a candidate run against a baseline.
+
+        Args:
+            diff: Changes to draw
+            candidate: Statistics of the candidate run
+            output_dir: Directory the charts are saved into
+            cache: Render cache, so unchanged charts are not redrawn
+            top: Largest number of changed entries on the chart
+            profile: Render profile or its name in RENDER_PROFILES
+        '''
+        # График изменений описан в charts(), а не в реестре CHARTS
+        super().__init__(candidate, output_dir, cache, profile=profile,
+                         chart_names=())
+        self.diff = diff
+        self.top = top
+
+    def charts(self) -> List[Tuple[str, tuple]]:
+        labels, deltas = self.diff.changed_entries(self.top)
+        changed = int(np.count_nonzero(self.diff.queues.changed)
+                      + np.count_nonzero(self.diff.users.changed))
+        return [("draw_delay_diff_chart", (labels, deltas, changed))]
+
+    @log_draw
+    def draw_delay_diff_chart(
+        self,
+        labels: Sequence[str],
+        deltas: np.ndarray,
+        changed: int,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        '''
+        Horizontal bars of the delay change of every flagged queue and
+        user: slowdowns in red, speedups in green.
+
+        Args:
+            labels: Bar labels
+            deltas: Delay changes in seconds, in the order of labels
+            changed: Total number of flagged entries, for the title
+        '''
+        path = self.chart_path("delay_diff_chart")
+
+        values = np.asarray(deltas) * 1000
+        fig = target_figure(figure, figsize=(10, max(3, 0.3 * len(labels) + 2)))
+        ax = fig.add_subplot()
+        ax.barh(np.arange(len(labels)), values, edgecolor='black',
+                color=np.where(values > 0, '#d62728', '#2ca02c'))
+        ax.set_yticks(np.arange(len(labels)), labels)
+        ax.invert_yaxis()
+        ax.axvline(0, color='black', linewidth=1)
+        ax.set_xlabel("Изменение задержки (мс)")
+        title = "Изменение задержки обслуживания пакетов"
+        if len(labels) < changed:
+            title += f" ({len(labels)} наибольших из {changed})"
+        elif not len(labels):
+            title += " (изменений нет)"
+        ax.set_title(title, pad=20)
+        fit_layout(fig)
+        return self._save(fig, path, sink)
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Активный регистратор; None — измерения выключены и log_draw
+# не выполняет никакой дополнительной работы
+_recorder = None
+
+# Число незавершённых измерений: при отрисовке в потоках tracemalloc
+# запускается первым измерением и останавливается последним
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_owns_tracing = False
+
+
+class MetricsRecorder:
+    records: List[Dict[str, Any]]
+
+    def __init__(self):
+        '''
+        Collect per-chart timing and memory measurements.
+        '''
+        self.records = []
+
+    @contextmanager
+    def measure(self, chart: str) -> Iterator[Dict[str, Any]]:
+        '''
+        Measure one draw_* call. The caller fills "path" and "cache"
+        in the yielded record.
+
+        Args:
+            chart: Name of the draw_* method
+        '''
+        global _tracing_users, _owns_tracing
+        record = {"chart": chart, "path": None, "cache": None, "error": None}
+        with _tracing_lock:
+            if _tracing_users == 0:
+                _owns_tracing = not tracemalloc.is_tracing()
+                if _owns_tracing:
+                    tracemalloc.start()
+            _tracing_users += 1
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        # Время ЦП только своего потока, а пик памяти общий для процесса:
+        # при отрисовке в потоках он включает соседние графики
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["wall_time"] = time.perf_counter() - wall_start
+            record["cpu_time"] = time.thread_time() - cpu_start
+            with _tracing_lock:
+                record["peak_alloc_bytes"] = tracemalloc.get_traced_memory()[1]
+                _tracing_users -= 1
+                if _tracing_users == 0 and _owns_tracing:
+                    tracemalloc.stop()
+            path = record["path"]
+            record["file_size"] = (os.path.getsize(path)
+                                   if isinstance(path, str)
+                                   and os.path.exists(path) else None)
+            self.records.append(record)
+
+    def write_jsonl(self, file_path: str):
+        with open(file_path, 'w') as file:
+            for record in self.records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary_table(self) -> str:
+        header = (f"{'График':<55} {'Время, с':>9} {'ЦП, с':>8} "
+                  f"{'Пик, МиБ':>9} {'Файл, КиБ':>10}")
+        lines = [header, "-" * len(header)]
+        for record in self.records:
+            size = record["file_size"]
+            lines.append(
+                f"{record['chart']:<55} {record['wall_time']:>9.3f} "
+                f"{record['cpu_time']:>8.3f} "
+                f"{record['peak_alloc_bytes'] / 2 ** 20:>9.1f} "
+                f"{size / 2 ** 10 if size is not None else float('nan'):>10.1f}"
+                + (f"  ошибка: {record['error']}" if record["error"] else ""))
+        return "\n".join(lines)
+
+
+def enable_metrics() -> MetricsRecorder:
+    '''
+    Start recording metrics of every draw_* call in this process.
+    '''
+    global _recorder
+    _recorder = MetricsRecorder()
+    return _recorder
+
+
+def disable_metrics():
+    global _recorder
+    _recorder = None
+
+
+def active_recorder() -> Optional[MetricsRecorder]:
+    return _recorder
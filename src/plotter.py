@@ -1,127 +1,892 @@
+import math
 import os
-import matplotlib.pyplot as plt
-from typing import Dict
-from src.stats import Stats
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from src.stats import Stats, DelayMap, DelayMapLike, as_delay_map
+from src.analytics import time_ratios, utilisation
+from src.cache import RenderCache, chart_key
+from src.trace import downsample_trace, downsample_matrix
+from src.metrics import active_recorder, enable_metrics, disable_metrics
+from src.sinks import FileSink, BufferSink, PdfSink, Sink
+from src.sketch import DelaySketches, QUANTILES, QUANTILE_LABELS
+from src.defaults import OUTPUT_DIR, USER_BAR_CHART_LIMIT
+from src.profiles import RenderProfile, DEFAULT_PROFILE, get_profile
+from src.charts import (ChartSpec, ChartUnavailableError, CHART_NAMES,
+                        find_chart, select_charts)
+from src.templates import (new_figure, TemplateStore, BarChartTemplate,
+                           PieChartTemplate, ThroughputChartTemplate,
+                           DistributionChartTemplate)
 import numpy as np
+from matplotlib.figure import Figure, FigureBase
+
+TOP_USERS = 10
+HISTOGRAM_BINS = 50
+CDF_POINTS = 512
+TRACE_FIGSIZE = (12, 8)
+HEATMAP_FIGSIZE = (12, 8)
+# Общая ширина группы столбцов одной категории
+GROUP_WIDTH = 0.8
+# Ширина рисунка на один столбец, дюймы
+BAR_INCHES = 0.4
+# Выше этого числа категорий подписи оси X поворачиваются
+ROTATE_LABELS_ABOVE = 8
+# Сводный рисунок: не больше DASHBOARD_COLUMNS графиков в строке,
+# широкие графики занимают строку целиком
+DASHBOARD_WIDTH = 13
+DASHBOARD_ROW_HEIGHT = 4
+DASHBOARD_COLUMNS = 3
+
+# Отрисовка графика с учётом кэша: возвращает результат приёмника
+# (путь к файлу по умолчанию) и состояние кэша. Кэш используется только
+# для файлов в каталоге Plotter, то есть без явно заданного приёмника
+# и без рисунка, в который график встраивается.
+def _draw_cached(fn, args, kwargs) -> Tuple[Any, Optional[str]]:
+    cache = getattr(args[0], "cache", None) if args else None
+    if (cache is None or kwargs.get("sink") is not None
+            or kwargs.get("figure") is not None):
+        return fn(*args, **kwargs), None
+
+    # Повторная отрисовка не нужна, если график с теми же данными,
+    # кодом и настройками уже есть в кэше
+    # Шаблоны дают изображение, отличное от построенного заново
+    profile = args[0].profile
+    settings = dict(profile.settings(), format=profile.fmt,
+                    templates=getattr(args[0], "templates", None) is not None)
+    key = chart_key(fn, args[1:], kwargs, settings)
+    if key is None:
+        return fn(*args, **kwargs), "не используется"
+
+    path = args[0].chart_path(fn.__name__)
+    cached_path = cache.get(key, profile.extension)
+    if cached_path is not None:
+        try:
+            return cache.restore(cached_path, path), "попадание"
+        except FileNotFoundError:
+            # Запись вытеснена другим процессом между get и restore:
+            # график рисуется заново
+            pass
+
+    path = fn(*args, **kwargs)
+    cache.put(key, path)
+    return path, "промах"
 
-OUTPUT_DIR = "output/"
 
 def log_draw(fn):
     def inner(*args, **kwargs):
-        path = fn(*args, **kwargs)
+        recorder = active_recorder()
+        if recorder is None:
+            result, status = _draw_cached(fn, args, kwargs)
+        else:
+            with recorder.measure(fn.__name__) as record:
+                result, status = _draw_cached(fn, args, kwargs)
+                record["path"] = result if isinstance(result, str) else None
+                record["cache"] = status
+
+        cache_line = f"Кэш: {status}\n" if status else ""
+        target = (os.path.abspath(result) if isinstance(result, str)
+                  else kwargs.get("sink"))
         print(f"{fn.__name__}.\n"
-              f"Сохранено в {os.getcwd()}{path[1:]}\n")
-        return path
+              f"{cache_line}"
+              f"Сохранено в {target}\n")
+        return result
 
     inner.__wrapped__ = fn
     return inner
 
+
+# Шрифт загружается при первой отрисовке текста. Прогрев заранее строит
+# список шрифтов matplotlib (он сохраняется на диск и переживает процесс)
+# и загружает шрифт кириллических подписей, пока процесс простаивает.
+def warm_font_cache():
+    figure = new_figure(figsize=(1, 1))
+    figure.text(0, 0, "Задержка обслуживания (мс)")
+    figure.canvas.draw()
+
+
+# Полуширины доверительных интервалов столбцов задержек и столбца
+# среднего в мс; None для одиночного запуска без интервалов
+def _delay_errors(delays: DelayMap,
+                  mean_error: Optional[float]) -> Optional[np.ndarray]:
+    if delays.errors is None and mean_error is None:
+        return None
+    errors = delays.errors if delays.errors is not None else np.zeros(len(delays))
+    return np.append(errors, mean_error or 0.0) * 1000
+
+
+def grouped_bars(ax, categories: Sequence[str], labels: Sequence[str],
+                 values: np.ndarray, errors: Optional[np.ndarray]):
+    '''
+    Draw a group of bars per category, one bar per series.
+
+    Args:
+        ax: Axes to draw on
+        categories: X axis labels
+        labels: Legend label of every series
+        values: Values of shape (series, categories)
+        errors: Error bar half-widths of the shape of values, or None
+    '''
+    # Столбцы одной серии сдвинуты внутри группы каждой категории
+    positions = np.arange(len(categories))
+    width = GROUP_WIDTH / len(labels)
+    offsets = (np.arange(len(labels)) - (len(labels) - 1) / 2) * width
+    for row, label in enumerate(labels):
+        ax.bar(positions + offsets[row], values[row], width,
+               yerr=None if errors is None else errors[row], capsize=2,
+               edgecolor='black', label=label)
+    ax.set_xticks(positions, categories)
+    if len(categories) > ROTATE_LABELS_ABOVE:
+        ax.tick_params(axis='x', labelrotation=90)
+    ax.legend()
+
+
+def bars_figsize(categories: int, series: int) -> Tuple[float, float]:
+    return max(8, categories * series * BAR_INCHES), 6
+
+
+# Рисунок графика: переданная область сводного рисунка или новый рисунок
+def target_figure(figure: Optional[FigureBase], **kwargs) -> FigureBase:
+    return new_figure(**kwargs) if figure is None else figure
+
+
+# Компоновку областей сводного рисунка выполняет он сам
+# (layout="constrained"), tight_layout применяется только к целому рисунку
+def fit_layout(figure: FigureBase):
+    if isinstance(figure, Figure):
+        figure.tight_layout()
+
+
+# Инициализация процесса-исполнителя. Графики строятся на собственных
+# фигурах с холстом Agg без pyplot, поэтому настраивать бэкенд не нужно,
+# шрифты загружаются до получения первого задания
+def init_worker():
+    warm_font_cache()
+
+
+# Поле статистики отсутствует (None или NaN) или пусто (словарь
+# задержек без элементов)
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    return hasattr(value, "__len__") and len(value) == 0
+
+
+def _report_failure(name: str, error: Exception):
+    print(f"{name}.\nОшибка: {error}\n")
+
+
+# Отрисовка одного графика в процессе-исполнителе; измерения
+# возвращаются вместе с путём, чтобы собрать их в основном процессе
+def _draw_chart(plotter, name: str, args: tuple,
+                collect_metrics: bool = False) -> Tuple[str, List[dict]]:
+    if not collect_metrics:
+        return getattr(plotter, name)(*args), []
+
+    recorder = enable_metrics()
+    try:
+        return getattr(plotter, name)(*args), recorder.records
+    finally:
+        disable_metrics()
+
+
 class Plotter:
     stats: Stats
+    output_dir: str
+    cache: Optional[RenderCache]
+    user_bar_limit: int
+    templates: Optional[TemplateStore]
+    sketches: Optional[DelaySketches]
+    profile: RenderProfile
+    chart_names: Optional[Tuple[str, ...]]
+    chart_specs: Tuple[ChartSpec, ...]
+    # Графики, которые на сводном рисунке занимают строку целиком
+    dashboard_wide_charts = frozenset((
+        "draw_user_packet_processing_delay_bar_chart",
+        "draw_user_packet_processing_delay_distribution_chart",
+        "draw_user_delay_quantiles_chart",
+    ))
     
-    def __init__(self, stats: Stats):
+    def __init__(self, stats: Stats, output_dir: str = f"./{OUTPUT_DIR}",
+                 cache: Optional[RenderCache] = None,
+                 user_bar_limit: int = USER_BAR_CHART_LIMIT,
+                 templates: Optional[TemplateStore] = None,
+                 sketches: Optional[DelaySketches] = None,
+                 profile: Any = DEFAULT_PROFILE,
+                 chart_names: Optional[Iterable[str]] = None):
+        '''
+        Args:
+            stats: Statistics of the run
+            output_dir: Directory the charts are saved into
+            cache: Render cache, so unchanged charts are not redrawn
+            user_bar_limit: Above this number of users the per-user bar
+                chart is replaced by a delay distribution chart
+            templates: Chart figures shared between Plotter instances;
+                when given, figures are built once and only their data
+                is updated for every new Stats
+            sketches: Quantile sketches of the per-packet delays of
+                the run; when given, delay quantile charts are drawn too
+            profile: Render profile or its name in RENDER_PROFILES:
+                format, resolution and encoding of the saved charts
+            chart_names: Names of the charts of run() from CHART_NAMES
+                (or their draw methods); None draws all charts
+        '''
         self.stats = stats
+        self.output_dir = output_dir
+        self.cache = cache
+        self.user_bar_limit = user_bar_limit
+        self.templates = templates
+        self.sketches = sketches
+        self.profile = get_profile(profile)
+        self.chart_names = None if chart_names is None else tuple(chart_names)
+        self.chart_specs = select_charts(self.chart_names)
+
+    def chart_path(self, chart: str) -> str:
+        '''
+        Build the output path of a chart.
+
+        Args:
+            chart: Chart name or the name of its draw_* method
+        '''
+        if chart.startswith("draw_"):
+            chart = chart[len("draw_"):]
+        return os.path.join(self.output_dir, f"{chart}{self.profile.extension}")
+
+    def _save(self, figure, path: str, sink: Optional[Sink],
+              bbox_inches: Any = None) -> Any:
+        # График, встроенный в сводный рисунок, сохраняется вместе с ним
+        if not isinstance(figure, Figure):
+            return figure
+        # По умолчанию график сохраняется в файл каталога Plotter
+        if sink is None:
+            sink = FileSink(path)
+        settings = self.profile.settings()
+        if bbox_inches is not None:
+            settings["bbox_inches"] = bbox_inches
+        return sink.write(figure, settings)
+
+    def _render_template(self, chart: str, shape: Any, build,
+                         path: str, sink: Optional[Sink], *data) -> Any:
+        # Шаблон строится при первом обращении и при изменении числа
+        # категорий, затем обновляются только данные
+        template = self.templates.get(chart, shape, build)
+        template.update(*data)
+        template.layout(self.profile.dpi)
+        return self._save(template.figure, path, sink,
+                          template.tight_bbox() if self.profile.tight else None)
+
+    def render(self, chart: str, fmt: str = "png",
+               sink: Optional[Sink] = None) -> Any:
+        '''
+        Render one of the charts drawn by run() without writing
+        into the output directory.
+
+        Args:
+            chart: Chart name from the registry or the name of one of
+                its draw_* methods, also when the chart is not selected
+                or run() would use the other method
+            fmt: Image format used when no sink is given
+            sink: Destination of the image; by default an in-memory buffer
+
+        Returns:
+            Image bytes for the default sink, otherwise the result
+            of the sink
+
+        Raises:
+            ChartUnavailableError: The chart needs inputs the run lacks
+            ValueError: The chart name is unknown
+        '''
+        name = chart if chart.startswith("draw_") else f"draw_{chart}"
+        spec = find_chart(chart)
+        if spec is not None:
+            missing = self._missing_inputs(spec)
+            if missing:
+                raise ChartUnavailableError(spec.name, missing)
+            method, args = getattr(self, spec.build)()
+            # Названный метод, например распределение задержек при числе
+            # пользователей не больше user_bar_limit
+            if name in spec.methods:
+                method = name
+        else:
+            # Графики подклассов описаны только в charts()
+            charts = dict(self.charts())
+            if name not in charts:
+                raise ValueError(f"Unknown chart: {chart}; available: "
+                                 f"{', '.join(CHART_NAMES + tuple(charts))}")
+            method, args = name, charts[name]
+
+        if sink is None:
+            sink = BufferSink(fmt)
+        return getattr(self, method)(*args, sink=sink)
+
+    def charts(self) -> List[Tuple[str, tuple]]:
+        '''
+        Describe the charts drawn by run(): the selected charts whose
+        inputs are present. Arguments are built only for these charts.
+
+        Returns:
+            List of (draw method name, positional arguments) pairs
+        '''
+        return [getattr(self, spec.build)() for spec in self.chart_specs
+                if not self._missing_inputs(spec)]
+
+    def skipped_charts(self) -> List[Tuple[str, List[str]]]:
+        '''
+        Selected charts that run() skips because of missing inputs.
+
+        Returns:
+            List of (chart name, missing inputs) pairs; an input is
+            a Stats field or "sketches"
+        '''
+        skipped = []
+        for spec in self.chart_specs:
+            missing = self._missing_inputs(spec)
+            # Графики квантилей без скетчей не рисуются и не упоминаются,
+            # если их не выбрали явно
+            if missing and not (missing == ["sketches"]
+                                and self.chart_names is None):
+                skipped.append((spec.name, missing))
+        return skipped
+
+    def _missing_inputs(self, spec: ChartSpec) -> List[str]:
+        missing = [field for field in spec.fields
+                   if _is_empty(getattr(self.stats, field, None))]
+        if spec.sketches and self.sketches is None:
+            missing.append("sketches")
+        return missing
+
+    def _modelling_time_chart(self) -> Tuple[str, tuple]:
+        return ("draw_modelling_time_pie_chart",
+                (self.stats.scheduler_processing_time,
+                 self.stats.scheduler_idle_time,
+                 self.stats.scheduler_wait_time))
+
+    def _queue_delay_chart(self) -> Tuple[str, tuple]:
+        return ("draw_queue_packet_processing_delay_bar_chart",
+                (self.stats.scheduler_packet_processing_delay,
+                 self.stats.queue_packet_processing_delays,
+                 self._error("scheduler_packet_processing_delay")))
+
+    def _user_delay_chart(self) -> Tuple[str, tuple]:
+        if len(self.stats.user_packet_processing_delays) > self.user_bar_limit:
+            name = "draw_user_packet_processing_delay_distribution_chart"
+        else:
+            name = "draw_user_packet_processing_delay_bar_chart"
+        return (name,
+                (self.stats.scheduler_packet_processing_delay,
+                 self.stats.user_packet_processing_delays,
+                 self._error("scheduler_packet_processing_delay")))
+
+    def _throughput_chart(self) -> Tuple[str, tuple]:
+        return ("draw_scheduler_throughput_bar_chart",
+                (self.stats.scheduler_throughput,
+                 self.stats.max_scheduler_throughput,
+                 self.stats.scheduler_unused_resources,
+                 1,
+                 self._error("scheduler_throughput"),
+                 self._error("scheduler_unused_resources")))
+
+    # В аргументы попадают квантили, а не скетчи: по аргументам
+    # считается ключ кэша
+    def _queue_quantiles_chart(self) -> Tuple[str, tuple]:
+        _, packet_quantiles = self.sketches.packets.quantiles()
+        return ("draw_queue_delay_quantiles_chart",
+                (*self.sketches.queues.quantiles(), packet_quantiles))
+
+    def _user_quantiles_chart(self) -> Tuple[str, tuple]:
+        _, packet_quantiles = self.sketches.packets.quantiles()
+        user_ids, user_quantiles = self.sketches.users.quantiles()
+        # Вид графика передаётся аргументом, чтобы попасть в ключ кэша
+        return ("draw_user_delay_quantiles_chart",
+                (user_ids, user_quantiles, packet_quantiles,
+                 user_ids.size <= self.user_bar_limit))
+
+    def _error(self, field: str) -> Optional[float]:
+        # Доверительные интервалы есть только у статистики, усреднённой
+        # по повторам (ReplicatedStats)
+        errors = getattr(self.stats, "errors", None)
+        return None if errors is None else errors.get(field)
         
-    def run(self):
-        try:
-            self.draw_modelling_time_pie_chart(
-                self.stats.scheduler_processing_time,
-                self.stats.scheduler_idle_time,
-                self.stats.scheduler_wait_time)
-            
-            self.draw_queue_packet_processing_delay_bar_chart(
-                self.stats.scheduler_packet_processing_delay,
-                self.stats.queue_packet_processing_delays)
-            
-            self.draw_user_packet_processing_delay_bar_chart(
-                self.stats.scheduler_packet_processing_delay,
-                self.stats.user_packet_processing_delays)
-            
-            self.draw_scheduler_throughput_bar_chart(
-                self.stats.scheduler_throughput,
-                self.stats.max_scheduler_throughput,
-                self.stats.scheduler_unused_resources,
-                1)
-        except Exception as e:
-            print(e)
+    def run(self, workers: int = 1,
+            pool: Optional[Executor] = None,
+            threads: bool = False,
+            dashboard: bool = False,
+            pdf: Optional[str] = None) -> List[str]:
+        '''
+        Draw the selected charts; charts with missing inputs are
+        skipped, and a failed chart does not stop the others.
+
+        Args:
+            workers: Number of workers; 1 draws serially
+                in the current process
+            pool: Warm executor created with init_worker; when given,
+                charts are drawn in it and workers is ignored
+            threads: Draw with worker threads of the current process
+                instead of worker processes, so Stats is not pickled
+                and matplotlib is imported once
+            dashboard: Draw all charts as panels of one figure saved
+                once (draw_dashboard); workers are not used
+            pdf: Also write all charts into this multi-page PDF file
+
+        Returns:
+            Paths of the saved charts
+        '''
+        for name, missing in self.skipped_charts():
+            print(f"{name}.\nПропущен: нет данных ({', '.join(missing)})\n")
+        paths = self._run_charts(workers, pool, threads, dashboard)
+        if pdf is not None:
+            try:
+                paths.append(self.write_pdf(pdf))
+            except Exception as e:
+                print(e)
+        return paths
+
+    def _run_charts(self, workers: int, pool: Optional[Executor],
+                    threads: bool, dashboard: bool) -> List[str]:
+        if dashboard:
+            try:
+                return [self.draw_dashboard(self.charts())]
+            except Exception as e:
+                print(e)
+                return []
+        if pool is not None:
+            return self._run_parallel(pool)
+        if workers > 1 and threads:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return self._run_parallel(pool)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=init_worker) as pool:
+                return self._run_parallel(pool)
+
+        # Ошибка одного графика не прерывает отрисовку остальных
+        paths = []
+        for name, args in self.charts():
+            try:
+                paths.append(getattr(self, name)(*args))
+            except Exception as e:
+                _report_failure(name, e)
+        return paths
+
+    def _run_parallel(self, pool: Executor) -> List[str]:
+        # Каждый график рисуется в отдельном исполнителе, ошибка одного
+        # графика не прерывает отрисовку остальных. Потоки видят
+        # регистратор измерений текущего процесса, поэтому собирать
+        # измерения отдельно нужно только в процессах
+        paths = []
+        recorder = active_recorder()
+        collect_metrics = (recorder is not None
+                           and not isinstance(pool, ThreadPoolExecutor))
+        futures = [(name, pool.submit(_draw_chart, self, name, args,
+                                      collect_metrics))
+                   for name, args in self.charts()]
+        for name, future in futures:
+            try:
+                path, records = future.result()
+            except Exception as e:
+                _report_failure(name, e)
+                continue
+            paths.append(path)
+            if collect_metrics:
+                recorder.records.extend(records)
+        return paths
+
+    @log_draw
+    def draw_dashboard(self, charts: List[Tuple[str, tuple]],
+                       sink: Optional[Sink] = None):
+        '''
+        Draw charts as panels of one figure with a shared layout, so the
+        layout pass and the image encode run once instead of per chart.
+
+        Args:
+            charts: (draw method name, positional arguments) pairs,
+                as returned by charts()
+        '''
+        path = self.chart_path("dashboard")
+
+        # Обычные графики идут по DASHBOARD_COLUMNS в строке, широкие —
+        # по одному в строке под ними
+        narrow = [chart for chart in charts
+                  if chart[0] not in self.dashboard_wide_charts]
+        rows = [narrow[i:i + DASHBOARD_COLUMNS]
+                for i in range(0, len(narrow), DASHBOARD_COLUMNS)]
+        rows += [[chart] for chart in charts
+                 if chart[0] in self.dashboard_wide_charts]
+
+        fig = new_figure(figsize=(DASHBOARD_WIDTH,
+                                  DASHBOARD_ROW_HEIGHT * len(rows)),
+                         layout="constrained")
+        row_figures = np.atleast_1d(fig.subfigures(len(rows), 1))
+        for row_figure, row in zip(row_figures, rows):
+            panels = np.atleast_1d(row_figure.subfigures(1, len(row)))
+            for panel, (name, args) in zip(panels, row):
+                # Методы вызываются без log_draw: панель не сохраняется
+                # отдельно, и ей не нужны ни кэш, ни сообщение
+                getattr(self, name).__wrapped__(self, *args, figure=panel)
+        # Компоновка constrained уже вписала панели в рисунок: проход
+        # bbox_inches="tight" с лишней отрисовкой не нужен
+        return self._save(fig, path, sink, fig.bbox_inches)
+
+    def write_pdf(self, path: str, dashboard: bool = True) -> str:
+        '''
+        Write the charts of run() into one multi-page PDF file.
+
+        Args:
+            path: Output PDF path
+            dashboard: Put the dashboard on the first page
+
+        Returns:
+            Path of the PDF file
+        '''
+        charts = self.charts()
+        with PdfSink(path) as sink:
+            if dashboard:
+                self.draw_dashboard(charts, sink=sink)
+            for name, args in charts:
+                getattr(self, name)(*args, sink=sink)
+        return path
     
     @log_draw
     def draw_queue_packet_processing_delay_bar_chart(
         self,
         scheduler_packet_processing_delay: float, 
-        queue_packet_processing_delays: Dict[int, float]):
-        filename = "queue_packet_processing_delay_bar_chart.png"
-        path = f"./{OUTPUT_DIR}{filename}"
+        queue_packet_processing_delays: DelayMapLike,
+        mean_error: Optional[float] = None,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        path = self.chart_path("queue_packet_processing_delay_bar_chart")
         
-        labels = [f"Очередь {idx + 1}" for idx, _ 
-                  in queue_packet_processing_delays.items()]
-        labels.append("Среднее")
+        delays = as_delay_map(queue_packet_processing_delays)
+        labels = np.append(
+            np.char.add("Очередь ", (delays.ids + 1).astype(str)),
+            "Среднее")
         
-        data = [value * 1000 for _, value in queue_packet_processing_delays.items()]
-        data.append(scheduler_packet_processing_delay * 1000)
+        data = np.append(delays.delays * 1000,
+                         scheduler_packet_processing_delay * 1000)
+        errors = _delay_errors(delays, mean_error)
         
-
-        plt.bar(x=labels, height=data, align="center", 
-                edgecolor='black')
+        # Шаблоны не содержат планок погрешностей
+        if (self.templates is not None and figure is None
+                and errors is None):
+            return self._render_template(
+                "queue_packet_processing_delay_bar_chart", labels.size,
+                lambda: BarChartTemplate(labels, "Задержка обслуживания пакетов в очередях",
+                                         "Номер очереди", "Задержка (мс)"),
+                path, sink, labels, data)
         
-        plt.tight_layout()
-        plt.title("Задержка обслуживания пакетов в очередях", pad=20)
-        plt.xlabel("Номер очереди")
-        plt.ylabel("Задержка (мс)")
-        plt.savefig(path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig = target_figure(figure)
+        ax = fig.add_subplot()
+        ax.bar(labels, data, yerr=errors, capsize=3, align="center",
+               edgecolor='black')
         
-        return path
+        fit_layout(fig)
+        ax.set_title("Задержка обслуживания пакетов в очередях", pad=20)
+        ax.set_xlabel("Номер очереди")
+        ax.set_ylabel("Задержка (мс)")
+        result = self._save(fig, path, sink)
+        
+        return result
     
     @log_draw  
     def draw_user_packet_processing_delay_bar_chart(
         self,
         scheduler_packet_processing_delay: float, 
-        user_packet_processing_delays: Dict[int, float]):
-        filename = "user_packet_processing_delay_bar_chart.png"
-        path = f"./{OUTPUT_DIR}{filename}"
+        user_packet_processing_delays: DelayMapLike,
+        mean_error: Optional[float] = None,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        path = self.chart_path("user_packet_processing_delay_bar_chart")
         
-        labels = [f"Абонент {idx + 1}" for idx, _ 
-                  in user_packet_processing_delays.items()]
-        labels.append("Среднее")
+        delays = as_delay_map(user_packet_processing_delays)
+        labels = np.append(
+            np.char.add("Абонент ", (delays.ids + 1).astype(str)),
+            "Среднее")
         
-        data = [value * 1000 for _, value in user_packet_processing_delays.items()]
-        data.append(scheduler_packet_processing_delay * 1000)
+        data = np.append(delays.delays * 1000,
+                         scheduler_packet_processing_delay * 1000)
+        errors = _delay_errors(delays, mean_error)
         
+        # Шаблоны не содержат планок погрешностей
+        if (self.templates is not None and figure is None
+                and errors is None):
+            return self._render_template(
+                "user_packet_processing_delay_bar_chart", labels.size,
+                lambda: BarChartTemplate(labels, "Задержка обслуживания пакетов пользователей",
+                                         "Идентификатор пользователя", "Задержка (мс)"),
+                path, sink, labels, data)
+        
+        fig = target_figure(figure)
+        ax = fig.add_subplot()
+        ax.bar(labels, data, yerr=errors, capsize=3, align="center",
+               edgecolor='black')
+        
+        fit_layout(fig)
+        ax.set_title("Задержка обслуживания пакетов пользователей", pad=20)
+        ax.set_xlabel("Идентификатор пользователя")
+        ax.set_ylabel("Задержка (мс)")
+        result = self._save(fig, path, sink)
+        
+        return result
 
-        plt.bar(x=labels, height=data, align="center", 
-                edgecolor='black')
+    @log_draw
+    def draw_user_packet_processing_delay_distribution_chart(
+        self,
+        scheduler_packet_processing_delay: float,
+        user_packet_processing_delays: DelayMapLike,
+        mean_error: Optional[float] = None,
+        top_users: int = TOP_USERS,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        path = self.chart_path(
+            "user_packet_processing_delay_distribution_chart")
         
-        plt.tight_layout()
-        plt.title("Задержка обслуживания пакетов пользователей", pad=20)
-        plt.xlabel("Идентификатор пользователя")
-        plt.ylabel("Задержка (мс)")
-        plt.savefig(path, dpi=300, bbox_inches='tight')
-        plt.close()
+        # Все расчёты векторные, число отрисовываемых элементов
+        # не зависит от числа пользователей
+        delays = as_delay_map(user_packet_processing_delays)
+        data = delays.delays * 1000
+        mean = scheduler_packet_processing_delay * 1000
         
-        return path
+        counts, edges = np.histogram(data, bins=HISTOGRAM_BINS)
+        
+        sorted_data = np.sort(data)
+        positions = np.linspace(0, max(sorted_data.size - 1, 0),
+                                CDF_POINTS).astype(np.int64)
+        cdf_x = sorted_data[positions] if sorted_data.size else positions
+        cdf_y = (positions + 1) / max(sorted_data.size, 1)
+        
+        top_count = min(top_users, data.size)
+        top = np.argpartition(data, data.size - top_count)[data.size - top_count:]
+        top = top[np.argsort(data[top])]
+        top_labels = np.char.add("Абонент ", (delays.ids[top] + 1).astype(str))
+        top_title = f"Наибольшая задержка ({top_count} пользователей)"
+        
+        if (self.templates is not None and figure is None
+                and mean_error is None):
+            return self._render_template(
+                "user_packet_processing_delay_distribution_chart",
+                (HISTOGRAM_BINS, cdf_x.size, top_count),
+                lambda: DistributionChartTemplate(
+                    HISTOGRAM_BINS, cdf_x.size, top_labels,
+                    "Задержка обслуживания пакетов пользователей", top_title),
+                path, sink, counts, edges, cdf_x, cdf_y, top_labels,
+                data[top], mean)
+        
+        fig = target_figure(figure, figsize=(18, 5))
+        hist_ax, cdf_ax, top_ax = fig.subplots(1, 3)
+        
+        # 1. Гистограмма
+        hist_ax.stairs(counts, edges, fill=True, edgecolor='black')
+        hist_ax.axvline(mean, color='#d62728', linestyle='--', label='Среднее')
+        hist_ax.set_title("Распределение задержки")
+        hist_ax.set_xlabel("Задержка (мс)")
+        hist_ax.set_ylabel("Число пользователей")
+        hist_ax.legend()
+        
+        # 2. Эмпирическая функция распределения
+        cdf_ax.plot(cdf_x, cdf_y)
+        cdf_ax.axvline(mean, color='#d62728', linestyle='--', label='Среднее')
+        cdf_ax.set_title("Функция распределения задержки")
+        cdf_ax.set_xlabel("Задержка (мс)")
+        cdf_ax.set_ylabel("Доля пользователей")
+        cdf_ax.legend()
+        
+        # 3. Пользователи с наибольшей задержкой
+        top_ax.barh(top_labels, data[top], edgecolor='black')
+        top_ax.axvline(mean, color='#d62728', linestyle='--', label='Среднее')
+        top_ax.set_title(top_title)
+        top_ax.set_xlabel("Задержка (мс)")
+        top_ax.legend(loc='lower left')
+        
+        # Доверительный интервал средней задержки по повторам
+        if mean_error is not None:
+            for ax in (hist_ax, cdf_ax, top_ax):
+                ax.axvspan(mean - mean_error * 1000, mean + mean_error * 1000,
+                           color='#d62728', alpha=0.15, linewidth=0)
+        
+        fig.suptitle("Задержка обслуживания пакетов пользователей")
+        fit_layout(fig)
+        result = self._save(fig, path, sink)
+        
+        return result
+
+    @log_draw
+    def draw_queue_delay_quantiles_chart(
+        self,
+        queue_ids: np.ndarray,
+        queue_quantiles: np.ndarray,
+        packet_quantiles: np.ndarray,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        '''
+        Delay quantiles (QUANTILES) of every queue and of all packets.
+
+        Args:
+            queue_ids: Queue identifiers
+            queue_quantiles: Delays in seconds of shape (queues, quantiles)
+            packet_quantiles: Delays in seconds of shape (1, quantiles)
+        '''
+        path = self.chart_path("queue_delay_quantiles_chart")
+
+        categories = np.append(
+            np.char.add("Очередь ", (queue_ids + 1).astype(str)), "Все пакеты")
+        values = np.vstack([queue_quantiles, packet_quantiles]) * 1000
+
+        fig = target_figure(figure, figsize=bars_figsize(categories.size,
+                                                          len(QUANTILES)))
+        ax = fig.add_subplot()
+        grouped_bars(ax, categories, QUANTILE_LABELS, values.T, None)
+        ax.set_title("Квантили задержки обслуживания пакетов в очередях",
+                     pad=20)
+        ax.set_xlabel("Номер очереди")
+        ax.set_ylabel("Задержка (мс)")
+        fit_layout(fig)
+        return self._save(fig, path, sink)
+
+    @log_draw
+    def draw_user_delay_quantiles_chart(
+        self,
+        user_ids: np.ndarray,
+        user_quantiles: np.ndarray,
+        packet_quantiles: np.ndarray,
+        bars: bool,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        '''
+        Delay quantiles (QUANTILES) of every user as bars, or the
+        distribution of every quantile over the users.
+
+        Args:
+            user_ids: User identifiers
+            user_quantiles: Delays in seconds of shape (users, quantiles)
+            packet_quantiles: Delays in seconds of shape (1, quantiles)
+            bars: Draw per-user bars; charts() chooses them for at most
+                user_bar_limit users
+        '''
+        path = self.chart_path("user_delay_quantiles_chart")
+
+        values = user_quantiles * 1000
+        if bars:
+            categories = np.append(
+                np.char.add("Абонент ", (user_ids + 1).astype(str)),
+                "Все пакеты")
+            fig = target_figure(figure, figsize=bars_figsize(
+                categories.size, len(QUANTILES)))
+            ax = fig.add_subplot()
+            grouped_bars(ax, categories, QUANTILE_LABELS,
+                         np.vstack([values, packet_quantiles * 1000]).T, None)
+            ax.set_xlabel("Идентификатор пользователя")
+            ax.set_ylabel("Задержка (мс)")
+        else:
+            # Функция распределения каждого квантиля по пользователям;
+            # пунктир — квантиль по всем пакетам
+            fig = target_figure(figure, figsize=(10, 6))
+            ax = fig.add_subplot()
+            positions = np.linspace(0, user_ids.size - 1,
+                                    CDF_POINTS).astype(np.int64)
+            for column, label in enumerate(QUANTILE_LABELS):
+                line, = ax.plot(np.sort(values[:, column])[positions],
+                                (positions + 1) / user_ids.size, label=label)
+                ax.axvline(packet_quantiles[0, column] * 1000,
+                           color=line.get_color(), linestyle='--',
+                           linewidth=1)
+            ax.set_xlabel("Задержка (мс)")
+            ax.set_ylabel("Доля пользователей")
+            ax.legend()
+        ax.set_title("Квантили задержки обслуживания пакетов пользователей",
+                     pad=20)
+        fit_layout(fig)
+        return self._save(fig, path, sink)
+
+    @log_draw
+    def draw_tti_trace_chart(self, trace_chunks: Iterable[np.ndarray],
+                             sink: Optional[Sink] = None):
+        path = self.chart_path("tti_trace_chart")
+        
+        # Одна корзина прореживания на пиксель ширины графика: стоимость
+        # отрисовки зависит от размера изображения, а не от длины трассы
+        buckets = int(TRACE_FIGSIZE[0] * self.profile.dpi)
+        series = downsample_trace(trace_chunks, buckets)
+        
+        fig = new_figure(figsize=TRACE_FIGSIZE)
+        axes = fig.subplots(3, 1, sharex=True)
+        titles = {
+            "throughput": "Пропускная способность",
+            "queue_length": "Длина очереди (пакеты)",
+            "resource_blocks": "Ресурсные блоки",
+        }
+        for ax, (field, (tti, values)) in zip(axes, series.items()):
+            ax.plot(tti, values, linewidth=0.5)
+            ax.set_ylabel(titles[field])
+        axes[-1].set_xlabel("TTI")
+        
+        fig.suptitle("Показатели планировщика по TTI")
+        fig.tight_layout()
+        result = self._save(fig, path, sink)
+        
+        return result
+
+    @log_draw
+    def draw_resource_allocation_heatmap(self, allocation: np.ndarray,
+                                         sink: Optional[Sink] = None):
+        '''
+        Resource blocks allocated to every user in every TTI.
+
+        Args:
+            allocation: Matrix of shape (users, TTIs), usually
+                memory-mapped by load_allocation
+        '''
+        path = self.chart_path("resource_allocation_heatmap")
+
+        # Матрица усредняется блоками до сетки пикселей рисунка: память
+        # и время отрисовки зависят от размера изображения, а не матрицы
+        dpi = self.profile.dpi
+        grid = downsample_matrix(allocation, int(HEATMAP_FIGSIZE[1] * dpi),
+                                 int(HEATMAP_FIGSIZE[0] * dpi))
+
+        fig = new_figure(figsize=HEATMAP_FIGSIZE)
+        ax = fig.add_subplot()
+        users, ttis = allocation.shape
+        image = ax.imshow(grid, aspect='auto', interpolation='nearest',
+                          origin='lower', extent=(0, ttis, 0, users))
+        fig.colorbar(image, ax=ax, label="Ресурсные блоки")
+        ax.set_title("Распределение ресурсных блоков по пользователям", pad=20)
+        ax.set_xlabel("TTI")
+        ax.set_ylabel("Идентификатор пользователя")
+        fig.tight_layout()
+        return self._save(fig, path, sink)
 
     @log_draw
     def draw_modelling_time_pie_chart(
         self, 
         scheduler_processing_time: float,
         scheduler_idle_time: float,
-        scheduler_wait_time: float):
-        filename = "modelling_time_pie_chart.png"
-        path = f"./{OUTPUT_DIR}{filename}"
+        scheduler_wait_time: float,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
+        path = self.chart_path("modelling_time_pie_chart")
         labels = ["Время работы", "Время простоя"]
-        data = [scheduler_processing_time + scheduler_idle_time,  
-                scheduler_wait_time]
+        # Те же доли, что в сводке --summary (run_metrics)
+        data = list(time_ratios(
+            scheduler_processing_time, scheduler_idle_time,
+            scheduler_wait_time))
+
+        if self.templates is not None and figure is None:
+            return self._render_template(
+                "modelling_time_pie_chart", len(labels),
+                lambda: PieChartTemplate(labels, "Время моделирования"),
+                path, sink, data)
 
-        plt.pie(data, labels=labels, colors=None, 
-                autopct='%1.1f%%', startangle=140, 
-                wedgeprops={'edgecolor': 'black', 'linewidth': 1})
-        plt.axis('equal')
-        plt.title("Время моделирования", pad=20)        
-        plt.savefig(path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig = target_figure(figure)
+        ax = fig.add_subplot()
+        ax.pie(data, labels=labels, colors=None, 
+               autopct='%1.1f%%', startangle=140, 
+               wedgeprops={'edgecolor': 'black', 'linewidth': 1})
+        ax.axis('equal')
+        ax.set_title("Время моделирования", pad=20)        
+        result = self._save(fig, path, sink)
         
-        return path
+        return result
     
     @log_draw
     def draw_scheduler_throughput_bar_chart(
@@ -129,26 +894,50 @@ class Plotter:
         scheduler_throughput: float,
         max_scheduler_throughput: float, 
         scheduler_unused_resources: float,
-        max_scheduler_resources: float):
+        max_scheduler_resources: float,
+        scheduler_throughput_error: Optional[float] = None,
+        scheduler_unused_resources_error: Optional[float] = None,
+        sink: Optional[Sink] = None,
+        figure: Optional[FigureBase] = None):
         
-        filename = "scheduler_throughput_bar_chart.png"
-        path = f"./{OUTPUT_DIR}{filename}"
+        path = self.chart_path("scheduler_throughput_bar_chart")
         
         # 1. Подготовка данных
-        used_throughput = scheduler_throughput 
-        unused_throughput = (max_scheduler_throughput - scheduler_throughput)
+        if not max_scheduler_throughput or not max_scheduler_resources:
+            raise ValueError("maximum throughput and resources must be "
+                             "non-zero")
+        used_throughput_part = utilisation(
+            scheduler_throughput, max_scheduler_throughput) * 100
+        unused_throughput_part = utilisation(
+            max_scheduler_throughput - scheduler_throughput,
+            max_scheduler_throughput) * 100
         
-        used_throughput_part = (used_throughput / max_scheduler_throughput) * 100
-        unused_throughput_part = (unused_throughput / max_scheduler_throughput) * 100
+        used_resources_part = utilisation(
+            max_scheduler_resources - scheduler_unused_resources,
+            max_scheduler_resources) * 100
+        unused_resources_part = utilisation(
+            scheduler_unused_resources, max_scheduler_resources) * 100
         
-        unused_resources = scheduler_unused_resources
-        used_resources = (max_scheduler_resources - unused_resources)
+        # Погрешности в процентах от максимума
+        throughput_error = resources_error = None
+        if scheduler_throughput_error is not None:
+            throughput_error = utilisation(scheduler_throughput_error,
+                                           max_scheduler_throughput) * 100
+        if scheduler_unused_resources_error is not None:
+            resources_error = utilisation(scheduler_unused_resources_error,
+                                          max_scheduler_resources) * 100
         
-        used_resources_part = (used_resources / max_scheduler_resources) * 100
-        unused_resources_part = (unused_resources / max_scheduler_resources) * 100
+        if (self.templates is not None and figure is None
+                and throughput_error is None and resources_error is None):
+            return self._render_template(
+                "scheduler_throughput_bar_chart", None,
+                ThroughputChartTemplate, path, sink,
+                (used_throughput_part, unused_throughput_part),
+                (used_resources_part, unused_resources_part))
         
         # 2. Настройки внешнего вида
-        plt.figure(figsize=(8, 6))  # Увеличиваем ширину для двух столбцов
+        fig = target_figure(figure, figsize=(8, 6))  # Увеличиваем ширину для двух столбцов
+        ax = fig.add_subplot()
         
         # 3. Позиции столбцов на оси X
         x_positions = [0, 0.5]  # Позиции для двух групп столбцов
@@ -161,15 +950,17 @@ class Plotter:
         }
         
         # 5. Построение столбцов для пропускной способности
-        plt.bar(
+        ax.bar(
             x=x_positions[0],
             height=used_throughput_part,
             width=bar_width,
+            yerr=throughput_error,
+            capsize=3,
             color=colors['Used'],
             edgecolor='black',
             label='Использовано'
         )
-        plt.bar(
+        ax.bar(
             x=x_positions[0],
             height=unused_throughput_part,
             width=bar_width,
@@ -180,14 +971,16 @@ class Plotter:
         )
         
         # 6. Построение столбцов для ресурсных блоков
-        plt.bar(
+        ax.bar(
             x=x_positions[1],
             height=used_resources_part,
             width=bar_width,
+            yerr=resources_error,
+            capsize=3,
             color=colors['Used'],
             edgecolor='black'
         )
-        plt.bar(
+        ax.bar(
             x=x_positions[1],
             height=unused_resources_part,
             width=bar_width,
@@ -197,14 +990,14 @@ class Plotter:
         )
         
         # 7. Настройка осей и подписей
-        plt.ylabel('Использование (%)')
-        plt.title('Использование ресурсов канала планировщиком')
+        ax.set_ylabel('Использование (%)')
+        ax.set_title('Использование ресурсов канала планировщиком')
         
         # Устанавливаем подписи под столбцами
-        plt.xticks(x_positions, ['Пропускная способность', 'Ресурсные блоки'])
+        ax.set_xticks(x_positions, ['Пропускная способность', 'Ресурсные блоки'])
         
         # 8. Легенда
-        plt.legend(
+        ax.legend(
             framealpha=0.9,
             loc='upper left',
             bbox_to_anchor=(1.02, 1),
@@ -212,8 +1005,7 @@ class Plotter:
         )
         
         # 9. Сохранение
-        plt.tight_layout()
-        plt.savefig(path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fit_layout(fig)
+        result = self._save(fig, path, sink)
         
-        return path
\ No newline at end of file
+        return result
\ No newline at end of file
@@ -0,0 +1,106 @@
+# Профили вывода графиков: формат, разрешение и кодирование
+# сохраняемых изображений. Как и src.defaults, используется main.py
+# при разборе аргументов.
+from typing import Any, Dict, Optional
+
+# Форматы, которые matplotlib записывает через Pillow и которым
+# передаются параметры кодека
+PIL_FORMATS = ("png", "webp", "jpg", "jpeg", "tiff")
+
+
+class RenderProfile:
+    __slots__ = ("name", "fmt", "dpi", "tight", "compress_level",
+                 "palette", "quality")
+
+    def __init__(self, name: str, fmt: str = "png", dpi: float = 300,
+                 tight: bool = True, compress_level: Optional[int] = None,
+                 palette: Optional[int] = None,
+                 quality: Optional[int] = None):
+        '''
+        Output settings of the charts.
+
+        Args:
+            name: Profile name
+            fmt: Image format: "png", "svg", "pdf" or "webp"
+            dpi: Resolution of raster output and of raster parts
+                of vector output
+            tight: Crop the image to its content (bbox_inches="tight"),
+                which costs an extra draw pass per chart
+            compress_level: zlib level of PNG output, 0 (fastest) to 9;
+                None keeps the Pillow default
+            palette: Quantise PNG output to this many colours (at most
+                256) for smaller files; None keeps true colour
+            quality: WebP quality from 1 to 100; None means lossless
+        '''
+        if palette is not None and not 2 <= palette <= 256:
+            raise ValueError("palette must have 2 to 256 colours")
+        if compress_level is not None and not 0 <= compress_level <= 9:
+            raise ValueError("compress_level must be between 0 and 9")
+        self.name = name
+        self.fmt = fmt
+        self.dpi = dpi
+        self.tight = tight
+        self.compress_level = compress_level
+        self.palette = palette
+        self.quality = quality
+
+    @property
+    def extension(self) -> str:
+        return f".{self.fmt}"
+
+    def settings(self) -> Dict[str, Any]:
+        '''
+        Keyword arguments of savefig for this profile; "palette" is
+        handled by the sinks, not by matplotlib.
+        '''
+        settings = {"dpi": self.dpi,
+                    "bbox_inches": "tight" if self.tight else None}
+        pil_kwargs = {}
+        if self.fmt == "png" and self.compress_level is not None:
+            pil_kwargs["compress_level"] = self.compress_level
+        if self.fmt == "webp":
+            if self.quality is None:
+                pil_kwargs["lossless"] = True
+            else:
+                pil_kwargs["quality"] = self.quality
+        if pil_kwargs:
+            settings["pil_kwargs"] = pil_kwargs
+        if self.fmt == "png" and self.palette is not None:
+            settings["palette"] = self.palette
+        return settings
+
+    def __repr__(self):
+        return (f"RenderProfile({self.name!r}, fmt={self.fmt!r}, "
+                f"dpi={self.dpi}, tight={self.tight}, "
+                f"compress_level={self.compress_level}, "
+                f"palette={self.palette}, quality={self.quality})")
+
+
+RENDER_PROFILES = {
+    # Быстрый просмотр, например в CI: низкое разрешение, слабое сжатие,
+    # без дополнительного прохода отрисовки для обрезки полей
+    "preview": RenderProfile("preview", dpi=100, tight=False,
+                             compress_level=1),
+    # Прежние настройки вывода
+    "report": RenderProfile("report"),
+    # Маленькие файлы: 150 dpi, палитра и сильное сжатие
+    "compact": RenderProfile("compact", dpi=150, compress_level=9,
+                             palette=64),
+    "web": RenderProfile("web", fmt="webp", dpi=150, quality=90),
+    # Векторный вывод для печати и вёрстки
+    "print": RenderProfile("print", fmt="pdf"),
+    "vector": RenderProfile("vector", fmt="svg"),
+}
+DEFAULT_PROFILE = "report"
+
+
+def get_profile(profile: Any) -> RenderProfile:
+    '''
+    Resolve a profile name (or pass a RenderProfile through).
+    '''
+    if isinstance(profile, RenderProfile):
+        return profile
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {profile}; "
+                         f"available: {', '.join(RENDER_PROFILES)}")
+    return RENDER_PROFILES[profile]
@@ -0,0 +1,142 @@
+import io
+import os
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from src.profiles import PIL_FORMATS
+
+
+def save_figure(figure, target: Union[str, BinaryIO], fmt: Optional[str],
+                settings: Dict[str, Any]):
+    '''
+    Save a figure with the settings of a render profile.
+
+    Args:
+        figure: Figure to save
+        target: File path or writable binary file object
+        fmt: Image format; by default taken from the path extension
+        settings: RenderProfile.settings(): savefig keyword arguments
+            and the optional "palette" colour count for PNG output
+    '''
+    settings = dict(settings)
+    palette = settings.pop("palette", None)
+    if fmt is None and isinstance(target, str):
+        fmt = os.path.splitext(target)[1][1:].lower() or None
+    # Параметры кодека Pillow нужны только растровым форматам
+    if (fmt or "png") not in PIL_FORMATS:
+        settings.pop("pil_kwargs", None)
+    if palette is None or (fmt or "png") != "png":
+        figure.savefig(target, format=fmt, **settings)
+        return
+
+    # Палитра: изображение отрисовывается в PNG без сжатия, цвета
+    # квантуются и файл сжимается один раз
+    from PIL import Image
+    pil_kwargs = settings.pop("pil_kwargs", {})
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", pil_kwargs={"compress_level": 0},
+                   **settings)
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        quantized = image.convert("RGB").quantize(
+            palette, method=Image.Quantize.FASTOCTREE,
+            dither=Image.Dither.NONE)
+    quantized.save(target, format="PNG", **pil_kwargs)
+
+
+class FileSink:
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        '''
+        Save a chart into a file.
+
+        Args:
+            path: Output file path
+            fmt: Image format; by default taken from the path extension
+        '''
+        self.path = path
+        self.fmt = fmt
+
+    def write(self, figure, settings: Dict[str, Any]) -> str:
+        save_figure(figure, self.path, self.fmt, settings)
+        return self.path
+
+    def __str__(self):
+        return os.path.abspath(self.path)
+
+
+class BufferSink:
+    def __init__(self, fmt: str = "png"):
+        '''
+        Render a chart into an in-memory buffer.
+
+        Args:
+            fmt: Image format, for example "png", "svg" or "pdf"
+        '''
+        self.fmt = fmt
+
+    def write(self, figure, settings: Dict[str, Any]) -> bytes:
+        buffer = io.BytesIO()
+        save_figure(figure, buffer, self.fmt, settings)
+        return buffer.getvalue()
+
+    def __str__(self):
+        return f"буфер в памяти ({self.fmt})"
+
+
+class StreamSink:
+    def __init__(self, stream: BinaryIO, fmt: str = "png"):
+        '''
+        Write a chart into a caller-supplied writable binary file object.
+
+        Args:
+            stream: Writable binary file object, for example a socket
+                file, a pipe or an open report archive member
+            fmt: Image format
+        '''
+        self.stream = stream
+        self.fmt = fmt
+
+    def write(self, figure, settings: Dict[str, Any]) -> BinaryIO:
+        save_figure(figure, self.stream, self.fmt, settings)
+        return self.stream
+
+    def __str__(self):
+        name = getattr(self.stream, "name", None)
+        return f"поток {name}" if name else f"поток ({self.fmt})"
+
+
+class PdfSink:
+    def __init__(self, path: str):
+        '''
+        Write every chart as a page of one PDF file. Use as a context
+        manager, the file is complete once the sink is closed.
+
+        Args:
+            path: Output PDF path
+        '''
+        # Импорт бэкенда PDF только при записи PDF
+        from matplotlib.backends.backend_pdf import PdfPages
+        self.path = path
+        self.pages = PdfPages(path)
+
+    def write(self, figure, settings: Dict[str, Any]) -> str:
+        # Страницы PDF векторные: параметры растровых форматов не нужны
+        settings = {key: value for key, value in settings.items()
+                    if key not in ("pil_kwargs", "palette")}
+        self.pages.savefig(figure, **settings)
+        return self.path
+
+    def close(self):
+        self.pages.close()
+
+    def __enter__(self) -> "PdfSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __str__(self):
+        return (f"{os.path.abspath(self.path)}, "
+                f"страница {self.pages.get_pagecount()}")
+
+
+Sink = Union[FileSink, BufferSink, StreamSink, PdfSink]
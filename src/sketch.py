@@ -0,0 +1,294 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import reduce
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Запись задержки одного пакета. Файл задержек — последовательность
+# таких записей в порядке little-endian без заголовка.
+DELAY_SAMPLE_DTYPE = np.dtype([("queue", "<i8"),
+                               ("user", "<i8"),
+                               ("delay", "<f8")])
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_RELATIVE_ACCURACY = 0.01
+QUANTILES = (0.5, 0.95, 0.99, 0.999)
+QUANTILE_LABELS = ("p50", "p95", "p99", "p99.9")
+# Задержки меньше этой (в секундах) попадают в нулевую корзину
+MIN_DELAY = 1e-9
+
+# Корзина хранится одним числом uint64: идентификатор в старших 32 битах,
+# номер корзины со сдвигом 2^31 в младших. Нулевая корзина — наименьший
+# номер, поэтому при сортировке она идёт первой.
+_ID_LIMIT = 1 << 31
+_BUCKET_OFFSET = 1 << 31
+_ZERO_BUCKET = -_BUCKET_OFFSET
+# Плотный подсчёт используется, пока счётчиков не больше этого числа
+# или четырёх размеров порции
+_DENSE_MIN = 1 << 16
+
+
+def _count_buckets(ids: np.ndarray, buckets: np.ndarray
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    # Подсчёт значений по корзинам без сортировки: в порции идентификаторы
+    # и номера корзин обычно лежат в узких диапазонах, и счётчики
+    # помещаются в плотный массив
+    zero = buckets == _ZERO_BUCKET
+    first_id = ids.min()
+    first_bucket = buckets[~zero].min() if not zero.all() else 0
+    width = int(buckets.max()) - int(first_bucket) + 2
+    span = (int(ids.max()) - int(first_id) + 1) * width
+    if zero.all() or span > max(4 * ids.size, _DENSE_MIN):
+        codes, counts = np.unique(_encode(ids, buckets), return_counts=True)
+        return codes, counts.astype(np.int64)
+
+    # Нулевая корзина — позиция 0 своего идентификатора
+    local = np.where(zero, 0, buckets - first_bucket + 1)
+    counts = np.bincount((ids - first_id) * width + local, minlength=span)
+    dense = np.flatnonzero(counts)
+    local = dense % width
+    buckets = np.where(local == 0, _ZERO_BUCKET, local - 1 + first_bucket)
+    return _encode(dense // width + first_id, buckets), counts[dense]
+
+
+def _encode(ids: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    return ((ids.astype(np.uint64) << np.uint64(32))
+            | (buckets + _BUCKET_OFFSET).astype(np.uint64))
+
+
+def _merge_counts(codes: np.ndarray, counts: np.ndarray,
+                  new_codes: np.ndarray, new_counts: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    # Слияние двух отсортированных наборов корзин без сортировки:
+    # счётчики существующих корзин складываются, новые вставляются
+    positions = np.searchsorted(codes, new_codes)
+    found = positions < codes.size
+    found[found] = codes[positions[found]] == new_codes[found]
+    counts = counts.copy()
+    counts[positions[found]] += new_counts[found]
+    if found.all():
+        return codes, counts
+    missing = ~found
+    return (np.insert(codes, positions[missing], new_codes[missing]),
+            np.insert(counts, positions[missing], new_counts[missing]))
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        '''
+        Mergeable quantile sketch of values grouped by identifier
+        (DDSketch): a value is counted in a logarithmic bucket, so every
+        quantile is estimated within relative_accuracy of a true sample
+        value. Memory depends on the number of identifiers and on the
+        range of the values, not on the number of samples: at 1% accuracy
+        delays from 1 ns to 1000 s take at most about 1400 buckets
+        per identifier. Sketches with the same accuracy merge exactly.
+
+        Args:
+            relative_accuracy: Relative error of the quantile estimates
+        '''
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.codes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    @property
+    def ids(self) -> np.ndarray:
+        '''
+        Sorted identifiers that have at least one value.
+        '''
+        return np.unique((self.codes >> np.uint64(32)).astype(np.int64))
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, ids: np.ndarray, values: np.ndarray):
+        '''
+        Add values to the sketch.
+
+        Args:
+            ids: Identifier of every value, 0 <= id < 2^31
+            values: Non-negative values
+        '''
+        ids = np.asarray(ids, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if ids.shape != values.shape:
+            raise ValueError("ids and values must have equal length")
+        if ids.size == 0:
+            return
+        if ids.min() < 0 or ids.max() >= _ID_LIMIT:
+            raise ValueError(f"ids must be in [0, {_ID_LIMIT})")
+        if not np.all((values >= 0) & np.isfinite(values)):
+            raise ValueError("values must be non-negative numbers")
+
+        with np.errstate(divide="ignore"):
+            buckets = np.ceil(np.log(values) / self._log_gamma)
+        buckets = np.where(values < MIN_DELAY, _ZERO_BUCKET,
+                           buckets).astype(np.int64)
+        self.codes, self.counts = _merge_counts(
+            self.codes, self.counts, *_count_buckets(ids, buckets))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        '''
+        Add the values of another sketch, for example one built from
+        another chunk of the same samples.
+
+        Returns:
+            This sketch
+        '''
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("sketches of different accuracy cannot be merged")
+        self.codes, self.counts = _merge_counts(
+            self.codes, self.counts, other.codes, other.counts)
+        return self
+
+    def quantiles(self, quantiles: Sequence[float] = QUANTILES
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Estimate quantiles of every identifier.
+
+        Args:
+            quantiles: Quantiles between 0 and 1
+
+        Returns:
+            Sorted identifiers and estimates of shape
+            (identifiers, quantiles)
+        '''
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        ids = (self.codes >> np.uint64(32)).astype(np.int64)
+        if ids.size == 0:
+            return ids, np.empty((0, quantiles.size))
+
+        # Все идентификаторы и квантили сразу: ранг квантиля переводится
+        # в позицию в общей накопленной сумме счётчиков
+        starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+        totals = np.add.reduceat(self.counts, starts)
+        cumulative = np.cumsum(self.counts)
+        before = cumulative[starts] - self.counts[starts]
+        ranks = np.floor(quantiles[np.newaxis, :]
+                         * (totals[:, np.newaxis] - 1)).astype(np.int64)
+        positions = np.searchsorted(cumulative, before[:, np.newaxis] + ranks,
+                                    side="right")
+
+        buckets = ((self.codes[positions] & np.uint64(0xFFFFFFFF))
+                   .astype(np.int64) - _BUCKET_OFFSET)
+        values = 2 * self.gamma ** buckets.astype(np.float64) / (self.gamma + 1)
+        return ids[starts], np.where(buckets == _ZERO_BUCKET, 0.0, values)
+
+
+class DelaySketches:
+    __slots__ = ("queues", "users", "packets")
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        '''
+        Quantile sketches of per-packet delays by queue, by user and
+        over all packets of the scheduler (identifier 0).
+
+        Args:
+            relative_accuracy: Relative error of the quantile estimates
+        '''
+        self.queues = QuantileSketch(relative_accuracy)
+        self.users = QuantileSketch(relative_accuracy)
+        self.packets = QuantileSketch(relative_accuracy)
+
+    def update(self, samples: np.ndarray):
+        '''
+        Add a chunk of DELAY_SAMPLE_DTYPE records.
+        '''
+        self.queues.update(samples["queue"], samples["delay"])
+        self.users.update(samples["user"], samples["delay"])
+        self.packets.update(np.zeros(samples.size, dtype=np.int64),
+                            samples["delay"])
+
+    def merge(self, other: "DelaySketches") -> "DelaySketches":
+        self.queues.merge(other.queues)
+        self.users.merge(other.users)
+        self.packets.merge(other.packets)
+        return self
+
+
+def read_delay_samples(path: str, start: int = 0, stop: Optional[int] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE
+                       ) -> Iterator[np.ndarray]:
+    '''
+    Read per-packet delay records in chunks without loading the file whole.
+
+    Args:
+        path: Binary file of DELAY_SAMPLE_DTYPE records
+        start: Index of the first record to read
+        stop: Index after the last record to read, by default the end
+        chunk_size: Number of records per chunk
+
+    Yields:
+        Structured arrays of DELAY_SAMPLE_DTYPE records
+    '''
+    if stop is None:
+        stop = delay_sample_count(path)
+    with open(path, 'rb') as file:
+        file.seek(start * DELAY_SAMPLE_DTYPE.itemsize)
+        while start < stop:
+            chunk = np.fromfile(file, dtype=DELAY_SAMPLE_DTYPE,
+                                count=min(chunk_size, stop - start))
+            if chunk.size == 0:
+                return
+            start += chunk.size
+            yield chunk
+
+
+def delay_sample_count(path: str) -> int:
+    size = os.path.getsize(path)
+    if size % DELAY_SAMPLE_DTYPE.itemsize:
+        raise ValueError(f"{path}: file size is not a multiple of "
+                         f"{DELAY_SAMPLE_DTYPE.itemsize}-byte delay records")
+    return size // DELAY_SAMPLE_DTYPE.itemsize
+
+
+def _sketch_range(path: str, start: int, stop: int, chunk_size: int,
+                  relative_accuracy: float) -> DelaySketches:
+    sketches = DelaySketches(relative_accuracy)
+    for chunk in read_delay_samples(path, start, stop, chunk_size):
+        sketches.update(chunk)
+    return sketches
+
+
+def sketch_delays(path: str, workers: int = 1,
+                  pool: Optional[Executor] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+                  ) -> DelaySketches:
+    '''
+    Stream a file of per-packet delays through quantile sketches.
+
+    Args:
+        path: Binary file of DELAY_SAMPLE_DTYPE records
+        workers: Number of parts the file is split into; the sketches
+            of equal record ranges are built in parallel and merged
+        pool: Executor to use instead of creating worker processes
+        chunk_size: Number of records read at once by every worker
+        relative_accuracy: Relative error of the quantile estimates
+
+    Returns:
+        Sketches by queue, by user and over all packets
+    '''
+    total = delay_sample_count(path)
+    parts = max(1, workers)
+    if parts == 1 or total < 2 * chunk_size:
+        return _sketch_range(path, 0, total, chunk_size, relative_accuracy)
+
+    bounds = np.linspace(0, total, parts + 1).astype(np.int64)
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=parts)
+    try:
+        futures = [pool.submit(_sketch_range, path, int(start), int(stop),
+                               chunk_size, relative_accuracy)
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        return reduce(DelaySketches.merge,
+                      (future.result() for future in futures))
+    finally:
+        if own_pool:
+            pool.shutdown()
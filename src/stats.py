@@ -1,14 +1,141 @@
+import json
+import os
 import yaml
-from typing import Dict
+import numpy as np
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+# Загрузчик libyaml на C, если PyYAML собран с ним
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+DELAY_MAP_FIELDS = ("queue_packet_processing_delays",
+                    "user_packet_processing_delays")
+SCALAR_FIELDS = ("scheduler_total_time",
+                 "scheduler_processing_time",
+                 "scheduler_idle_time",
+                 "scheduler_wait_time",
+                 "scheduler_packet_processing_delay",
+                 "scheduler_throughput",
+                 "max_scheduler_throughput",
+                 "scheduler_unused_resources")
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+BINARY_EXTENSION = ".stats"
+
+# Бинарный формат статистики (все числа little-endian):
+#   0   magic      8 байт, b"PLTSTATS"
+#   8   version    uint32, BINARY_VERSION
+#   12  reserved   uint32, 0
+#   16  scalars    float64[8], поля SCALAR_FIELDS по порядку
+#   80  queues     uint64, число очередей nq
+#   88  users      uint64, число пользователей nu
+#   96  int64[nq] идентификаторы очередей, float64[nq] задержки очередей,
+#       int64[nu] идентификаторы пользователей, float64[nu] задержки пользователей
+BINARY_MAGIC = b"PLTSTATS"
+BINARY_VERSION = 1
+BINARY_HEADER_DTYPE = np.dtype([("magic", "S8"),
+                                ("version", "<u4"),
+                                ("reserved", "<u4"),
+                                ("scalars", "<f8", (len(SCALAR_FIELDS),)),
+                                ("queues", "<u8"),
+                                ("users", "<u8")])
+
+
+class DelayMap(Mapping):
+    __slots__ = ("ids", "delays", "errors")
+
+    def __init__(self, ids: np.ndarray, delays: np.ndarray,
+                 errors: Optional[np.ndarray] = None):
+        '''
+        Read-only mapping of identifiers to delays backed by two
+        parallel NumPy arrays.
+
+        Args:
+            ids: Queue or user identifiers (int64)
+            delays: Delays in seconds (float64), in the order of ids
+            errors: Optional error bar half-widths in seconds, in the
+                order of ids; set for delays averaged over replicas
+        '''
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.delays = np.asarray(delays, dtype=np.float64)
+        self.errors = (None if errors is None
+                       else np.asarray(errors, dtype=np.float64))
+        if self.ids.shape != self.delays.shape or self.ids.ndim != 1:
+            raise ValueError("ids and delays must be 1-D arrays of equal length")
+        if self.errors is not None and self.errors.shape != self.ids.shape:
+            raise ValueError("errors must have the length of ids")
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "DelayMap":
+        ids = np.fromiter(data.keys(), dtype=np.int64, count=len(data))
+        delays = np.fromiter(data.values(), dtype=np.float64, count=len(data))
+        return cls(ids, delays)
+
+    def __getitem__(self, key: int) -> float:
+        # Поиск перебором массива: доступ по ключу нужен только
+        # для совместимости со словарём
+        positions = np.flatnonzero(self.ids == key)
+        if positions.size == 0:
+            raise KeyError(key)
+        return float(self.delays[positions[-1]])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __len__(self) -> int:
+        return self.ids.size
+
+    def keys(self) -> List[int]:
+        return self.ids.tolist()
+
+    def values(self) -> List[float]:
+        return self.delays.tolist()
+
+    def items(self) -> List[Tuple[int, float]]:
+        return list(zip(self.ids.tolist(), self.delays.tolist()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+DelayMapLike = Union[DelayMap, Mapping, Tuple[np.ndarray, np.ndarray]]
+
+
+def as_delay_map(value: DelayMapLike) -> DelayMap:
+    '''
+    Convert a dict or an (ids, delays) pair of arrays into a DelayMap.
+    '''
+    if isinstance(value, DelayMap):
+        return value
+    if isinstance(value, Mapping):
+        return DelayMap.from_dict(value)
+    ids, delays = value
+    return DelayMap(ids, delays)
+
 
 class Stats:
+    __slots__ = ("scheduler_total_time",
+                 "scheduler_processing_time",
+                 "scheduler_idle_time",
+                 "scheduler_wait_time",
+                 "scheduler_packet_processing_delay",
+                 "queue_packet_processing_delays",
+                 "user_packet_processing_delays",
+                 "scheduler_throughput",
+                 "max_scheduler_throughput",
+                 "scheduler_unused_resources")
+
     def __init__(self, scheduler_total_time: float,
              scheduler_processing_time: float,
              scheduler_idle_time: float,
              scheduler_wait_time: float,
              scheduler_packet_processing_delay: float,
-             queue_packet_processing_delays: Dict[int, float],
-             user_packet_processing_delays: Dict[int, float],
+             queue_packet_processing_delays: DelayMapLike,
+             user_packet_processing_delays: DelayMapLike,
              scheduler_throughput: float,
              max_scheduler_throughput: float,
              scheduler_unused_resources: float):
@@ -21,8 +148,10 @@ class Stats:
             scheduler_idle_time: Time spent idle
             scheduler_wait_time: Time spent waiting
             scheduler_packet_processing_delay: Average packet processing delay
-            queue_packet_processing_delays: Delays per queue
-            user_packet_processing_delays: Delays per user
+            queue_packet_processing_delays: Delays per queue, stored
+                as a DelayMap
+            user_packet_processing_delays: Delays per user, stored
+                as a DelayMap
             scheduler_throughput: Average throughput
             max_scheduler_throughput: Maximum theoretical throughput
             scheduler_unused_resources: Part of unused resources from maximum
@@ -32,8 +161,10 @@ class Stats:
         self.scheduler_idle_time = scheduler_idle_time
         self.scheduler_wait_time = scheduler_wait_time
         self.scheduler_packet_processing_delay = scheduler_packet_processing_delay
-        self.queue_packet_processing_delays = queue_packet_processing_delays
-        self.user_packet_processing_delays = user_packet_processing_delays
+        self.queue_packet_processing_delays = as_delay_map(
+            queue_packet_processing_delays)
+        self.user_packet_processing_delays = as_delay_map(
+            user_packet_processing_delays)
         self.scheduler_throughput = scheduler_throughput
         self.max_scheduler_throughput = max_scheduler_throughput
         self.scheduler_unused_resources = scheduler_unused_resources
@@ -51,30 +182,232 @@ class Stats:
                 f"max_scheduler_throughput={self.max_scheduler_throughput:.6f}, \n"
                 f"scheduler_unused_resources={self.scheduler_unused_resources:.6f})")
 
-# Импорт данных из YAML в объект класса Stats
-def load_stats_from_yaml(file_path: str) -> Stats:
-    with open(file_path, 'r') as file:
-        data = yaml.safe_load(file)
-    
+# Чтение отображения "идентификатор: задержка" сразу в массивы NumPy
+def _read_delay_map(loader, node) -> Tuple[np.ndarray, np.ndarray]:
+    if isinstance(node, yaml.MappingNode):
+        loader.flatten_mapping(node)
+        pairs = node.value
+        if all(isinstance(key, yaml.ScalarNode)
+               and isinstance(value, yaml.ScalarNode)
+               for key, value in pairs):
+            try:
+                ids = np.fromiter((int(key.value) for key, _ in pairs),
+                                  dtype=np.int64, count=len(pairs))
+                values = np.fromiter((float(value.value) for _, value in pairs),
+                                     dtype=np.float64, count=len(pairs))
+                return ids, values
+            except ValueError:
+                pass
+
+    # Нестандартная запись значений: общий конструктор PyYAML
+    data = loader.construct_object(node, deep=True) or {}
+    delay_map = DelayMap.from_dict(data)
+    return delay_map.ids, delay_map.delays
+
+
+def _read_yaml_node(loader, node) -> Dict[str, Any]:
+    if not isinstance(node, yaml.MappingNode):
+        return loader.construct_document(node)
+
+    loader.flatten_mapping(node)
+    data = {}
+    for key_node, value_node in node.value:
+        key = loader.construct_object(key_node, deep=True)
+        if key in DELAY_MAP_FIELDS:
+            data[key] = _read_delay_map(loader, value_node)
+        else:
+            data[key] = loader.construct_object(value_node, deep=True)
+    return data
+
+
+def _read_yaml(file) -> Dict[str, Any]:
+    loader = SafeLoader(file)
+    try:
+        node = loader.get_single_node()
+        if node is None:
+            raise ValueError("empty stats document")
+        return _read_yaml_node(loader, node)
+    finally:
+        loader.dispose()
+
+
+# Отсутствующее в документе поле (или null): скаляр становится NaN,
+# а не нулём, словарь задержек — пустым. По ним Plotter узнаёт, что
+# данных для графика нет
+def _scalar(data: Mapping, field: str) -> float:
+    value = data.get(field)
+    return float("nan") if value is None else value
+
+
+def _delays(data: Mapping, field: str) -> DelayMapLike:
+    value = data.get(field)
+    if value is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return value
+
+
+def _stats_from_data(data: Mapping) -> Stats:
+    if not isinstance(data, Mapping):
+        raise ValueError("stats document must be a mapping")
     return Stats(
         scheduler_total_time=
-            data.get("scheduler_total_time", 0.0),
+            _scalar(data, "scheduler_total_time"),
         scheduler_processing_time=
-            data.get("scheduler_processing_time", 0.0),
+            _scalar(data, "scheduler_processing_time"),
         scheduler_idle_time=
-            data.get("scheduler_idle_time", 0.0),
+            _scalar(data, "scheduler_idle_time"),
         scheduler_wait_time=
-            data.get("scheduler_wait_time", 0.0),
+            _scalar(data, "scheduler_wait_time"),
         scheduler_packet_processing_delay=
-            data.get("scheduler_packet_processing_delay", 0.0),
+            _scalar(data, "scheduler_packet_processing_delay"),
         queue_packet_processing_delays=
-            data.get("queue_packet_processing_delays", {}),
+            _delays(data, "queue_packet_processing_delays"),
         user_packet_processing_delays=
-            data.get("user_packet_processing_delays", {}),
+            _delays(data, "user_packet_processing_delays"),
         scheduler_throughput=
-            data.get("scheduler_throughput", 0.0),
+            _scalar(data, "scheduler_throughput"),
         max_scheduler_throughput=
-            data.get("max_scheduler_throughput", 0.0), 
+            _scalar(data, "max_scheduler_throughput"), 
         scheduler_unused_resources=
-            data.get("scheduler_unused_resources", 0.0), 
-    )
\ No newline at end of file
+            _scalar(data, "scheduler_unused_resources"), 
+    )
+
+
+# Импорт данных из YAML в объект класса Stats
+def load_stats_from_yaml(file_path: str) -> Stats:
+    with open(file_path, 'r') as file:
+        data = _read_yaml(file)
+    
+    return _stats_from_data(data)
+
+
+def iter_stats_from_yaml(file_path: str) -> Iterator[Stats]:
+    '''
+    Read a multi-document YAML file ("---" between runs) one document
+    at a time: only the node tree of the current run is held in memory.
+
+    Yields:
+        Stats of every document, in file order
+    '''
+    with open(file_path, 'r') as file:
+        loader = SafeLoader(file)
+        try:
+            while loader.check_node():
+                node = loader.get_node()
+                # Пустой документ между разделителями пропускается
+                if node is None or (isinstance(node, yaml.ScalarNode)
+                                    and node.tag == "tag:yaml.org,2002:null"):
+                    continue
+                yield _stats_from_data(_read_yaml_node(loader, node))
+        finally:
+            loader.dispose()
+
+
+# Задержки в JSON: ключи объекта — строки
+def _json_delay_map(value: Any) -> Tuple[np.ndarray, np.ndarray]:
+    if not value:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    ids = np.fromiter(map(int, value.keys()), dtype=np.int64, count=len(value))
+    delays = np.fromiter(value.values(), dtype=np.float64, count=len(value))
+    return ids, delays
+
+
+def iter_stats_from_jsonl(file_path: str) -> Iterator[Stats]:
+    '''
+    Read a JSON Lines file, one run per line, line by line.
+
+    Yields:
+        Stats of every non-empty line, in file order
+    '''
+    with open(file_path, 'r') as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{file_path}:{number}: {e}") from None
+            if not isinstance(data, dict):
+                raise ValueError(f"{file_path}:{number}: "
+                                 f"stats line must be an object")
+            for field in DELAY_MAP_FIELDS:
+                if field in data:
+                    data[field] = _json_delay_map(data[field])
+            yield _stats_from_data(data)
+
+
+def save_stats_to_binary(stats: Stats, file_path: str):
+    '''
+    Write Stats in the binary format described above.
+    '''
+    header = np.zeros(1, dtype=BINARY_HEADER_DTYPE)
+    header["magic"] = BINARY_MAGIC
+    header["version"] = BINARY_VERSION
+    header["scalars"] = [getattr(stats, field) for field in SCALAR_FIELDS]
+    header["queues"] = len(stats.queue_packet_processing_delays)
+    header["users"] = len(stats.user_packet_processing_delays)
+
+    with open(file_path, 'wb') as file:
+        header.tofile(file)
+        for field in DELAY_MAP_FIELDS:
+            delays = getattr(stats, field)
+            delays.ids.astype("<i8", copy=False).tofile(file)
+            delays.delays.astype("<f8", copy=False).tofile(file)
+
+
+# Импорт бинарного файла: массивы задержек отображаются в память без копирования
+def load_stats_from_binary(file_path: str) -> Stats:
+    data = np.memmap(file_path, dtype=np.uint8, mode='r')
+    if data.size < BINARY_HEADER_DTYPE.itemsize:
+        raise ValueError(f"{file_path}: truncated stats header")
+
+    header = data[:BINARY_HEADER_DTYPE.itemsize].view(BINARY_HEADER_DTYPE)[0]
+    if header["magic"] != BINARY_MAGIC:
+        raise ValueError(f"{file_path}: not a binary stats file")
+    if header["version"] != BINARY_VERSION:
+        raise ValueError(f"{file_path}: unsupported version {header['version']}")
+
+    offset = BINARY_HEADER_DTYPE.itemsize
+    expected = offset + 16 * (int(header["queues"]) + int(header["users"]))
+    if data.size != expected:
+        raise ValueError(f"{file_path}: expected {expected} bytes, got {data.size}")
+
+    delay_maps = []
+    for count in (int(header["queues"]), int(header["users"])):
+        ids = data[offset:offset + 8 * count].view("<i8")
+        offset += 8 * count
+        delays = data[offset:offset + 8 * count].view("<f8")
+        offset += 8 * count
+        delay_maps.append(DelayMap(ids, delays))
+
+    scalars = dict(zip(SCALAR_FIELDS, header["scalars"].tolist()))
+    return Stats(queue_packet_processing_delays=delay_maps[0],
+                 user_packet_processing_delays=delay_maps[1],
+                 **scalars)
+
+
+def load_stats(file_path: str) -> Stats:
+    '''
+    Load Stats choosing the format by file extension.
+    '''
+    if os.path.splitext(file_path)[1].lower() == BINARY_EXTENSION:
+        return load_stats_from_binary(file_path)
+    return load_stats_from_yaml(file_path)
+
+
+
+def iter_stats(file_path: str) -> Iterator[Stats]:
+    '''
+    Stream the runs of a multi-run file, choosing the reader by file
+    extension: JSON Lines, multi-document YAML, or a binary stats file
+    (a single run).
+
+    Yields:
+        Stats of every run, as soon as it has been read
+    '''
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in JSONL_EXTENSIONS:
+        return iter_stats_from_jsonl(file_path)
+    if extension == BINARY_EXTENSION:
+        return iter([load_stats_from_binary(file_path)])
+    return iter_stats_from_yaml(file_path)
@@ -0,0 +1,272 @@
+import math
+from typing import Callable, Dict, Hashable, Sequence
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+PIE_START_ANGLE = 140
+PIE_LABEL_DISTANCE = 1.1
+PIE_PCT_DISTANCE = 0.6
+PIE_AUTOPCT = '%1.1f%%'
+
+
+# Каждый график рисуется на отдельной фигуре с холстом Agg, без
+# глобальной текущей фигуры pyplot: ошибка одного графика не оставляет
+# следующему грязную фигуру, а графики можно строить в нескольких потоках
+def new_figure(**kwargs) -> Figure:
+    figure = Figure(**kwargs)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+class ChartTemplate:
+    figure: Figure
+    shape: Hashable
+
+    def __init__(self, figure: Figure, shape: Hashable):
+        '''
+        Figure of one chart that is built once and then updated with
+        the data of every new run. tight_layout runs once, with the data
+        of the first run, and again only when the template is rebuilt
+        for a different category count.
+
+        Args:
+            figure: Built figure
+            shape: Category count the layout was computed for
+        '''
+        self.figure = figure
+        self.shape = shape
+        self.laid_out = False
+
+    def layout(self, dpi: float):
+        '''
+        Args:
+            dpi: Resolution the figure is saved with
+        '''
+        if not self.laid_out:
+            self.figure.set_dpi(dpi)
+            self.figure.tight_layout()
+            self.laid_out = True
+
+    def tight_bbox(self) -> Bbox:
+        '''
+        Bounding box equivalent to bbox_inches="tight" without the extra
+        draw pass savefig makes for it.
+        '''
+        # Рендерер последнего сохранения переиспользуется: кэш размеров
+        # текста привязан к рендереру, а фигура шаблона создана с DPI
+        # сохранения, поэтому размеры совпадают с полученными при записи
+        canvas = self.figure.canvas
+        renderer = getattr(canvas, "renderer", None) or canvas.get_renderer()
+        return self.figure.get_tightbbox(renderer).padded(
+            matplotlib.rcParams["savefig.pad_inches"])
+
+
+def _autoscale(*axes):
+    for ax in axes:
+        ax.relim()
+        ax.autoscale_view()
+
+
+class BarChartTemplate(ChartTemplate):
+    def __init__(self, labels: Sequence[str], title: str, xlabel: str,
+                 ylabel: str):
+        '''
+        Bar chart with one bar per label.
+        '''
+        figure = new_figure()
+        self.ax = figure.add_subplot()
+        positions = np.arange(len(labels))
+        self.bars = self.ax.bar(positions, np.zeros(len(labels)),
+                                align="center", edgecolor='black')
+        self.ax.set_xticks(positions, labels)
+        self.labels = list(labels)
+
+        self.ax.set_title(title, pad=20)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        super().__init__(figure, len(labels))
+
+    def update(self, labels: Sequence[str], heights: np.ndarray):
+        for bar, height in zip(self.bars, heights):
+            bar.set_height(height)
+        labels = list(labels)
+        if labels != self.labels:
+            self.ax.set_xticklabels(labels)
+            self.labels = labels
+        _autoscale(self.ax)
+
+
+class PieChartTemplate(ChartTemplate):
+    def __init__(self, labels: Sequence[str], title: str):
+        '''
+        Pie chart with one wedge per label.
+        '''
+        figure = new_figure()
+        self.ax = figure.add_subplot()
+        self.wedges, self.texts, self.autotexts = self.ax.pie(
+            np.ones(len(labels)), labels=labels, colors=None,
+            autopct=PIE_AUTOPCT, startangle=PIE_START_ANGLE,
+            labeldistance=PIE_LABEL_DISTANCE, pctdistance=PIE_PCT_DISTANCE,
+            wedgeprops={'edgecolor': 'black', 'linewidth': 1})
+        self.ax.axis('equal')
+        self.ax.set_title(title, pad=20)
+        super().__init__(figure, len(labels))
+
+    def update(self, data: Sequence[float]):
+        # Та же геометрия, что у Axes.pie: доли откладываются против
+        # часовой стрелки от начального угла
+        fractions = np.asarray(data, dtype=float) / np.sum(data)
+        theta1 = PIE_START_ANGLE / 360
+        for fraction, wedge, text, autotext in zip(
+                fractions, self.wedges, self.texts, self.autotexts):
+            theta2 = theta1 + fraction
+            wedge.set_theta1(360 * min(theta1, theta2))
+            wedge.set_theta2(360 * max(theta1, theta2))
+
+            middle = math.pi * (theta1 + theta2)
+            x, y = math.cos(middle), math.sin(middle)
+            text.set_position((PIE_LABEL_DISTANCE * x, PIE_LABEL_DISTANCE * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((PIE_PCT_DISTANCE * x, PIE_PCT_DISTANCE * y))
+            autotext.set_text(PIE_AUTOPCT % (100 * fraction))
+            theta1 = theta2
+
+
+class ThroughputChartTemplate(ChartTemplate):
+    def __init__(self):
+        '''
+        Stacked bars of used and unused throughput and resource blocks.
+        '''
+        figure = new_figure(figsize=(8, 6))
+        self.ax = figure.add_subplot()
+        x_positions = [0, 0.5]
+        bar_width = 0.25
+        colors = {'Used': '#2ca02c', 'Unused': '#d62728'}
+
+        self.bars = []
+        for position, legend in zip(x_positions, (True, False)):
+            used = self.ax.bar(
+                x=position, height=0, width=bar_width, color=colors['Used'],
+                edgecolor='black', label='Использовано' if legend else None)
+            unused = self.ax.bar(
+                x=position, height=0, width=bar_width, color=colors['Unused'],
+                edgecolor='black', label='Неиспользовано' if legend else None)
+            self.bars.append((used[0], unused[0]))
+
+        self.ax.set_ylabel('Использование (%)')
+        self.ax.set_title('Использование ресурсов канала планировщиком')
+        self.ax.set_xticks(x_positions,
+                           ['Пропускная способность', 'Ресурсные блоки'])
+        self.ax.legend(framealpha=0.9, loc='upper left',
+                       bbox_to_anchor=(1.02, 1), borderaxespad=0)
+        super().__init__(figure, None)
+
+    def update(self, throughput_parts: Sequence[float],
+               resource_parts: Sequence[float]):
+        '''
+        Args:
+            throughput_parts: Used and unused throughput, %
+            resource_parts: Used and unused resource blocks, %
+        '''
+        for (used, unused), (used_part, unused_part) in zip(
+                self.bars, (throughput_parts, resource_parts)):
+            used.set_height(used_part)
+            unused.set_y(used_part)
+            unused.set_height(unused_part)
+        _autoscale(self.ax)
+
+
+class DistributionChartTemplate(ChartTemplate):
+    def __init__(self, bins: int, cdf_points: int, top_labels: Sequence[str],
+                 title: str, top_title: str):
+        '''
+        Histogram, CDF and the users with the largest delay.
+        '''
+        figure = new_figure(figsize=(18, 5))
+        self.hist_ax, self.cdf_ax, self.top_ax = figure.subplots(1, 3)
+
+        self.stairs = self.hist_ax.stairs(np.zeros(bins), np.arange(bins + 1),
+                                          fill=True, edgecolor='black')
+        self.cdf_line, = self.cdf_ax.plot(np.zeros(cdf_points),
+                                          np.zeros(cdf_points))
+        positions = np.arange(len(top_labels))
+        self.top_bars = self.top_ax.barh(positions, np.zeros(len(top_labels)),
+                                         edgecolor='black')
+        self.top_ax.set_yticks(positions, top_labels)
+        self.top_labels = list(top_labels)
+
+        self.mean_lines = [
+            ax.axvline(0, color='#d62728', linestyle='--', label='Среднее')
+            for ax in (self.hist_ax, self.cdf_ax, self.top_ax)]
+
+        self.hist_ax.set_title("Распределение задержки")
+        self.hist_ax.set_xlabel("Задержка (мс)")
+        self.hist_ax.set_ylabel("Число пользователей")
+        self.hist_ax.legend()
+        self.cdf_ax.set_title("Функция распределения задержки")
+        self.cdf_ax.set_xlabel("Задержка (мс)")
+        self.cdf_ax.set_ylabel("Доля пользователей")
+        self.cdf_ax.legend()
+        self.top_ax.set_title(top_title)
+        self.top_ax.set_xlabel("Задержка (мс)")
+        self.top_ax.legend(loc='lower left')
+
+        figure.suptitle(title)
+        super().__init__(figure, (bins, cdf_points, len(top_labels)))
+
+    def update(self, counts: np.ndarray, edges: np.ndarray,
+               cdf_x: np.ndarray, cdf_y: np.ndarray,
+               top_labels: Sequence[str], top_values: np.ndarray,
+               mean: float):
+        self.stairs.set_data(counts, edges)
+        self.cdf_line.set_data(cdf_x, cdf_y)
+        for bar, value in zip(self.top_bars, top_values):
+            bar.set_width(value)
+        top_labels = list(top_labels)
+        if top_labels != self.top_labels:
+            self.top_ax.set_yticklabels(top_labels)
+            self.top_labels = top_labels
+        for line in self.mean_lines:
+            line.set_xdata([mean, mean])
+        _autoscale(self.hist_ax, self.cdf_ax, self.top_ax)
+
+
+class TemplateStore:
+    templates: Dict[str, ChartTemplate]
+
+    def __init__(self):
+        '''
+        Chart templates reused across runs. A template is rebuilt only
+        when the category count of its chart changes. Templates are
+        updated in place, so a store must not be shared between threads.
+        '''
+        self.templates = {}
+
+    def get(self, chart: str, shape: Hashable,
+            build: Callable[[], ChartTemplate]) -> ChartTemplate:
+        '''
+        Args:
+            chart: Chart name
+            shape: Category count of the chart for the current run
+            build: Builds the template when there is none for the shape
+        '''
+        template = self.templates.get(chart)
+        if template is None or template.shape != shape:
+            template = build()
+            self.templates[chart] = template
+        return template
+
+    def __len__(self):
+        return len(self.templates)
+
+    # Фигуры не передаются в процессы-исполнители: каждый процесс
+    # строит собственные шаблоны
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.templates = {}
@@ -0,0 +1,254 @@
+import itertools
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+# Запись трассы одного TTI. Бинарная трасса — последовательность таких
+# записей в порядке little-endian без заголовка, CSV-трасса — строки
+# "tti,throughput,queue_length,resource_blocks" с заголовком.
+TRACE_DTYPE = np.dtype([("tti", "<i8"),
+                        ("throughput", "<f8"),
+                        ("queue_length", "<f8"),
+                        ("resource_blocks", "<f8")])
+TRACE_FIELDS = ("throughput", "queue_length", "resource_blocks")
+BINARY_TRACE_EXTENSIONS = (".bin", ".trace")
+DEFAULT_CHUNK_SIZE = 1 << 16
+# Число элементов матрицы распределения ресурсов, читаемых за раз:
+# порция в float64 (8 МиБ) помещается в кэш процессора
+DEFAULT_MATRIX_CHUNK = 1 << 20
+
+
+def _read_csv_chunks(path: str, chunk_size: int) -> Iterator[np.ndarray]:
+    with open(path, 'r') as file:
+        header = file.readline().strip().split(",")
+        columns = [header.index(name) for name in TRACE_DTYPE.names]
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=",", dtype=TRACE_DTYPE,
+                             usecols=columns, ndmin=1)
+
+
+def _read_binary_chunks(path: str, chunk_size: int) -> Iterator[np.ndarray]:
+    with open(path, 'rb') as file:
+        while True:
+            chunk = np.fromfile(file, dtype=TRACE_DTYPE, count=chunk_size)
+            if chunk.size == 0:
+                return
+            yield chunk
+
+
+def read_trace(path: str,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    '''
+    Read a per-TTI trace in chunks without loading it whole.
+
+    Args:
+        path: CSV trace or binary trace (.bin, .trace)
+        chunk_size: Number of records per chunk
+
+    Yields:
+        Structured arrays of TRACE_DTYPE records
+    '''
+    if os.path.splitext(path)[1] in BINARY_TRACE_EXTENSIONS:
+        return _read_binary_chunks(path, chunk_size)
+    return _read_csv_chunks(path, chunk_size)
+
+
+class MinMaxDownsampler:
+    def __init__(self, buckets: int):
+        '''
+        Streaming min/max downsampler: keeps the minimum and the maximum
+        of every bucket, so peaks survive downsampling. The bucket size
+        doubles whenever more than 2 * buckets buckets are filled, so
+        memory does not depend on the number of samples.
+
+        Args:
+            buckets: Target number of buckets, usually the plot width
+                in pixels
+        '''
+        self.buckets = buckets
+        self.bucket_size = 1
+        self._pending_x = np.empty(0, dtype=np.float64)
+        self._pending_y = np.empty(0, dtype=np.float64)
+        # Минимум и максимум каждой заполненной корзины: x_min, y_min, x_max, y_max
+        self._points = np.empty((0, 4), dtype=np.float64)
+
+    def update(self, x: np.ndarray, y: np.ndarray):
+        x = np.concatenate((self._pending_x, np.asarray(x, dtype=np.float64)))
+        y = np.concatenate((self._pending_y, np.asarray(y, dtype=np.float64)))
+
+        full = x.size // self.bucket_size * self.bucket_size
+        if full:
+            self._points = np.concatenate(
+                (self._points,
+                 self._reduce(x[:full].reshape(-1, self.bucket_size),
+                              y[:full].reshape(-1, self.bucket_size))))
+        self._pending_x = x[full:]
+        self._pending_y = y[full:]
+
+        while len(self._points) > 2 * self.buckets:
+            self._merge()
+
+    @staticmethod
+    def _reduce(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(x))
+        low = y.argmin(axis=1)
+        high = y.argmax(axis=1)
+        return np.column_stack((x[rows, low], y[rows, low],
+                                x[rows, high], y[rows, high]))
+
+    def _merge(self):
+        # Слияние соседних корзин; нечётная последняя корзина остаётся как есть
+        paired = len(self._points) // 2 * 2
+        pairs = self._points[:paired].reshape(-1, 2, 4)
+        rows = np.arange(len(pairs))
+        low = pairs[:, :, 1].argmin(axis=1)
+        high = pairs[:, :, 3].argmax(axis=1)
+        merged = np.column_stack((pairs[rows, low, 0], pairs[rows, low, 1],
+                                  pairs[rows, high, 2], pairs[rows, high, 3]))
+        self._points = np.concatenate((merged, self._points[paired:]))
+        self.bucket_size *= 2
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Downsampled series: two points per bucket, ordered by x.
+        '''
+        points = self._points
+        if self._pending_x.size:
+            points = np.concatenate(
+                (points, self._reduce(self._pending_x[np.newaxis],
+                                      self._pending_y[np.newaxis])))
+
+        low_first = points[:, 0] <= points[:, 2]
+        x = np.where(low_first[:, np.newaxis],
+                     points[:, [0, 2]], points[:, [2, 0]])
+        y = np.where(low_first[:, np.newaxis],
+                     points[:, [1, 3]], points[:, [3, 1]])
+        return x.ravel(), y.ravel()
+
+
+def downsample_trace(chunks: Iterable[np.ndarray], buckets: int,
+                     fields: Tuple[str, ...] = TRACE_FIELDS
+                     ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    '''
+    Downsample every trace field against TTI in one pass over the chunks.
+
+    Args:
+        chunks: Structured arrays produced by read_trace
+        buckets: Target number of buckets per series
+        fields: Trace fields to downsample
+
+    Returns:
+        Mapping of field name to (tti, value) arrays
+    '''
+    samplers = {field: MinMaxDownsampler(buckets) for field in fields}
+    for chunk in chunks:
+        for field, sampler in samplers.items():
+            sampler.update(chunk["tti"], chunk[field])
+
+    return {field: sampler.result() for field, sampler in samplers.items()}
+
+
+def load_allocation(path: str) -> np.ndarray:
+    '''
+    Open a users x TTIs resource block allocation matrix without
+    reading it into memory.
+
+    Args:
+        path: .npy file with a 2-D numeric array, for example written
+            by the simulator with numpy.lib.format.open_memmap
+
+    Returns:
+        Read-only memory-mapped matrix
+    '''
+    matrix = np.load(path, mmap_mode="r")
+    if matrix.ndim != 2:
+        raise ValueError(f"{path}: expected a users x TTIs matrix, "
+                         f"got shape {matrix.shape}")
+    return matrix
+
+
+def _release_rows(matrix: np.ndarray, start: int, stop: int):
+    # Прочитанные страницы отображённого файла освобождаются, иначе они
+    # остаются в памяти процесса до конца отображения. Освобождаются
+    # только страницы, целиком лежащие в строках [start, stop)
+    buffer = matrix.base
+    if (not isinstance(buffer, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED")
+            or not matrix.flags.c_contiguous):
+        return
+    data = matrix.offset % mmap.ALLOCATIONGRANULARITY
+    first = data + start * matrix.strides[0]
+    first += -first % mmap.PAGESIZE
+    last = data + stop * matrix.strides[0]
+    last -= last % mmap.PAGESIZE
+    if last > first:
+        buffer.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+
+def _block_starts(size: int, blocks: int) -> np.ndarray:
+    # Границы блоков, на которые делится ось: блоки различаются по
+    # размеру не больше чем на единицу
+    return np.linspace(0, size, min(blocks, size) + 1).astype(np.int64)
+
+
+def _chunk_blocks(edges: np.ndarray, start: int,
+                  stop: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Блоки, которые пересекает отрезок оси [start, stop), и начала их
+    # частей относительно start (индексы для np.add.reduceat). Строятся
+    # по границам блоков, без массива размером с ось
+    first = np.searchsorted(edges, start, side="right") - 1
+    last = np.searchsorted(edges, stop - 1, side="right") - 1
+    blocks = np.arange(first, last + 1)
+    return blocks, np.maximum(edges[blocks], start) - start
+
+
+def downsample_matrix(matrix: np.ndarray, rows: int, columns: int,
+                      chunk_elements: int = DEFAULT_MATRIX_CHUNK
+                      ) -> np.ndarray:
+    '''
+    Average a matrix over blocks in one pass over chunks, so that only
+    a chunk and the result are held in memory. Axes shorter than the
+    target are kept as they are.
+
+    Args:
+        matrix: 2-D array, usually memory-mapped
+        rows: Target number of rows
+        columns: Target number of columns
+        chunk_elements: Number of matrix elements read at once
+
+    Returns:
+        Block means of shape (min(rows, matrix rows),
+        min(columns, matrix columns))
+    '''
+    row_edges = _block_starts(matrix.shape[0], rows)
+    column_edges = _block_starts(matrix.shape[1], columns)
+    sums = np.zeros((row_edges.size - 1, column_edges.size - 1))
+
+    # Порция — целые строки; строка длиннее порции делится по столбцам.
+    # Границы порций не совпадают с границами блоков: частичные суммы
+    # блока на стыке двух порций складываются
+    chunk_columns = min(matrix.shape[1], max(1, chunk_elements))
+    chunk_rows = max(1, chunk_elements // max(chunk_columns, 1))
+    # Один буфер на все порции: новый массив на каждую порцию
+    # стоит выделения и заполнения свежих страниц памяти
+    buffer = np.empty((min(chunk_rows, matrix.shape[0]), chunk_columns))
+    for row in range(0, matrix.shape[0], chunk_rows):
+        row_stop = min(row + chunk_rows, matrix.shape[0])
+        blocks_r, starts_r = _chunk_blocks(row_edges, row, row_stop)
+        for column in range(0, matrix.shape[1], chunk_columns):
+            column_stop = min(column + chunk_columns, matrix.shape[1])
+            blocks_c, starts_c = _chunk_blocks(column_edges, column,
+                                               column_stop)
+            chunk = buffer[:row_stop - row, :column_stop - column]
+            np.copyto(chunk, matrix[row:row_stop, column:column_stop])
+            partial = np.add.reduceat(np.add.reduceat(chunk, starts_c, axis=1),
+                                      starts_r, axis=0)
+            sums[np.ix_(blocks_r, blocks_c)] += partial
+        _release_rows(matrix, row, row_stop)
+
+    counts = np.outer(np.diff(row_edges), np.diff(column_edges))
+    return sums / counts
@@ -0,0 +1,205 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import time
+from concurrent.futures import Executor
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from src.batch import STATS_FILE_PATTERNS, RenderOptions, run_output_dir
+from src.cache import RenderCache
+from src.stats import load_stats
+from src.templates import TemplateStore
+
+# Файл считается дописанным, если он не менялся в течение этого времени
+DEBOUNCE_SECONDS = 0.15
+POLL_INTERVAL = 0.1
+
+# Константы inotify из <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifySource:
+    def __init__(self, directory: str):
+        '''
+        Change notifications for a directory through Linux inotify.
+
+        Raises:
+            OSError: inotify is not available
+        '''
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not supported")
+
+        self.directory = directory
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed: {directory}")
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                changed.add(os.path.join(self.directory, os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    def __init__(self, directory: str, interval: float = POLL_INTERVAL):
+        '''
+        Change detection by comparing modification time and size of
+        the directory entries; used where inotify is not available.
+        '''
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        entries = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return entries
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        time.sleep(self.interval if timeout is None
+                   else min(self.interval, timeout))
+        snapshot = self._scan()
+        changed = {path for path, state in snapshot.items()
+                   if self.snapshot.get(path) != state}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_source(directory: str, polling: bool = False):
+    if not polling:
+        try:
+            return InotifySource(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingSource(directory)
+
+
+def watch_files(directory: str, settle: float = DEBOUNCE_SECONDS,
+                polling: bool = False) -> Iterator[str]:
+    '''
+    Yield stats files of a directory once they are created or modified
+    and have not changed for the settle time, so partially written files
+    are skipped. Files present before the call are not reported.
+
+    Args:
+        directory: Directory to watch
+        settle: Quiet period after the last change, in seconds
+        polling: Use polling even if inotify is available
+    '''
+    source = open_source(directory, polling)
+    pending = {}
+    try:
+        while True:
+            timeout = None
+            if pending:
+                deadline = min(pending.values()) + settle
+                timeout = max(deadline - time.monotonic(), 0.0)
+
+            changed = source.wait(timeout)
+            now = time.monotonic()
+            for path in changed:
+                name = os.path.basename(path)
+                if any(fnmatch.fnmatch(name, pattern)
+                       for pattern in STATS_FILE_PATTERNS):
+                    pending[path] = now
+
+            now = time.monotonic()
+            for path in [path for path, changed in pending.items()
+                         if now - changed >= settle]:
+                del pending[path]
+                if os.path.exists(path):
+                    yield path
+    finally:
+        source.close()
+
+
+def watch(directory: str, output_root: str,
+          pool: Optional[Executor] = None,
+          cache: Optional[RenderCache] = None,
+          settle: float = DEBOUNCE_SECONDS,
+          polling: bool = False,
+          options: Optional[RenderOptions] = None):
+    '''
+    Render charts for every stats file the simulator finishes writing
+    into the directory, until interrupted.
+
+    Args:
+        directory: Directory the simulator writes stats files into
+        output_root: Directory that receives one subfolder per run
+        pool: Warm worker pool created with init_worker that draws the
+            charts of a run in parallel; without it charts render in
+            this process
+        cache: Render cache, so unchanged charts are not redrawn
+        settle: Quiet period after the last change, in seconds
+        polling: Use polling even if inotify is available
+        options: How the charts of every run are drawn; templates
+            apply to charts drawn in this process
+    '''
+    options = options or RenderOptions()
+    store = TemplateStore() if options.templates else None
+    # Файл, чьи графики уже пишутся в каталог, для каждого каталога
+    owners: Dict[str, str] = {}
+    print(f"Ожидание файлов статистики в {os.path.abspath(directory)}...\n")
+    for path in watch_files(directory, settle, polling):
+        output_dir = run_output_dir(path, output_root)
+        owner = owners.setdefault(output_dir, path)
+        if owner != path:
+            # Например, run.stats, сконвертированный из run.yaml
+            print(f"{path}: каталог {output_dir} уже занят графиками "
+                  f"{owner}, файл пропущен\n")
+            continue
+        start = time.perf_counter()
+        try:
+            stats = load_stats(path)
+            os.makedirs(output_dir, exist_ok=True)
+            plotter = options.plotter(stats, output_dir, cache, store)
+            charts = len(plotter.run(pool=pool, dashboard=options.dashboard,
+                                     pdf=options.pdf_path(output_dir)))
+        except Exception as e:
+            # Файл мог быть записан не полностью: он будет обработан
+            # снова при следующем изменении
+            print(f"{path}: {e}")
+            continue
+        print(f"{path}: графиков {charts} за "
+              f"{time.perf_counter() - start:.2f} с\n")
@@ -0,0 +1,25 @@
+# Общие тестовые данные
+from src.stats import Stats
+
+STATS_FIELDS = {
+    "scheduler_total_time": 100.0,
+    "scheduler_processing_time": 80.0,
+    "scheduler_idle_time": 15.0,
+    "scheduler_wait_time": 5.0,
+    "scheduler_packet_processing_delay": 0.005,
+    "queue_packet_processing_delays": {1: 0.002, 2: 0.003},
+    "user_packet_processing_delays": {1: 0.001, 2: 0.004},
+    "scheduler_throughput": 50.5,
+    "max_scheduler_throughput": 100.0,
+    "scheduler_unused_resources": 0.3,
+}
+
+
+def make_stats(**fields) -> Stats:
+    '''
+    Stats of a small test run.
+
+    Args:
+        fields: Stats fields that replace the values of STATS_FIELDS
+    '''
+    return Stats(**{**STATS_FIELDS, **fields})
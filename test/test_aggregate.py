@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+import numpy as np
+from src.stats import save_stats_to_binary
+from src.aggregate import aggregate_stats, load_replicas, t_critical
+from src.plotter import Plotter
+from test.helpers import make_stats
+
+class TestAggregate(unittest.TestCase):
+    def setUp(self):
+        """Подготовка повторов с разными значениями"""
+        rng = np.random.default_rng(0)
+        self.runs = []
+        for seed in range(12):
+            # В части повторов нет пользователя 3
+            users = {1: rng.random(), 2: rng.random()}
+            if seed % 3:
+                users[3] = rng.random()
+            self.runs.append(make_stats(
+                scheduler_processing_time=80.0 + rng.standard_normal(),
+                scheduler_wait_time=5.0 + rng.standard_normal(),
+                scheduler_packet_processing_delay=0.005 * (1 + rng.random()),
+                queue_packet_processing_delays={1: rng.random(), 0: rng.random()},
+                user_packet_processing_delays=users,
+                scheduler_throughput=50.0 + rng.standard_normal(),
+                scheduler_unused_resources=0.3 + 0.01 * rng.standard_normal()
+            ))
+
+    def test_t_critical(self):
+        """Тест критических значений t-распределения"""
+        values = t_critical(np.array([0, 1, 10, 30, 60, 1000]))
+        self.assertTrue(np.isnan(values[0]))
+        np.testing.assert_allclose(values[1:],
+                                   [12.706, 2.228, 2.042, 2.0003, 1.9623],
+                                   atol=1e-3)
+
+    def test_matches_numpy(self):
+        """Тест: потоковые оценки совпадают с расчётом по всем повторам"""
+        stats = aggregate_stats(self.runs)
+
+        self.assertEqual(stats.replicas, 12)
+        throughput = np.array([run.scheduler_throughput for run in self.runs])
+        estimate = stats.estimates["scheduler_throughput"]
+        self.assertAlmostEqual(stats.scheduler_throughput, throughput.mean())
+        self.assertAlmostEqual(estimate.std[0], throughput.std(ddof=1))
+        self.assertAlmostEqual(
+            stats.errors["scheduler_throughput"],
+            t_critical(11) * throughput.std(ddof=1) / np.sqrt(12))
+
+        # Пользователь 3 учитывается только в повторах, где он есть
+        users = stats.estimates["user_packet_processing_delays"]
+        np.testing.assert_array_equal(users.ids, [1, 2, 3])
+        np.testing.assert_array_equal(users.count, [12, 12, 8])
+        user_3 = np.array([run.user_packet_processing_delays[3]
+                           for run in self.runs if 3 in run.user_packet_processing_delays])
+        self.assertAlmostEqual(users.mean[2], user_3.mean())
+        self.assertAlmostEqual(users.std[2], user_3.std(ddof=1))
+        np.testing.assert_array_equal(
+            stats.queue_packet_processing_delays.ids, [0, 1])
+
+    def test_missing_scalar_fields(self):
+        """Тест: поле, которого нет в части повторов, усредняется по остальным"""
+        self.runs[0].scheduler_throughput = np.nan
+        for run in self.runs:
+            run.max_scheduler_throughput = np.nan
+        stats = aggregate_stats(self.runs)
+
+        throughput = np.array([run.scheduler_throughput
+                               for run in self.runs[1:]])
+        self.assertAlmostEqual(stats.scheduler_throughput, throughput.mean())
+        self.assertEqual(stats.estimates["scheduler_throughput"].count[0], 11)
+        self.assertTrue(np.isnan(stats.max_scheduler_throughput))
+        self.assertEqual(stats.estimates["max_scheduler_throughput"].count[0], 0)
+
+    def test_single_replica(self):
+        """Тест: у единственного повтора нет доверительного интервала"""
+        stats = aggregate_stats(self.runs[:1])
+
+        self.assertTrue(np.isnan(stats.estimates["scheduler_throughput"].std[0]))
+        self.assertEqual(stats.errors["scheduler_throughput"], 0.0)
+        np.testing.assert_array_equal(
+            stats.user_packet_processing_delays.errors, [0.0, 0.0])
+
+    def test_no_replicas(self):
+        """Тест агрегации пустого набора повторов"""
+        with self.assertRaises(ValueError):
+            aggregate_stats([])
+
+    def test_load_replicas(self):
+        """Тест загрузки повторов из файлов"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for index, run in enumerate(self.runs):
+                paths.append(os.path.join(temp_dir, f"run{index}.stats"))
+                save_stats_to_binary(run, paths[-1])
+
+            stats = load_replicas(paths)
+
+        self.assertEqual(stats.replicas, 12)
+        self.assertAlmostEqual(
+            stats.scheduler_wait_time,
+            np.mean([run.scheduler_wait_time for run in self.runs]))
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_bar_charts_with_error_bars(self, mock_savefig, mock_print):
+        """Тест: столбчатые графики повторов рисуются с планками погрешностей"""
+        stats = aggregate_stats(self.runs)
+        plotter = Plotter(stats)
+
+        for name, args in plotter.charts():
+            if name != "draw_modelling_time_pie_chart":
+                getattr(plotter, name)(*args)
+
+        self.assertEqual(mock_savefig.call_count, 3)
+        for call in mock_savefig.call_args_list:
+            ax = call[0][0].axes[0]
+            self.assertTrue(any(getattr(container, "errorbar", None)
+                                for container in ax.containers))
+
+if __name__ == '__main__':
+    unittest.main()
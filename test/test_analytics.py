@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.plotter import Plotter
+from src.analytics import (fairness, stack_delays, utilisation, run_metrics,
+                           batch_metrics)
+from test.helpers import make_stats
+
+class TestAnalytics(unittest.TestCase):
+    def make_stats(self, users):
+        return make_stats(queue_packet_processing_delays={1: 0.002},
+                          user_packet_processing_delays=users)
+
+    def test_fairness(self):
+        """Тест индексов справедливости одного запуска"""
+        jain, max_min, gini = fairness(np.array([1.0, 2.0, 3.0, 4.0]))
+
+        self.assertAlmostEqual(jain, 100 / 120)
+        self.assertAlmostEqual(max_min, 4.0)
+        # Джини по определению: средняя абсолютная разность пар
+        values = np.array([1.0, 2.0, 3.0, 4.0])
+        expected = (np.abs(values[:, None] - values).sum()
+                    / (2 * values.size ** 2 * values.mean()))
+        self.assertAlmostEqual(gini, expected)
+
+        np.testing.assert_allclose(fairness(np.full(5, 0.01)),
+                                   [1.0, 1.0, 0.0], atol=1e-12)
+
+    def test_fairness_of_batch(self):
+        """Тест: строки пакета разной длины считаются как отдельные запуски"""
+        rng = np.random.default_rng(0)
+        runs = [rng.random(size) for size in (3, 50, 1, 0)]
+
+        jain, max_min, gini = fairness(stack_delays(runs))
+
+        for row, values in enumerate(runs[:3]):
+            np.testing.assert_allclose([jain[row], max_min[row], gini[row]],
+                                       fairness(values))
+        self.assertTrue(np.isnan([jain[3], max_min[3], gini[3]]).all())
+
+    def test_stack_delays(self):
+        """Тест дополнения задержек запусков до общей длины"""
+        matrix = stack_delays([np.array([1.0, 2.0]), np.array([]),
+                               np.array([3.0])])
+
+        np.testing.assert_array_equal(matrix, [[1.0, 2.0],
+                                               [np.nan, np.nan],
+                                               [3.0, np.nan]])
+
+    def test_utilisation_of_zero_maximum(self):
+        """Тест: при нулевом максимуме доля не определена"""
+        self.assertTrue(np.isnan(utilisation(1.0, 0.0)))
+        np.testing.assert_array_equal(utilisation([1.0, 1.0], [2.0, 0.0]),
+                                      [0.5, np.nan])
+
+    def test_run_metrics(self):
+        """Тест производных показателей запуска"""
+        metrics = run_metrics(self.make_stats({1: 0.001, 2: 0.001}))
+
+        self.assertAlmostEqual(metrics.busy_ratio, 0.95)
+        self.assertAlmostEqual(metrics.wait_ratio, 0.05)
+        self.assertAlmostEqual(metrics.throughput_utilisation, 0.505)
+        self.assertAlmostEqual(metrics.resource_utilisation, 0.7)
+        self.assertEqual(metrics.jain_index, 1.0)
+        self.assertIn("Индекс справедливости Джейна", str(metrics))
+
+    def test_batch_metrics(self):
+        """Тест: показатели пакета совпадают с показателями отдельных запусков"""
+        runs = [self.make_stats({1: 0.001, 2: 0.003}),
+                self.make_stats({}),
+                self.make_stats({user: 0.001 * user for user in range(1, 9)})]
+
+        metrics = batch_metrics(iter(runs))
+
+        self.assertEqual(metrics.runs, 3)
+        np.testing.assert_allclose(metrics.busy_ratio, [0.95] * 3)
+        for row, stats in enumerate(runs):
+            np.testing.assert_allclose(metrics.gini[row],
+                                       run_metrics(stats).gini)
+        self.assertIn("Запусков: 3", metrics.summary_table())
+        with self.assertRaises(ValueError):
+            batch_metrics([])
+
+    def test_time_ratios_match_pie_chart(self):
+        """Тест: доли времени в сводке совпадают с круговой диаграммой"""
+        stats = self.make_stats({1: 0.001})
+        # Сумма составляющих (80 + 15 + 5) больше общего времени
+        stats.scheduler_total_time = 90.0
+        metrics = run_metrics(stats)
+
+        self.assertAlmostEqual(metrics.busy_ratio + metrics.wait_ratio, 1.0)
+        with patch("builtins.print"), \
+             patch("matplotlib.figure.Figure.savefig",
+                   autospec=True) as mock_savefig:
+            Plotter(stats).draw_modelling_time_pie_chart(80.0, 15.0, 5.0)
+        texts = [text.get_text()
+                 for text in mock_savefig.call_args[0][0].axes[0].texts]
+        self.assertIn(f"{metrics.busy_ratio * 100:.1f}%", texts)
+        self.assertIn(f"{metrics.wait_ratio * 100:.1f}%", texts)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import tempfile
+import os
+from src.stats import yaml
+from src.batch import (find_stats_files, run_output_dir, run_batch,
+                       run_stream, stream_output_dir, RenderOptions)
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        """Подготовка каталога с файлами статистики"""
+        self.test_data = {
+            "scheduler_total_time": 100.0,
+            "scheduler_processing_time": 80.0,
+            "scheduler_idle_time": 15.0,
+            "scheduler_wait_time": 5.0,
+            "scheduler_packet_processing_delay": 0.005,
+            "queue_packet_processing_delays": {1: 0.002, 2: 0.003},
+            "user_packet_processing_delays": {101: 0.001, 102: 0.004},
+            "scheduler_throughput": 50.5,
+            "max_scheduler_throughput": 100.0,
+            "scheduler_unused_resources": 0.3
+        }
+        
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.stats_dir = os.path.join(self.temp_dir.name, "stats")
+        self.output_dir = os.path.join(self.temp_dir.name, "output")
+        os.makedirs(self.stats_dir)
+        for name in ("run_a.yaml", "run_b.yml"):
+            with open(os.path.join(self.stats_dir, name), 'w') as f:
+                yaml.dump(self.test_data, f)
+        # Посторонний файл не должен попасть в пакет
+        open(os.path.join(self.stats_dir, "notes.txt"), 'w').close()
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def test_find_stats_files_in_directory(self):
+        """Тест поиска файлов статистики в каталоге"""
+        files = find_stats_files(self.stats_dir)
+        
+        self.assertEqual([os.path.basename(f) for f in files],
+                         ["run_a.yaml", "run_b.yml"])
+
+    def test_find_stats_files_by_glob(self):
+        """Тест поиска файлов статистики по шаблону"""
+        files = find_stats_files(os.path.join(self.stats_dir, "*_a.*"))
+        
+        self.assertEqual([os.path.basename(f) for f in files], ["run_a.yaml"])
+
+    def test_run_output_dir(self):
+        """Тест имени каталога с графиками запуска"""
+        self.assertEqual(run_output_dir("sweep/run_a.yaml", "output"),
+                         os.path.join("output", "run_a"))
+
+    def test_run_batch_rejects_shared_output_dir(self):
+        """Тест: файлы с одним каталогом графиков отклоняются до отрисовки"""
+        # run_a.stats пишет графики туда же, куда и run_a.yaml
+        converted = os.path.join(self.stats_dir, "run_a.stats")
+        open(converted, 'w').close()
+
+        with self.assertRaises(ValueError) as raised:
+            run_batch(find_stats_files(self.stats_dir), self.output_dir,
+                      workers=1)
+
+        self.assertIn(converted, str(raised.exception))
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_run_batch(self):
+        """Тест пакетной отрисовки с ошибочным файлом"""
+        broken = os.path.join(self.stats_dir, "broken.yaml")
+        with open(broken, 'w') as f:
+            f.write("invalid: yaml: content")
+        
+        result = run_batch(find_stats_files(self.stats_dir),
+                           self.output_dir, workers=2)
+        
+        self.assertEqual(result.runs, 3)
+        self.assertEqual(result.failed_runs, 1)
+        self.assertEqual(result.charts, 8)
+        self.assertGreater(result.charts_per_second, 0)
+        for run in ("run_a", "run_b"):
+            self.assertEqual(len(os.listdir(os.path.join(self.output_dir, run))), 4)
+
+    def test_run_batch_user_bar_limit(self):
+        """Тест: пакетная отрисовка учитывает порог числа пользователей"""
+        result = run_batch(find_stats_files(self.stats_dir),
+                           self.output_dir, workers=1,
+                           options=RenderOptions(user_bar_limit=1))
+
+        self.assertEqual(result.charts, 8)
+        for run in ("run_a", "run_b"):
+            self.assertIn("user_packet_processing_delay_distribution_chart.png",
+                          os.listdir(os.path.join(self.output_dir, run)))
+
+    def test_run_stream(self):
+        """Тест отрисовки запусков из одного многодокументного файла"""
+        path = os.path.join(self.stats_dir, "sweep.yaml")
+        with open(path, 'w') as f:
+            yaml.dump_all([self.test_data] * 3, f)
+
+        result = run_stream(path, self.output_dir, workers=2)
+
+        self.assertEqual(result.runs, 3)
+        self.assertEqual(result.failed_runs, 0)
+        self.assertEqual(result.charts, 12)
+        self.assertEqual(stream_output_dir(path, self.output_dir, 3),
+                         os.path.join(self.output_dir, "sweep", "run_00003"))
+        self.assertEqual(
+            len(os.listdir(stream_output_dir(path, self.output_dir, 3))), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import os
+import numpy as np
+from src.cache import RenderCache, chart_key
+from src.plotter import Plotter, log_draw
+from src.stats import Stats
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        """Подготовка временного каталога кэша"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, ".cache")
+        self.output_dir = self.temp_dir.name
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def write_file(self, name, size):
+        path = os.path.join(self.output_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_chart_key(self):
+        """Тест ключа кэша: зависит от данных, функции и настроек"""
+        def chart(a, b):
+            return a
+        
+        def other_chart(a, b):
+            return b
+        
+        settings = {"dpi": 300}
+        key = chart_key(chart, (1.0, {1: 0.5}), {}, settings)
+        
+        self.assertEqual(key, chart_key(chart, (1.0, {1: 0.5}), {}, settings))
+        self.assertNotEqual(key, chart_key(chart, (1.0, {1: 0.6}), {}, settings))
+        self.assertNotEqual(key, chart_key(other_chart, (1.0, {1: 0.5}), {}, settings))
+        self.assertNotEqual(key, chart_key(chart, (1.0, {1: 0.5}), {}, {"dpi": 72}))
+        self.assertNotEqual(chart_key(chart, (np.array([1.0]),), {}, settings),
+                            chart_key(chart, (np.array([2.0]),), {}, settings))
+
+    def test_chart_key_memmap(self):
+        """Тест: ключ отображённого в память файла зависит от его версии"""
+        def chart(a):
+            return a
+
+        path = os.path.join(self.temp_dir.name, "allocation.npy")
+        np.save(path, np.zeros((4, 4)))
+        key = chart_key(chart, (np.load(path, mmap_mode="r"),), {}, {})
+
+        self.assertEqual(key, chart_key(chart, (np.load(path, mmap_mode="r"),),
+                                        {}, {}))
+        np.save(path, np.ones((4, 4)))
+        os.utime(path, ns=(0, 0))
+        self.assertNotEqual(key, chart_key(
+            chart, (np.load(path, mmap_mode="r"),), {}, {}))
+
+    def test_get_and_put(self):
+        """Тест сохранения и получения записи кэша"""
+        cache = RenderCache(self.cache_dir)
+        source = self.write_file("chart.png", 10)
+        
+        self.assertIsNone(cache.get("key", ".png"))
+        cache.put("key", source)
+        
+        cached = cache.get("key", ".png")
+        self.assertIsNotNone(cached)
+        with open(cached, 'rb') as f:
+            self.assertEqual(f.read(), b"x" * 10)
+
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных записей по размеру"""
+        cache = RenderCache(self.cache_dir, max_bytes=25)
+        for idx, key in enumerate(("a", "b")):
+            cache.put(key, self.write_file(f"{key}.png", 10))
+            os.utime(cache.entry_path(key, ".png"), (idx, idx))
+        # Обращение к "a" делает запись "b" самой старой
+        cache.get("a", ".png")
+        cache.put("c", self.write_file("c.png", 10))
+        
+        self.assertIsNotNone(cache.get("a", ".png"))
+        self.assertIsNone(cache.get("b", ".png"))
+        self.assertIsNotNone(cache.get("c", ".png"))
+
+    def test_put_scans_directory_only_above_limit(self):
+        """Тест: каталог кэша обходится не при каждой записи"""
+        cache = RenderCache(self.cache_dir, max_bytes=1000)
+        source = self.write_file("chart.png", 10)
+
+        with patch("os.scandir", wraps=os.scandir) as mock_scandir:
+            for idx in range(100):
+                cache.put(f"key{idx}", source)
+            # Первый обход при первой записи, второй — при превышении
+            # предела 101-й записью
+            self.assertEqual(mock_scandir.call_count, 1)
+            cache.put("key100", source)
+            self.assertEqual(mock_scandir.call_count, 2)
+
+        total = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir))
+        self.assertLessEqual(total, 900)
+
+    @patch("builtins.print")
+    def test_restore_of_evicted_entry(self, mock_print):
+        """Тест: запись, вытесненная между get и restore, рисуется заново"""
+        stats = Stats(0.0, 0.0, 80.0, 15.0, 5.0, {}, {}, 0.0, 0.0, 0.0)
+        cache = RenderCache(self.cache_dir)
+        plotter = Plotter(stats, self.output_dir, cache)
+        plotter.draw_modelling_time_pie_chart(80.0, 15.0, 5.0)
+
+        with patch.object(RenderCache, "restore",
+                          side_effect=FileNotFoundError):
+            path = plotter.draw_modelling_time_pie_chart(80.0, 15.0, 5.0)
+
+        self.assertTrue(os.path.exists(path))
+        self.assertIn("Кэш: промах", mock_print.call_args_list[1][0][0])
+
+    @patch("builtins.print")
+    def test_log_draw_cache_hit(self, mock_print):
+        """Тест декоратора log_draw: при попадании график не перерисовывается"""
+        calls = []
+        
+        class FakePlotter(Plotter):
+            @log_draw
+            def draw_fake_chart(self, value):
+                calls.append(value)
+                path = self.chart_path("fake_chart")
+                with open(path, 'wb') as f:
+                    f.write(b"png")
+                return path
+        
+        stats = Stats(0.0, 0.0, 0.0, 0.0, 0.0, {}, {}, 0.0, 0.0, 0.0)
+        plotter = FakePlotter(stats, self.output_dir,
+                              RenderCache(self.cache_dir))
+        
+        first = plotter.draw_fake_chart(1.0)
+        os.remove(first)
+        second = plotter.draw_fake_chart(1.0)
+        
+        self.assertEqual(calls, [1.0])
+        self.assertEqual(first, second)
+        self.assertTrue(os.path.exists(second))
+        self.assertIn("Кэш: промах", mock_print.call_args_list[0][0][0])
+        self.assertIn("Кэш: попадание", mock_print.call_args_list[1][0][0])
+
+if __name__ == '__main__':
+    unittest.main()
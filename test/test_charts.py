@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+from src.charts import CHARTS, CHART_NAMES, select_charts, needs_sketches
+from src.plotter import Plotter
+from src.stats import load_stats
+from test.helpers import make_stats
+
+class TestCharts(unittest.TestCase):
+    def setUp(self):
+        """Подготовка тестовых данных и временного каталога"""
+        self.test_stats = make_stats()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def test_select_charts(self):
+        """Тест выбора графиков по имени и по имени метода отрисовки"""
+        self.assertEqual(select_charts(), CHARTS)
+        specs = select_charts(["scheduler_throughput_bar_chart",
+                               "draw_modelling_time_pie_chart",
+                               "user_packet_processing_delay_bar_chart"])
+        # Порядок реестра, а не порядок перечисления
+        self.assertEqual([spec.name for spec in specs],
+                         [CHART_NAMES[0], CHART_NAMES[2], CHART_NAMES[3]])
+        self.assertFalse(needs_sketches(["modelling_time_pie_chart"]))
+        self.assertTrue(needs_sketches())
+
+        with self.assertRaises(ValueError):
+            select_charts(["modelling_time_pie_chart", "unknown"])
+
+    def test_selected_charts(self):
+        """Тест: run() рисует только выбранные графики"""
+        plotter = Plotter(self.test_stats, self.temp_dir.name,
+                          user_bar_limit=1,
+                          chart_names=["user_packet_processing_delay_chart",
+                                       "scheduler_throughput_bar_chart"])
+
+        with patch("builtins.print"):
+            paths = plotter.run()
+
+        self.assertEqual([name for name, _ in plotter.charts()],
+                         ["draw_user_packet_processing_delay_distribution_chart",
+                          "draw_scheduler_throughput_bar_chart"])
+        self.assertEqual(len(paths), 2)
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_skip_missing_inputs(self, mock_savefig, mock_print):
+        """Тест: графики без входных данных в файле пропускаются, их аргументы не строятся"""
+        # В файле нет задержек очередей и полей пропускной способности
+        path = os.path.join(self.temp_dir.name, "partial.yaml")
+        with open(path, 'w') as f:
+            f.write("scheduler_total_time: 100.0\n"
+                    "scheduler_processing_time: 80.0\n"
+                    "scheduler_idle_time: 15.0\n"
+                    "scheduler_wait_time: 5.0\n"
+                    "scheduler_packet_processing_delay: 0.005\n"
+                    "user_packet_processing_delays: {1: 0.001, 2: 0.004}\n"
+                    "scheduler_unused_resources: 0.3\n")
+        plotter = Plotter(load_stats(path), self.temp_dir.name)
+
+        with patch.object(Plotter, "_queue_delay_chart") as mock_queue, \
+             patch.object(Plotter, "_throughput_chart") as mock_throughput:
+            paths = plotter.run()
+
+        mock_queue.assert_not_called()
+        mock_throughput.assert_not_called()
+        self.assertEqual(len(paths), 2)
+        mock_print.assert_any_call(
+            "queue_packet_processing_delay_bar_chart.\n"
+            "Пропущен: нет данных (queue_packet_processing_delays)\n")
+        mock_print.assert_any_call(
+            "scheduler_throughput_bar_chart.\n"
+            "Пропущен: нет данных (scheduler_throughput, "
+            "max_scheduler_throughput)\n")
+        self.assertFalse(any("Ошибка" in str(call.args[0])
+                             for call in mock_print.call_args_list))
+        # Графики квантилей без скетчей не упоминаются, если их не выбрали
+        self.assertEqual(len(plotter.skipped_charts()), 2)
+        self.assertEqual(
+            Plotter(self.test_stats,
+                    chart_names=["user_delay_quantiles_chart"]).skipped_charts(),
+            [("user_delay_quantiles_chart", ["sketches"])])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+import numpy as np
+from src.cache import RenderCache
+from src.stats import DelayMap
+from src.aggregate import aggregate_stats
+from src.compare import ComparisonPlotter, align_delays
+from test.helpers import make_stats
+
+class TestCompare(unittest.TestCase):
+    def make_stats(self, scale, users):
+        return make_stats(
+            scheduler_packet_processing_delay=0.005 * scale,
+            queue_packet_processing_delays={0: 0.001 * scale, 1: 0.002},
+            user_packet_processing_delays={
+                user: 0.001 * (user + 1) * scale for user in users},
+            scheduler_throughput=50.0 * scale)
+
+    def test_align_delays(self):
+        """Тест выравнивания задержек запусков по идентификаторам"""
+        ids, values, errors = align_delays([
+            DelayMap([3, 1], [0.3, 0.1]),
+            DelayMap([2, 1], [0.2, 0.4], [0.01, 0.02])])
+
+        np.testing.assert_array_equal(ids, [1, 2, 3])
+        np.testing.assert_array_equal(values, [[0.1, np.nan, 0.3],
+                                               [0.4, 0.2, np.nan]])
+        np.testing.assert_array_equal(errors, [[0, 0, 0], [0.02, 0.01, 0]])
+
+    def test_align_delays_without_errors(self):
+        """Тест: без погрешностей во входных данных их нет и на выходе"""
+        _, _, errors = align_delays([DelayMap([1], [0.1]),
+                                     DelayMap([1], [0.2])])
+        self.assertIsNone(errors)
+
+    def test_single_run(self):
+        """Тест: для сравнения нужно не меньше двух запусков"""
+        with self.assertRaises(ValueError):
+            ComparisonPlotter([("RR", self.make_stats(1.0, range(3)))])
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_grouped_bars(self, mock_savefig, mock_print):
+        """Тест: столбцы всех запусков на одном графике"""
+        plotter = ComparisonPlotter([
+            ("RR", self.make_stats(1.0, range(3))),
+            ("PF", self.make_stats(0.5, range(1, 4))),
+            ("MT", self.make_stats(2.0, range(3)))])
+
+        plotter.draw_user_delay_comparison_chart(*plotter.charts()[1][1])
+
+        ax = mock_savefig.call_args[0][0].axes[0]
+        # 4 абонента и среднее по 3 запускам
+        self.assertEqual(len(ax.containers), 3)
+        self.assertEqual([len(bars) for bars in ax.containers], [5, 5, 5])
+        self.assertEqual([text.get_text() for text in ax.get_legend().texts],
+                         ["RR", "PF", "MT"])
+        self.assertEqual(ax.get_xticklabels()[-1].get_text(), "Среднее")
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_cdf_above_user_limit(self, mock_savefig, mock_print):
+        """Тест: при большом числе пользователей строятся функции распределения"""
+        plotter = ComparisonPlotter([
+            ("RR", self.make_stats(1.0, range(10))),
+            ("PF", self.make_stats(0.5, range(10)))], user_bar_limit=5)
+
+        plotter.draw_user_delay_comparison_chart(*plotter.charts()[1][1])
+
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 0)
+        # Функция распределения и линия среднего для каждого запуска
+        self.assertEqual(len(ax.lines), 4)
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_replicas_with_error_bars(self, mock_savefig, mock_print):
+        """Тест: повторы сравниваются с доверительными интервалами"""
+        replicas = aggregate_stats([self.make_stats(scale, range(3))
+                                    for scale in (0.9, 1.0, 1.1)])
+        plotter = ComparisonPlotter([("RR", self.make_stats(1.0, range(3))),
+                                     ("Повторы", replicas)])
+
+        paths = plotter.run()
+
+        self.assertEqual(len(paths), 3)
+        self.assertEqual(mock_savefig.call_count, 3)
+        for call in mock_savefig.call_args_list:
+            ax = call[0][0].axes[0]
+            self.assertTrue(any(getattr(container, "errorbar", None)
+                                for container in ax.containers))
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_zero_max_throughput_fails_one_chart(self, mock_savefig,
+                                                  mock_print):
+        """Тест: нулевой максимум пропускной способности ломает только свой график"""
+        broken = self.make_stats(0.5, range(3))
+        broken.max_scheduler_throughput = 0.0
+        plotter = ComparisonPlotter([("RR", self.make_stats(1.0, range(3))),
+                                     ("PF", broken)])
+
+        paths = plotter.run()
+
+        self.assertEqual(len(paths), 2)
+        mock_print.assert_any_call(
+            "draw_throughput_comparison_chart.\n"
+            "Ошибка: maximum throughput must be non-zero in every run\n")
+
+    @patch("builtins.print")
+    def test_cache_depends_on_user_bar_limit(self, mock_print):
+        """Тест: при смене user_bar_limit сравнение пользователей не берётся из кэша"""
+        runs = [("RR", self.make_stats(1.0, range(10))),
+                ("PF", self.make_stats(0.5, range(10)))]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = RenderCache(os.path.join(temp_dir, ".cache"))
+            for limit in (50, 5):
+                plotter = ComparisonPlotter(runs, temp_dir, cache,
+                                            user_bar_limit=limit)
+                plotter.draw_user_delay_comparison_chart(
+                    *plotter.charts()[1][1])
+
+        statuses = [call.args[0].splitlines()[1]
+                    for call in mock_print.call_args_list]
+        self.assertEqual(statuses, ["Кэш: промах", "Кэш: промах"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.stats import DelayMap
+from src.diff import join_ids, DelayDiff, StatsDiff, DiffPlotter
+from test.helpers import make_stats
+
+class TestDiff(unittest.TestCase):
+    def make_stats(self, users, mean=0.005):
+        return make_stats(scheduler_packet_processing_delay=mean,
+                          queue_packet_processing_delays={0: 0.001, 1: 0.002},
+                          user_packet_processing_delays=users)
+
+    def test_join_ids(self):
+        """Тест соединения идентификаторов в разном порядке"""
+        ids, left, right, only_left, only_right = join_ids(
+            np.array([5, 1, 9, 3]), np.array([3, 7, 5]))
+
+        np.testing.assert_array_equal(ids, [3, 5])
+        np.testing.assert_array_equal(left, [3, 0])
+        np.testing.assert_array_equal(right, [0, 2])
+        np.testing.assert_array_equal(only_left, [1, 9])
+        np.testing.assert_array_equal(only_right, [7])
+
+        ids, _, _, only_left, _ = join_ids(np.array([1, 2]),
+                                           np.empty(0, dtype=np.int64))
+        self.assertEqual(ids.size, 0)
+        np.testing.assert_array_equal(only_left, [1, 2])
+
+    def test_thresholds(self):
+        """Тест: изменение отмечается, только если превышены оба порога"""
+        diff = DelayDiff(DelayMap([1, 2, 3, 4], [0.010, 0.010, 0.010, 0.0001]),
+                         DelayMap([4, 3, 2, 1], [0.0002, 0.0104, 0.008, 0.012]),
+                         relative_threshold=0.05, absolute_threshold=0.0005)
+
+        np.testing.assert_array_equal(diff.ids, [1, 2, 3, 4])
+        np.testing.assert_allclose(diff.delta, [0.002, -0.002, 0.0004, 0.0001])
+        # Пользователь 3 ниже относительного порога, 4 — ниже абсолютного
+        np.testing.assert_array_equal(diff.slower, [True, False, False, False])
+        np.testing.assert_array_equal(diff.faster, [False, True, False, False])
+
+    def test_stats_diff(self):
+        """Тест сравнения запусков: регрессии, новые и пропавшие пользователи"""
+        baseline = self.make_stats({1: 0.001, 2: 0.002, 3: 0.003})
+        candidate = self.make_stats({2: 0.004, 3: 0.001, 4: 0.002}, mean=0.006)
+
+        diff = StatsDiff(baseline, candidate)
+
+        # Средняя задержка и пользователь 2 стали медленнее
+        self.assertEqual(diff.regressions, 2)
+        np.testing.assert_array_equal(diff.users.removed, [1])
+        np.testing.assert_array_equal(diff.users.added, [4])
+        labels, deltas = diff.changed_entries()
+        np.testing.assert_array_equal(labels, ["Абонент 3", "Абонент 4"])
+        np.testing.assert_allclose(deltas, [0.002, -0.002])
+        self.assertIn("Регрессий: 2", str(diff))
+
+        labels, deltas = diff.changed_entries(top=1)
+        self.assertEqual(len(labels), 1)
+
+    def test_identical_runs(self):
+        """Тест: у одинаковых запусков нет изменений"""
+        stats = self.make_stats({1: 0.001, 2: 0.002})
+
+        diff = StatsDiff(stats, stats)
+
+        self.assertEqual(diff.regressions, 0)
+        self.assertEqual(diff.changed_entries()[0].size, 0)
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_diff_chart(self, mock_savefig, mock_print):
+        """Тест: на графике только изменившиеся очереди и пользователи"""
+        baseline = self.make_stats({user: 0.001 for user in range(100)})
+        candidate = self.make_stats({user: 0.001 * (1 + (user % 10 == 0))
+                                     for user in range(100)})
+        plotter = DiffPlotter(StatsDiff(baseline, candidate), candidate,
+                              top=5)
+
+        paths = plotter.run()
+
+        self.assertEqual(len(paths), 1)
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 5)
+        self.assertIn("5 наибольших из 10", ax.get_title())
+
+if __name__ == '__main__':
+    unittest.main()
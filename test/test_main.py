@@ -0,0 +1,84 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("matplotlib", "numpy", "yaml")
+
+# Запуск main.py в чистом интерпретаторе; в stderr выводятся тяжёлые
+# модули, загруженные к моменту завершения
+SCRIPT = """
+import runpy, sys
+sys.argv = ["main.py", *sys.argv[1:]]
+try:
+    runpy.run_path("main.py", run_name="__main__")
+except SystemExit:
+    pass
+print("loaded:" + ",".join(m for m in {modules!r} if m in sys.modules),
+      file=sys.stderr)
+"""
+
+class TestStartup(unittest.TestCase):
+    def loaded_modules(self, *argv):
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(modules=HEAVY_MODULES),
+             *argv],
+            cwd=ROOT, capture_output=True, text=True, timeout=60)
+        last_line = result.stderr.splitlines()[-1]
+        self.assertTrue(last_line.startswith("loaded:"), result.stderr)
+        return [m for m in last_line[len("loaded:"):].split(",") if m]
+
+    def test_help_does_not_import_heavy_modules(self):
+        """Тест: --help не загружает matplotlib, numpy и yaml"""
+        self.assertEqual(self.loaded_modules("--help"), [])
+
+    def test_invalid_arguments_do_not_import_heavy_modules(self):
+        """Тест: ошибка в аргументах не загружает тяжёлые модули"""
+        self.assertEqual(self.loaded_modules(), [])
+        self.assertEqual(self.loaded_modules("-f", "missing.yaml"), [])
+
+    def test_import_does_not_import_heavy_modules(self):
+        """Тест: импорт main не загружает тяжёлые модули"""
+        code = ("import sys, main; "
+                f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_diff_error_exit_code(self):
+        """Тест: ошибка после загрузки файлов в режиме сравнения даёт код 2"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stats = os.path.join(temp_dir, "run.yaml")
+            with open(stats, 'w') as f:
+                f.write("scheduler_packet_processing_delay: 0.005\n"
+                        "queue_packet_processing_delays: {1: 0.002}\n"
+                        "user_packet_processing_delays: {1: 0.001}\n")
+            # Каталог вывода не создаётся: на его месте файл
+            result = subprocess.run(
+                [sys.executable, "main.py", "-d", stats, stats,
+                 "-o", stats],
+                cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+        self.assertEqual(result.returncode, 2, result.stdout)
+
+    def test_file_mode_output_dir(self):
+        """Тест: графики одного файла сохраняются в каталог из -o"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stats = os.path.join(temp_dir, "run.yaml")
+            with open(stats, 'w') as f:
+                f.write("scheduler_processing_time: 80.0\n"
+                        "scheduler_idle_time: 15.0\n"
+                        "scheduler_wait_time: 5.0\n")
+            output_dir = os.path.join(temp_dir, "charts")
+            result = subprocess.run(
+                [sys.executable, "main.py", "-f", stats, "-o", output_dir,
+                 "--charts", "modelling_time_pie_chart"],
+                cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+            self.assertEqual(os.listdir(output_dir),
+                             ["modelling_time_pie_chart.png"], result.stdout)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import json
+import os
+from src.metrics import enable_metrics, disable_metrics, active_recorder
+from src.plotter import log_draw
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """Подготовка файла, который «сохраняет» тестовый график"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.chart_path = os.path.join(self.temp_dir.name, "chart.png")
+        with open(self.chart_path, 'wb') as f:
+            f.write(b"x" * 100)
+
+    def tearDown(self):
+        """Выключение измерений и удаление временного каталога"""
+        disable_metrics()
+        self.temp_dir.cleanup()
+
+    @patch("builtins.print")
+    def test_disabled_by_default(self, mock_print):
+        """Тест: без включения измерений ничего не записывается"""
+        @log_draw
+        def draw_chart():
+            return self.chart_path
+        
+        draw_chart()
+        
+        self.assertIsNone(active_recorder())
+
+    @patch("builtins.print")
+    def test_records_draw_call(self, mock_print):
+        """Тест записи времени, памяти и размера файла графика"""
+        @log_draw
+        def draw_chart():
+            # Выделение памяти, которое должен учесть peak_alloc_bytes
+            [0] * 100000
+            return self.chart_path
+        
+        recorder = enable_metrics()
+        draw_chart()
+        
+        self.assertEqual(len(recorder.records), 1)
+        record = recorder.records[0]
+        self.assertEqual(record["chart"], "draw_chart")
+        self.assertEqual(record["file_size"], 100)
+        self.assertGreaterEqual(record["wall_time"], 0)
+        self.assertGreaterEqual(record["cpu_time"], 0)
+        self.assertGreater(record["peak_alloc_bytes"], 100000 * 8)
+        self.assertIsNone(record["error"])
+
+    @patch("builtins.print")
+    def test_records_failure(self, mock_print):
+        """Тест записи ошибки отрисовки"""
+        @log_draw
+        def draw_chart():
+            raise ValueError("Test error")
+        
+        recorder = enable_metrics()
+        with self.assertRaises(ValueError):
+            draw_chart()
+        
+        self.assertEqual(recorder.records[0]["error"], "Test error")
+
+    @patch("builtins.print")
+    def test_jsonl_and_summary(self, mock_print):
+        """Тест вывода измерений в JSON Lines и в таблицу"""
+        @log_draw
+        def draw_chart():
+            return self.chart_path
+        
+        recorder = enable_metrics()
+        draw_chart()
+        draw_chart()
+        out = os.path.join(self.temp_dir.name, "metrics.jsonl")
+        recorder.write_jsonl(out)
+        
+        with open(out) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["chart"] for r in records], ["draw_chart"] * 2)
+        self.assertEqual(recorder.summary_table().count("draw_chart"), 2)
+
+if __name__ == '__main__':
+    unittest.main()
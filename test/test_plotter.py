@@ -4,6 +4,8 @@ import os, sys, io
 import matplotlib.pyplot as plt
 from src.stats import Stats
 from src.plotter import Plotter, log_draw  # Импортируем декоратор отдельно
+from src.sinks import StreamSink
+from src.charts import ChartUnavailableError
 
 class TestPlotter(unittest.TestCase):
     def setUp(self):
@@ -31,16 +33,8 @@ class TestPlotter(unittest.TestCase):
             os.remove(os.path.join("output", f))
         os.rmdir("output")
 
-    @patch("matplotlib.pyplot.bar")
-    @patch("matplotlib.pyplot.tight_layout")
-    @patch("matplotlib.pyplot.title")
-    @patch("matplotlib.pyplot.xlabel")
-    @patch("matplotlib.pyplot.ylabel")
-    @patch("matplotlib.pyplot.savefig")
-    @patch("matplotlib.pyplot.close")
-    def test_draw_queue_packet_processing_delay_pie_chart(
-        self, mock_close, mock_savefig, mock_ylabel, 
-        mock_xlabel, mock_title, mock_tight, mock_bar):
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_draw_queue_packet_processing_delay_pie_chart(self, mock_savefig):
         """Тест генерации графика задержек в очередях"""
         plotter = Plotter(self.test_stats)
         
@@ -52,28 +46,19 @@ class TestPlotter(unittest.TestCase):
             self.test_stats.queue_packet_processing_delays
         )
         
-        # Проверяем вызовы matplotlib
-        mock_bar.assert_called_once()
-        mock_title.assert_called_once_with("Задержка обслуживания пакетов в очередях", pad=20)
-        mock_xlabel.assert_called_once_with("Номер очереди")
-        mock_ylabel.assert_called_once_with("Задержка (мс)")
-        mock_tight.assert_called_once()
+        # Проверяем сохранённую фигуру
         mock_savefig.assert_called_once()
-        mock_close.assert_called_once()
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 3)
+        self.assertEqual(ax.get_title(), "Задержка обслуживания пакетов в очередях")
+        self.assertEqual(ax.get_xlabel(), "Номер очереди")
+        self.assertEqual(ax.get_ylabel(), "Задержка (мс)")
         
         # Проверяем путь сохранения
         self.assertTrue(result.endswith("output/queue_packet_processing_delay_bar_chart.png"))
 
-    @patch("matplotlib.pyplot.bar")
-    @patch("matplotlib.pyplot.tight_layout")
-    @patch("matplotlib.pyplot.title")
-    @patch("matplotlib.pyplot.xlabel")
-    @patch("matplotlib.pyplot.ylabel")
-    @patch("matplotlib.pyplot.savefig")
-    @patch("matplotlib.pyplot.close")
-    def test_draw_user_packet_processing_delay_bar_chart(
-        self, mock_close, mock_savefig, mock_ylabel, 
-        mock_xlabel, mock_title, mock_tight, mock_bar):
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_draw_user_packet_processing_delay_bar_chart(self, mock_savefig):
         """Тест генерации графика задержек в очередях"""
         plotter = Plotter(self.test_stats)
         
@@ -85,55 +70,43 @@ class TestPlotter(unittest.TestCase):
             self.test_stats.user_packet_processing_delays
         )
         
-        # Проверяем вызовы matplotlib
-        mock_bar.assert_called_once()
-        mock_title.assert_called_once_with("Задержка обслуживания пакетов пользователей", pad=20)
-        mock_xlabel.assert_called_once_with("Идентификатор пользователя")
-        mock_ylabel.assert_called_once_with("Задержка (мс)")
-        mock_tight.assert_called_once()
+        # Проверяем сохранённую фигуру
         mock_savefig.assert_called_once()
-        mock_close.assert_called_once()
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 3)
+        self.assertEqual(ax.get_title(), "Задержка обслуживания пакетов пользователей")
+        self.assertEqual(ax.get_xlabel(), "Идентификатор пользователя")
+        self.assertEqual(ax.get_ylabel(), "Задержка (мс)")
         
         # Проверяем путь сохранения
         self.assertTrue(result.endswith("output/user_packet_processing_delay_bar_chart.png"))
 
-    @patch("matplotlib.pyplot.pie")
-    @patch("matplotlib.pyplot.axis")
-    @patch("matplotlib.pyplot.title")
-    @patch("matplotlib.pyplot.savefig")
-    @patch("matplotlib.pyplot.close")
-    def test_draw_modelling_time_pie_chart(
-        self, mock_close, mock_savefig, mock_title, 
-        mock_axis, mock_pie):
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_draw_modelling_time_pie_chart(self, mock_savefig):
         """Тест генерации круговой диаграммы времени моделирования"""
         plotter = Plotter(self.test_stats)
         
         # Меняем декоратор на обычную функцию для теста
         original_method = plotter.draw_modelling_time_pie_chart.__wrapped__
-        result = original_method(
+        original_method(
             plotter,
             self.test_stats.scheduler_processing_time,
             self.test_stats.scheduler_idle_time,
             self.test_stats.scheduler_wait_time
         )
         
-        # Проверяем параметры pie
-        mock_pie.assert_called_once()
-        args, kwargs = mock_pie.call_args
-        self.assertEqual(kwargs['autopct'], '%1.1f%%')
-        self.assertEqual(kwargs['startangle'], 140)
-        
-        mock_axis.assert_called_once_with('equal')
-        mock_title.assert_called_once_with("Время моделирования", pad=20)
+        # Проверяем секторы и подписи долей
         mock_savefig.assert_called_once()
-        mock_close.assert_called_once()
-
-    @patch("matplotlib.pyplot.bar")
-    @patch("matplotlib.pyplot.legend")
-    @patch("matplotlib.pyplot.savefig")
-    @patch("matplotlib.pyplot.close")
-    def test_draw_scheduler_throughput_bar_chart(
-        self, mock_close, mock_savefig, mock_legend, mock_bar):
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 2)
+        texts = [text.get_text() for text in ax.texts]
+        self.assertIn("95.0%", texts)
+        self.assertIn("5.0%", texts)
+        self.assertEqual(ax.get_title(), "Время моделирования")
+        self.assertEqual(ax.get_aspect(), 1.0)
+
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_draw_scheduler_throughput_bar_chart(self, mock_savefig):
         """Тест генерации столбчатой диаграммы пропускной способности"""
         plotter = Plotter(self.test_stats)
         
@@ -153,26 +126,25 @@ class TestPlotter(unittest.TestCase):
             )
         
         # Проверяем основные моменты:
+        mock_savefig.assert_called_once()
+        ax = mock_savefig.call_args[0][0].axes[0]
         
-        # 1. Проверяем вызовы bar()
-        # Должно быть 4 вызова (2 группы по 2 столбца)
-        self.assertEqual(mock_bar.call_count, 4)
+        # 1. Должно быть 4 столбца (2 группы по 2 столбца)
+        heights = [patch.get_height() for patch in ax.patches]
+        self.assertEqual(len(heights), 4)
+        self.assertAlmostEqual(heights[0], 50.5)
+        self.assertAlmostEqual(heights[2], 70.0)
         
         # 2. Проверяем легенду
-        mock_legend.assert_called_once_with(
-            framealpha=0.9,
-            loc='upper left',
-            bbox_to_anchor=(1.02, 1),
-            borderaxespad=0
-        )
-        
-        # 3. Проверяем сохранение файла
-        mock_savefig.assert_called_once()
+        legend = ax.get_legend()
+        self.assertEqual([text.get_text() for text in legend.get_texts()],
+                         ['Использовано', 'Неиспользовано'])
         
-        # 4. Проверяем что close вызывался (не проверяем точное количество)
-        self.assertTrue(mock_close.call_count >= 1)
+        # 3. Проверяем подписи столбцов
+        self.assertEqual([label.get_text() for label in ax.get_xticklabels()],
+                         ['Пропускная способность', 'Ресурсные блоки'])
         
-        # 5. Проверяем возвращаемый путь
+        # 4. Проверяем возвращаемый путь
         self.assertTrue(result.endswith("output/scheduler_throughput_bar_chart.png"))
 
     @patch.object(Plotter, 'draw_modelling_time_pie_chart')
@@ -201,11 +173,167 @@ class TestPlotter(unittest.TestCase):
         mock_pie.side_effect = test_exception
         
         plotter = Plotter(self.test_stats)
-        plotter.run()
+        paths = plotter.run()
+        
+        # Ошибка сообщается с именем графика, остальные графики отрисованы
+        mock_print.assert_any_call(
+            "draw_modelling_time_pie_chart.\nОшибка: Test error\n")
+        self.assertEqual(len(paths), 3)
+
+    @patch.object(Plotter, 'draw_user_packet_processing_delay_distribution_chart')
+    @patch.object(Plotter, 'draw_user_packet_processing_delay_bar_chart')
+    def test_run_switches_to_user_delay_distribution(
+        self, mock_user_bar, mock_user_distribution):
+        """Тест выбора графика распределения при большом числе пользователей"""
+        plotter = Plotter(self.test_stats, user_bar_limit=1)
+        
+        with patch.object(Plotter, 'draw_modelling_time_pie_chart'), \
+             patch.object(Plotter, 'draw_queue_packet_processing_delay_bar_chart'), \
+             patch.object(Plotter, 'draw_scheduler_throughput_bar_chart'):
+            plotter.run()
+        
+        mock_user_bar.assert_not_called()
+        mock_user_distribution.assert_called_once()
+
+    @patch("builtins.print")
+    def test_draw_user_packet_processing_delay_distribution_chart(self, mock_print):
+        """Тест графика распределения задержки пользователей"""
+        user_delays = {idx: idx / 1000 for idx in range(200)}
+        plotter = Plotter(self.test_stats)
+        
+        with patch("matplotlib.figure.Figure.savefig", autospec=True) as mock_savefig:
+            result = plotter.draw_user_packet_processing_delay_distribution_chart(
+                self.test_stats.scheduler_packet_processing_delay, user_delays,
+                top_users=5)
+        
+        mock_savefig.assert_called_once()
+        figure = mock_savefig.call_args[0][0]
+        top_ax = figure.axes[2]
+        
+        # Показаны только пять пользователей с наибольшей задержкой
+        self.assertEqual(len(top_ax.patches), 5)
+        labels = [label.get_text() for label in top_ax.get_yticklabels()]
+        self.assertEqual(labels[-1], "Абонент 200")
+        self.assertTrue(result.endswith(
+            "output/user_packet_processing_delay_distribution_chart.png"))
+
+    @patch("builtins.print")
+    def test_run_parallel_isolates_failures(self, mock_print):
+        """Тест параллельной отрисовки: ошибка одного графика не останавливает остальные"""
+        # Нулевая максимальная пропускная способность ломает только последний график
+        self.test_stats.max_scheduler_throughput = 0.0
+        plotter = Plotter(self.test_stats)
         
-        # Проверяем, что print был вызван с тем же сообщением исключения
-        args, _ = mock_print.call_args
-        self.assertEqual(str(args[0]), "Test error")
+        paths = plotter.run(workers=2)
+        
+        self.assertEqual(len(paths), 3)
+        for path in paths:
+            self.assertTrue(os.path.exists(path))
+        self.assertFalse(os.path.exists(
+            "output/scheduler_throughput_bar_chart.png"))
+
+    @patch("builtins.print")
+    def test_run_threads(self, mock_print):
+        """Тест отрисовки в потоках: результат совпадает с последовательной отрисовкой"""
+        serial = {os.path.basename(path): open(path, 'rb').read()
+                  for path in Plotter(self.test_stats).run()}
+        
+        paths = Plotter(self.test_stats).run(workers=4, threads=True)
+        
+        self.assertEqual(len(paths), 4)
+        for path in paths:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), serial[os.path.basename(path)])
+        # Глобальное состояние pyplot не используется
+        self.assertEqual(plt.get_fignums(), [])
+
+    @patch("builtins.print")
+    def test_render_to_memory(self, mock_print):
+        """Тест отрисовки в буфер в памяти без записи в output/"""
+        plotter = Plotter(self.test_stats)
+        
+        png = plotter.render("modelling_time_pie_chart")
+        svg = plotter.render("draw_modelling_time_pie_chart", fmt="svg")
+        
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertIn(b"<svg", svg)
+        self.assertEqual(os.listdir("output"), [])
+
+    @patch("builtins.print")
+    def test_render_to_stream(self, mock_print):
+        """Тест отрисовки в переданный файловый объект"""
+        plotter = Plotter(self.test_stats)
+        stream = io.BytesIO()
+        
+        result = plotter.render("queue_packet_processing_delay_bar_chart",
+                                sink=StreamSink(stream, fmt="pdf"))
+        
+        self.assertIs(result, stream)
+        self.assertTrue(stream.getvalue().startswith(b"%PDF"))
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_run_dashboard(self, mock_savefig, mock_print):
+        """Тест: все графики рисуются на одной фигуре и сохраняются один раз"""
+        plotter = Plotter(self.test_stats)
+
+        paths = plotter.run(dashboard=True)
+
+        self.assertEqual(paths, [os.path.join("./output", "dashboard.png")])
+        self.assertEqual(mock_savefig.call_count, 1)
+        fig = mock_savefig.call_args[0][0]
+        # Круговая и две столбчатые диаграммы в первой строке,
+        # график пользователей — во второй
+        self.assertEqual(len(fig.subfigs), 2)
+        self.assertEqual(len(fig.subfigs[0].subfigs), 3)
+        self.assertEqual(len(fig.subfigs[1].subfigs), 1)
+        self.assertEqual(len(fig.get_axes()), 4)
+
+    @patch("builtins.print")
+    def test_write_pdf(self, mock_print):
+        """Тест: панель и все графики записываются в один PDF по странице"""
+        plotter = Plotter(self.test_stats)
+        path = os.path.join("output", "report.pdf")
+
+        paths = plotter.run(pdf=path)
+
+        self.assertEqual(len(paths), 5)
+        self.assertEqual(paths[-1], path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(b"%PDF"))
+        self.assertIn(b"/Count 5", data)
+
+    def test_render_unknown_chart(self):
+        """Тест отрисовки неизвестного графика"""
+        plotter = Plotter(self.test_stats)
+        
+        with self.assertRaises(ValueError):
+            plotter.render("unknown_chart")
+
+    @patch("builtins.print")
+    def test_render_registry_charts(self, mock_print):
+        """Тест отрисовки по имени из реестра, в том числе невыбранного графика"""
+        plotter = Plotter(self.test_stats,
+                          chart_names=["modelling_time_pie_chart"])
+
+        # Имя из реестра и распределение при числе пользователей не больше предела
+        png = plotter.render("user_packet_processing_delay_chart")
+        distribution = plotter.render(
+            "user_packet_processing_delay_distribution_chart")
+
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertTrue(distribution.startswith(b"\x89PNG"))
+        self.assertNotEqual(png, distribution)
+
+    def test_render_unavailable_chart(self):
+        """Тест: графику без входных данных соответствует отдельная ошибка"""
+        plotter = Plotter(self.test_stats)
+
+        with self.assertRaises(ChartUnavailableError) as raised:
+            plotter.render("user_delay_quantiles_chart")
+
+        self.assertEqual(raised.exception.missing, ["sketches"])
 
     @patch("builtins.print")
     def test_log_draw_decorator(self, mock_print):
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import tempfile
+from PIL import Image
+from src.cache import RenderCache
+from src.plotter import Plotter
+from src.profiles import RenderProfile, RENDER_PROFILES, get_profile
+from src.sinks import BufferSink
+from test.helpers import make_stats
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        """Подготовка тестовых данных и временного каталога"""
+        self.test_stats = make_stats()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def test_report_matches_previous_settings(self):
+        """Тест: профиль по умолчанию сохраняет прежние настройки"""
+        self.assertEqual(get_profile("report").settings(),
+                         {"dpi": 300, "bbox_inches": "tight"})
+        self.assertEqual(Plotter(self.test_stats).profile.name, "report")
+
+    def test_invalid_profiles(self):
+        """Тест неизвестного профиля и неверных параметров"""
+        with self.assertRaises(ValueError):
+            get_profile("unknown")
+        with self.assertRaises(ValueError):
+            RenderProfile("bad", palette=1000)
+        with self.assertRaises(ValueError):
+            RenderProfile("bad", compress_level=10)
+
+    @patch("builtins.print")
+    def test_preview_profile(self, mock_print):
+        """Тест: профиль предпросмотра без обрезки полей и с низким разрешением"""
+        plotter = Plotter(self.test_stats, self.temp_dir.name, profile="preview")
+
+        with patch("matplotlib.figure.Figure.savefig", autospec=True) as mock_savefig:
+            plotter.run()
+
+        for call in mock_savefig.call_args_list:
+            self.assertEqual(call.kwargs["dpi"], 100)
+            self.assertIsNone(call.kwargs["bbox_inches"])
+            self.assertEqual(call.kwargs["pil_kwargs"], {"compress_level": 1})
+
+    @patch("builtins.print")
+    def test_palette_and_formats(self, mock_print):
+        """Тест: палитра PNG и расширения файлов векторных профилей"""
+        png = Plotter(self.test_stats, profile="compact").render(
+            "queue_packet_processing_delay_bar_chart")
+        with Image.open(io.BytesIO(png)) as image:
+            self.assertEqual(image.mode, "P")
+            self.assertLessEqual(len(image.getcolors(256)), 64)
+
+        for name, header in (("vector", b"<?xml"), ("print", b"%PDF"),
+                             ("web", b"RIFF")):
+            plotter = Plotter(self.test_stats, self.temp_dir.name,
+                              profile=name)
+            path = plotter.draw_modelling_time_pie_chart(80.0, 15.0, 5.0)
+            self.assertTrue(path.endswith(RENDER_PROFILES[name].extension))
+            with open(path, 'rb') as f:
+                self.assertTrue(f.read().startswith(header))
+
+        # Параметры Pillow не передаются векторному формату
+        svg = Plotter(self.test_stats, profile="preview").render(
+            "modelling_time_pie_chart", sink=BufferSink("svg"))
+        self.assertIn(b"<svg", svg)
+
+    @patch("builtins.print")
+    def test_cache_key_depends_on_profile(self, mock_print):
+        """Тест: графики разных профилей не берутся из кэша друг друга"""
+        cache = RenderCache(os.path.join(self.temp_dir.name, ".cache"))
+        args = (80.0, 15.0, 5.0)
+        Plotter(self.test_stats, self.temp_dir.name, cache,
+                profile="preview").draw_modelling_time_pie_chart(*args)
+
+        for name in ("vector", "preview"):
+            Plotter(self.test_stats, self.temp_dir.name, cache,
+                    profile=name).draw_modelling_time_pie_chart(*args)
+
+        # Промах для нового профиля, попадание для уже отрисованного
+        statuses = [call.args[0].splitlines()[1]
+                    for call in mock_print.call_args_list]
+        self.assertEqual(statuses, ["Кэш: промах", "Кэш: промах",
+                                    "Кэш: попадание"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+import numpy as np
+from src.cache import RenderCache
+from src.stats import Stats
+from src.plotter import Plotter
+from src.sketch import (QuantileSketch, DelaySketches, DELAY_SAMPLE_DTYPE,
+                        QUANTILES, sketch_delays, read_delay_samples)
+
+class TestSketch(unittest.TestCase):
+    def setUp(self):
+        """Подготовка задержек пакетов"""
+        rng = np.random.default_rng(0)
+        self.samples = np.empty(100000, dtype=DELAY_SAMPLE_DTYPE)
+        self.samples["user"] = rng.integers(0, 20, self.samples.size)
+        self.samples["queue"] = self.samples["user"] % 3
+        self.samples["delay"] = rng.lognormal(-6, 1, self.samples.size)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "delays.bin")
+        self.samples.tofile(self.path)
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def test_relative_accuracy(self):
+        """Тест: квантили отличаются от точных не больше чем на 1%"""
+        sketch = QuantileSketch(0.01)
+        sketch.update(self.samples["user"], self.samples["delay"])
+
+        ids, values = sketch.quantiles()
+
+        np.testing.assert_array_equal(ids, np.arange(20))
+        for user in (0, 7, 19):
+            delays = self.samples["delay"][self.samples["user"] == user]
+            exact = np.quantile(delays, QUANTILES, method="lower")
+            np.testing.assert_allclose(values[user], exact, rtol=0.01)
+
+    def test_merge_matches_single_pass(self):
+        """Тест: слияние скетчей частей совпадает со скетчем всех данных"""
+        whole = QuantileSketch()
+        whole.update(self.samples["user"], self.samples["delay"])
+        parts = [QuantileSketch() for _ in range(3)]
+        for part, chunk in zip(parts, np.array_split(self.samples, 3)):
+            part.update(chunk["user"], chunk["delay"])
+
+        merged = parts[0].merge(parts[1]).merge(parts[2])
+
+        np.testing.assert_array_equal(merged.codes, whole.codes)
+        np.testing.assert_array_equal(merged.counts, whole.counts)
+        self.assertEqual(merged.count, self.samples.size)
+
+    def test_sparse_ids(self):
+        """Тест: далеко разнесённые идентификаторы и нулевые задержки"""
+        sketch = QuantileSketch()
+        sketch.update([5, 10 ** 9, 5, 5], [0.0, 0.01, 0.0, 0.002])
+
+        ids, values = sketch.quantiles([0.0, 1.0])
+
+        np.testing.assert_array_equal(ids, [5, 10 ** 9])
+        self.assertEqual(values[0, 0], 0.0)
+        np.testing.assert_allclose(values[:, 1], [0.002, 0.01], rtol=0.01)
+
+    def test_invalid_values(self):
+        """Тест: отрицательные задержки и идентификаторы не принимаются"""
+        sketch = QuantileSketch()
+        with self.assertRaises(ValueError):
+            sketch.update([1], [-0.001])
+        with self.assertRaises(ValueError):
+            sketch.update([-1], [0.001])
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch(0.05))
+
+    def test_read_delay_samples(self):
+        """Тест чтения диапазона записей по частям"""
+        chunks = list(read_delay_samples(self.path, 10, 1010, chunk_size=300))
+
+        self.assertEqual([chunk.size for chunk in chunks], [300, 300, 300, 100])
+        np.testing.assert_array_equal(np.concatenate(chunks),
+                                      self.samples[10:1010])
+
+    def test_parallel_matches_serial(self):
+        """Тест: параллельная обработка частей файла совпадает с последовательной"""
+        serial = sketch_delays(self.path, chunk_size=4096)
+        parallel = sketch_delays(self.path, workers=2, chunk_size=4096)
+
+        for name in ("queues", "users", "packets"):
+            np.testing.assert_array_equal(getattr(parallel, name).counts,
+                                          getattr(serial, name).counts)
+        np.testing.assert_array_equal(serial.queues.ids, [0, 1, 2])
+
+    def test_truncated_file(self):
+        """Тест: файл с неполной записью не читается"""
+        with open(self.path, "ab") as file:
+            file.write(b"\0")
+        with self.assertRaises(ValueError):
+            sketch_delays(self.path)
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_quantile_charts(self, mock_savefig, mock_print):
+        """Тест: со скетчами рисуются графики квантилей задержки"""
+        sketches = DelaySketches()
+        sketches.update(self.samples)
+        stats = Stats(
+            scheduler_total_time=100.0,
+            scheduler_processing_time=80.0,
+            scheduler_idle_time=15.0,
+            scheduler_wait_time=5.0,
+            scheduler_packet_processing_delay=0.005,
+            queue_packet_processing_delays={0: 0.001, 1: 0.002, 2: 0.003},
+            user_packet_processing_delays={1: 0.001, 2: 0.002},
+            scheduler_throughput=50.5,
+            max_scheduler_throughput=100.0,
+            scheduler_unused_resources=0.3
+        )
+        plotter = Plotter(stats, self.temp_dir.name, sketches=sketches)
+
+        paths = plotter.run()
+
+        self.assertEqual(len(paths), 6)
+        ax = mock_savefig.call_args_list[4][0][0].axes[0]
+        # 4 квантиля для 3 очередей и всех пакетов
+        self.assertEqual([len(bars) for bars in ax.containers], [4, 4, 4, 4])
+
+        plotter.user_bar_limit = 10
+        plotter.draw_user_delay_quantiles_chart(*plotter.charts()[-1][1])
+        ax = mock_savefig.call_args[0][0].axes[0]
+        self.assertEqual(len(ax.patches), 0)
+        self.assertEqual(len(ax.lines), 8)
+
+    @patch("builtins.print")
+    def test_quantile_chart_cache_depends_on_bar_limit(self, mock_print):
+        """Тест: при смене user_bar_limit график квантилей не берётся из кэша"""
+        sketches = DelaySketches()
+        sketches.update(self.samples)
+        stats = Stats(100.0, 80.0, 15.0, 5.0, 0.005, {0: 0.001},
+                      {1: 0.001}, 50.5, 100.0, 0.3)
+        cache = RenderCache(os.path.join(self.temp_dir.name, ".cache"))
+
+        images = []
+        for limit in (50, 1):
+            plotter = Plotter(stats, self.temp_dir.name, cache,
+                              user_bar_limit=limit, sketches=sketches,
+                              chart_names=["user_delay_quantiles_chart"])
+            path, = plotter.run()
+            with open(path, 'rb') as f:
+                images.append(f.read())
+
+        statuses = [call.args[0].splitlines()[1]
+                    for call in mock_print.call_args_list]
+        self.assertEqual(statuses, ["Кэш: промах", "Кэш: промах"])
+        self.assertNotEqual(images[0], images[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import unittest
 import tempfile
 import os
-from src.stats import Stats, load_stats_from_yaml, yaml
+import numpy as np
+import json
+from src.stats import (Stats, DelayMap, load_stats, load_stats_from_yaml,
+                       load_stats_from_binary, save_stats_to_binary,
+                       iter_stats, iter_stats_from_yaml, yaml)
 
 class TestStats(unittest.TestCase):
     def setUp(self):
@@ -37,8 +41,8 @@ class TestStats(unittest.TestCase):
         self.assertEqual(stats.scheduler_idle_time, 15.0)
         self.assertEqual(stats.scheduler_wait_time, 5.0)
         self.assertEqual(stats.scheduler_packet_processing_delay, 0.005)
-        self.assertDictEqual(stats.queue_packet_processing_delays, {1: 0.002, 2: 0.003})
-        self.assertDictEqual(stats.user_packet_processing_delays, {101: 0.001, 102: 0.004})
+        self.assertEqual(stats.queue_packet_processing_delays, {1: 0.002, 2: 0.003})
+        self.assertEqual(stats.user_packet_processing_delays, {101: 0.001, 102: 0.004})
         self.assertEqual(stats.scheduler_throughput, 50.5)
         self.assertEqual(stats.max_scheduler_throughput, 100.0)
         self.assertEqual(stats.scheduler_unused_resources, 0.3)
@@ -61,8 +65,8 @@ class TestStats(unittest.TestCase):
         self.assertEqual(stats.scheduler_throughput, 0.0)
         self.assertEqual(stats.max_scheduler_throughput, 0.0)
         self.assertEqual(stats.scheduler_unused_resources, 0.0)
-        self.assertDictEqual(stats.queue_packet_processing_delays, {})
-        self.assertDictEqual(stats.user_packet_processing_delays, {})
+        self.assertEqual(stats.queue_packet_processing_delays, {})
+        self.assertEqual(stats.user_packet_processing_delays, {})
 
     def test_str_representation(self):
         """Тест строкового представления объекта Stats"""
@@ -75,6 +79,30 @@ class TestStats(unittest.TestCase):
         self.assertIn("user_packet_processing_delays={101: 0.001, 102: 0.004}", str_repr)
         self.assertIn("scheduler_throughput=50.500000", str_repr)
 
+    def test_delay_map(self):
+        """Тест словарного доступа к задержкам, хранящимся в массивах"""
+        stats = Stats(**self.test_data)
+        delays = stats.user_packet_processing_delays
+        
+        self.assertIsInstance(delays, DelayMap)
+        np.testing.assert_array_equal(delays.ids, [101, 102])
+        np.testing.assert_array_equal(delays.delays, [0.001, 0.004])
+        self.assertEqual(len(delays), 2)
+        self.assertEqual(delays[102], 0.004)
+        self.assertIn(101, delays)
+        self.assertNotIn(103, delays)
+        self.assertEqual(list(delays.items()), [(101, 0.001), (102, 0.004)])
+        with self.assertRaises(KeyError):
+            delays[103]
+
+    def test_stats_slots(self):
+        """Тест компактного представления Stats без __dict__"""
+        stats = Stats(**self.test_data)
+        
+        self.assertFalse(hasattr(stats, "__dict__"))
+        with self.assertRaises(AttributeError):
+            stats.unknown_field = 1
+
     def test_load_stats_from_yaml(self):
         """Тест загрузки данных из YAML файла"""
         stats = load_stats_from_yaml(self.temp_file.name)
@@ -82,7 +110,7 @@ class TestStats(unittest.TestCase):
         self.assertEqual(stats.scheduler_total_time, 100.0)
         self.assertEqual(stats.scheduler_processing_time, 80.0)
         self.assertEqual(stats.scheduler_packet_processing_delay, 0.005)
-        self.assertDictEqual(stats.queue_packet_processing_delays, {1: 0.002, 2: 0.003})
+        self.assertEqual(stats.queue_packet_processing_delays, {1: 0.002, 2: 0.003})
         self.assertEqual(stats.scheduler_throughput, 50.5)
 
     def test_load_stats_from_missing_yaml(self):
@@ -99,6 +127,12 @@ class TestStats(unittest.TestCase):
             with self.assertRaises(yaml.YAMLError):
                 load_stats_from_yaml(temp_file.name)
 
+    def test_load_stats_from_empty_yaml(self):
+        """Тест загрузки пустого (ещё не записанного) файла"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml') as temp_file:
+            with self.assertRaises(ValueError):
+                load_stats_from_yaml(temp_file.name)
+
     def test_load_stats_with_missing_fields(self):
         """Тест загрузки YAML с отсутствующими полями"""
         partial_data = {
@@ -114,8 +148,100 @@ class TestStats(unittest.TestCase):
             
             self.assertEqual(stats.scheduler_total_time, 100.0)
             self.assertEqual(stats.scheduler_processing_time, 80.0)
-            self.assertEqual(stats.scheduler_throughput, 0.0)  # Должно быть значение по умолчанию
-            self.assertDictEqual(stats.queue_packet_processing_delays, {})
+            # Отсутствующее поле отмечается как NaN, а не как ноль
+            self.assertTrue(np.isnan(stats.scheduler_throughput))
+            self.assertEqual(stats.queue_packet_processing_delays, {})
+
+    def test_load_stats_with_special_values(self):
+        """Тест загрузки задержек в нестандартной записи YAML"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml') as temp_file:
+            temp_file.write("queue_packet_processing_delays: {1: .inf, 2: 3}\n"
+                            "user_packet_processing_delays: ~\n")
+            temp_file.flush()
+            
+            stats = load_stats_from_yaml(temp_file.name)
+            
+            self.assertEqual(stats.queue_packet_processing_delays,
+                             {1: float("inf"), 2: 3.0})
+            self.assertEqual(stats.user_packet_processing_delays, {})
+
+    def test_binary_round_trip(self):
+        """Тест записи и чтения бинарного формата"""
+        stats = Stats(**self.test_data)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "run.stats")
+            save_stats_to_binary(stats, path)
+            
+            loaded = load_stats(path)
+            
+            self.assertEqual(str(loaded), str(stats))
+            # Массивы задержек отображены в память, а не скопированы
+            self.assertIsInstance(
+                loaded.user_packet_processing_delays.ids.base, np.memmap)
+
+    def test_load_stats_chooses_loader_by_extension(self):
+        """Тест выбора загрузчика по расширению файла"""
+        stats = load_stats(self.temp_file.name)
+        
+        self.assertEqual(stats.scheduler_total_time, 100.0)
+
+    def test_load_stats_from_invalid_binary(self):
+        """Тест загрузки файла с неверной сигнатурой и усечённого файла"""
+        stats = Stats(**self.test_data)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "run.stats")
+            with open(path, 'wb') as f:
+                f.write(b"x" * 128)
+            with self.assertRaises(ValueError):
+                load_stats_from_binary(path)
+            
+            save_stats_to_binary(stats, path)
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 8)
+            with self.assertRaises(ValueError):
+                load_stats_from_binary(path)
+
+    def test_iter_stats_from_yaml(self):
+        """Тест потокового чтения многодокументного YAML"""
+        runs = [dict(self.test_data, scheduler_throughput=float(index))
+                for index in range(3)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "sweep.yaml")
+            with open(path, 'w') as f:
+                yaml.dump_all(runs, f)
+                # Пустой документ в конце файла
+                f.write("---\n")
+
+            stream = iter_stats_from_yaml(path)
+            first = next(stream)
+            rest = list(stream)
+
+        self.assertEqual(first.user_packet_processing_delays,
+                         {101: 0.001, 102: 0.004})
+        self.assertEqual([stats.scheduler_throughput
+                          for stats in [first, *rest]], [0.0, 1.0, 2.0])
+
+    def test_iter_stats_from_jsonl(self):
+        """Тест построчного чтения JSON Lines"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "sweep.jsonl")
+            with open(path, 'w') as f:
+                for index in range(2):
+                    f.write(json.dumps(dict(self.test_data,
+                                            scheduler_wait_time=index)) + "\n")
+                f.write("\n")
+
+            runs = list(iter_stats(path))
+
+            self.assertEqual(len(runs), 2)
+            self.assertEqual(runs[1].scheduler_wait_time, 1)
+            self.assertEqual(runs[0].queue_packet_processing_delays,
+                             {1: 0.002, 2: 0.003})
+
+            with open(path, 'a') as f:
+                f.write("[1, 2]\n")
+            with self.assertRaises(ValueError):
+                list(iter_stats(path))
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
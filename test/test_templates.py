@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+import os
+import pickle
+import tempfile
+from src.plotter import Plotter
+from src.templates import (TemplateStore, PieChartTemplate, new_figure,
+                           PIE_AUTOPCT, PIE_START_ANGLE)
+from test.helpers import make_stats
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        """Подготовка тестовых данных"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = TemplateStore()
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def make_stats(self, scale, queues=2):
+        return make_stats(
+            scheduler_processing_time=80.0 * scale,
+            scheduler_wait_time=5.0 * scale,
+            scheduler_packet_processing_delay=0.005 * scale,
+            queue_packet_processing_delays={
+                idx: 0.001 * idx * scale for idx in range(queues)},
+            user_packet_processing_delays={1: 0.001 * scale, 2: 0.004},
+            scheduler_throughput=50.5 * scale)
+
+    @patch("builtins.print")
+    def test_figures_are_reused(self, mock_print):
+        """Тест: фигуры строятся один раз и обновляются для новых данных"""
+        Plotter(self.make_stats(1.0), self.temp_dir.name,
+                templates=self.store).run()
+        figures = {name: template.figure
+                   for name, template in self.store.templates.items()}
+
+        paths = Plotter(self.make_stats(0.5), self.temp_dir.name,
+                        templates=self.store).run()
+
+        self.assertEqual(len(paths), 4)
+        self.assertEqual(len(self.store), 4)
+        for name, template in self.store.templates.items():
+            self.assertIs(template.figure, figures[name])
+        bars = self.store.templates[
+            "scheduler_throughput_bar_chart"].ax.patches
+        self.assertAlmostEqual(bars[0].get_height(), 25.25)
+        self.assertAlmostEqual(bars[1].get_y(), 25.25)
+
+    @patch("builtins.print")
+    def test_template_rebuilt_when_categories_change(self, mock_print):
+        """Тест: шаблон перестраивается при изменении числа категорий"""
+        chart = "queue_packet_processing_delay_bar_chart"
+        Plotter(self.make_stats(1.0), self.temp_dir.name,
+                templates=self.store).run()
+        figure = self.store.templates[chart].figure
+
+        Plotter(self.make_stats(1.0, queues=5), self.temp_dir.name,
+                templates=self.store).run()
+
+        template = self.store.templates[chart]
+        self.assertIsNot(template.figure, figure)
+        self.assertEqual(len(template.ax.patches), 6)
+        self.assertEqual(template.ax.get_xticklabels()[-2].get_text(),
+                         "Очередь 5")
+
+    def test_pie_update_matches_pie(self):
+        """Тест: обновлённая круговая диаграмма совпадает с построенной заново"""
+        data = [30.0, 70.0]
+        template = PieChartTemplate(["A", "B"], "")
+        template.update(data)
+
+        ax = new_figure().add_subplot()
+        wedges, texts, autotexts = ax.pie(
+            data, labels=["A", "B"], autopct=PIE_AUTOPCT,
+            startangle=PIE_START_ANGLE)
+        for updated, expected in zip(template.wedges, wedges):
+            # Axes.pie считает доли в float32
+            self.assertAlmostEqual(updated.theta1, expected.theta1, places=3)
+            self.assertAlmostEqual(updated.theta2, expected.theta2, places=3)
+        for updated, expected in zip(template.texts + template.autotexts,
+                                     texts + autotexts):
+            self.assertEqual(updated.get_text(), expected.get_text())
+            for a, b in zip(updated.get_position(), expected.get_position()):
+                self.assertAlmostEqual(a, b, places=5)
+            self.assertEqual(updated.get_horizontalalignment(),
+                             expected.get_horizontalalignment())
+
+    @patch("builtins.print")
+    def test_render_with_templates(self, mock_print):
+        """Тест отрисовки шаблона в буфер в памяти"""
+        plotter = Plotter(self.make_stats(1.0), self.temp_dir.name,
+                          templates=self.store)
+
+        png = plotter.render("modelling_time_pie_chart")
+
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    @patch("builtins.print")
+    def test_store_is_not_pickled(self, mock_print):
+        """Тест: фигуры шаблонов не передаются в процессы-исполнители"""
+        Plotter(self.make_stats(1.0), self.temp_dir.name,
+                templates=self.store).run()
+
+        copy = pickle.loads(pickle.dumps(self.store))
+
+        self.assertEqual(len(copy), 0)
+
+if __name__ == '__main__':
+    unittest.main()
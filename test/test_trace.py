@@ -0,0 +1,149 @@
+import unittest
+import tracemalloc
+from unittest.mock import patch
+import tempfile
+import os
+import numpy as np
+from src.trace import (TRACE_DTYPE, MinMaxDownsampler, read_trace,
+                       downsample_trace, load_allocation, downsample_matrix)
+from src.plotter import Plotter
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        """Подготовка синтетической трассы"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.trace = np.zeros(1000, dtype=TRACE_DTYPE)
+        self.trace["tti"] = np.arange(1000)
+        self.trace["throughput"] = rng.random(1000)
+        self.trace["queue_length"] = rng.integers(0, 50, 1000)
+        self.trace["resource_blocks"] = rng.integers(0, 100, 1000)
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def test_read_binary_trace_in_chunks(self):
+        """Тест чтения бинарной трассы частями"""
+        path = os.path.join(self.temp_dir.name, "trace.bin")
+        self.trace.tofile(path)
+        
+        chunks = list(read_trace(path, chunk_size=300))
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+        np.testing.assert_array_equal(np.concatenate(chunks), self.trace)
+
+    def test_read_csv_trace_in_chunks(self):
+        """Тест чтения CSV-трассы частями с произвольным порядком столбцов"""
+        path = os.path.join(self.temp_dir.name, "trace.csv")
+        with open(path, 'w') as f:
+            f.write("queue_length,tti,resource_blocks,throughput\n")
+            for row in self.trace:
+                f.write(f"{row['queue_length']},{row['tti']},"
+                        f"{row['resource_blocks']},{float(row['throughput'])!r}\n")
+        
+        chunks = list(read_trace(path, chunk_size=400))
+        
+        self.assertEqual(len(chunks), 3)
+        np.testing.assert_array_equal(np.concatenate(chunks), self.trace)
+
+    def test_downsampler_preserves_extremes(self):
+        """Тест прореживания: экстремумы сохраняются, размер ограничен"""
+        sampler = MinMaxDownsampler(buckets=10)
+        y = np.sin(np.arange(100000) / 1000)
+        y[54321] = 5.0
+        y[12345] = -5.0
+        for start in range(0, y.size, 7777):
+            stop = start + 7777
+            sampler.update(np.arange(start, min(stop, y.size)), y[start:stop])
+        
+        x, values = sampler.result()
+        
+        self.assertLessEqual(len(values), 2 * (2 * 10 + 1))
+        self.assertEqual(values.max(), 5.0)
+        self.assertEqual(values.min(), -5.0)
+        self.assertEqual(x[values.argmax()], 54321)
+        self.assertTrue(np.all(np.diff(x) >= 0))
+
+    def test_downsample_trace(self):
+        """Тест прореживания всех полей трассы за один проход"""
+        chunks = (self.trace[i:i + 128] for i in range(0, 1000, 128))
+        
+        series = downsample_trace(chunks, buckets=50)
+        
+        self.assertEqual(set(series),
+                         {"throughput", "queue_length", "resource_blocks"})
+        tti, values = series["throughput"]
+        self.assertEqual(values.max(), self.trace["throughput"].max())
+        self.assertLessEqual(len(tti), 2 * (2 * 50 + 1))
+
+    def test_downsample_matrix(self):
+        """Тест усреднения матрицы блоками при любом размере порции"""
+        matrix = np.random.default_rng(1).random((37, 101))
+        rows = np.linspace(0, 37, 6).astype(int)
+        columns = np.linspace(0, 101, 11).astype(int)
+        expected = np.array([[matrix[rows[i]:rows[i + 1],
+                                     columns[j]:columns[j + 1]].mean()
+                              for j in range(10)] for i in range(5)])
+
+        for chunk_elements in (1, 7, 50, 300, 1 << 20):
+            np.testing.assert_allclose(
+                downsample_matrix(matrix, 5, 10, chunk_elements), expected)
+        # Оси короче сетки не растягиваются
+        np.testing.assert_array_equal(downsample_matrix(matrix, 100, 200),
+                                      matrix)
+
+    def test_downsample_matrix_memory(self):
+        """Тест: память усреднения не растёт с длиной матрицы"""
+        path = os.path.join(self.temp_dir.name, "wide.npy")
+        matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8,
+                                           shape=(4, 4_000_000))
+        matrix[:] = 1
+        matrix.flush()
+
+        tracemalloc.start()
+        try:
+            grid = downsample_matrix(matrix, 4, 100, chunk_elements=4096)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        np.testing.assert_array_equal(grid, np.ones((4, 100)))
+        # Индекс блока на каждый столбец занял бы 32 МБ
+        self.assertLess(peak, 1 << 20)
+        del matrix
+
+    def test_load_allocation(self):
+        """Тест отображения матрицы распределения ресурсов в память"""
+        path = os.path.join(self.temp_dir.name, "allocation.npy")
+        allocation = np.lib.format.open_memmap(path, mode="w+",
+                                               dtype=np.uint16,
+                                               shape=(3000, 700))
+        allocation[:] = np.arange(700, dtype=np.uint16)
+        allocation.flush()
+        del allocation
+
+        matrix = load_allocation(path)
+        grid = downsample_matrix(matrix, 10, 7, chunk_elements=4096)
+
+        self.assertIsInstance(matrix, np.memmap)
+        np.testing.assert_allclose(grid[0], np.arange(49.5, 700, 100))
+        np.save(path, np.zeros(5))
+        with self.assertRaises(ValueError):
+            load_allocation(path)
+
+    @patch("builtins.print")
+    @patch("matplotlib.figure.Figure.savefig", autospec=True)
+    def test_heatmap_is_bounded_by_figure(self, mock_savefig, mock_print):
+        """Тест: тепловая карта не больше сетки пикселей рисунка"""
+        allocation = np.ones((50, 20000), dtype=np.uint8)
+        plotter = Plotter(None, self.temp_dir.name)
+
+        plotter.draw_resource_allocation_heatmap(allocation)
+
+        image = mock_savefig.call_args[0][0].axes[0].images[0]
+        self.assertEqual(image.get_array().shape, (50, 3600))
+        self.assertEqual(image.get_extent(), [0, 20000, 0, 50])
+
+if __name__ == '__main__':
+    unittest.main()
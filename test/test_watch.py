@@ -0,0 +1,67 @@
+import unittest
+import tempfile
+import threading
+import time
+import os
+from src.watch import watch_files, InotifySource, PollingSource
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        """Подготовка наблюдаемого каталога"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "run.yaml")
+
+    def tearDown(self):
+        """Удаление временного каталога"""
+        self.temp_dir.cleanup()
+
+    def write_in_parts(self):
+        # Файл записывается частями с паузой, как при медленной записи
+        time.sleep(0.3)
+        open(os.path.join(self.temp_dir.name, "notes.txt"), 'w').close()
+        with open(self.path, 'w') as f:
+            f.write("scheduler_total_time: 100.0\n")
+            f.flush()
+            time.sleep(0.1)
+            f.write("scheduler_processing_time: 80.0\n")
+
+    def check_watch(self, polling):
+        files = watch_files(self.temp_dir.name, settle=0.3, polling=polling)
+        writer = threading.Thread(target=self.write_in_parts)
+        writer.start()
+
+        started = time.monotonic()
+        path = next(files)
+        elapsed = time.monotonic() - started
+        writer.join()
+        files.close()
+
+        self.assertEqual(path, self.path)
+        self.assertLess(elapsed, 2.0)
+        with open(path) as f:
+            self.assertIn("scheduler_processing_time", f.read())
+
+    def test_watch_with_inotify(self):
+        """Тест наблюдения через inotify с ожиданием окончания записи"""
+        try:
+            InotifySource(self.temp_dir.name).close()
+        except OSError:
+            self.skipTest("inotify недоступен")
+        self.check_watch(polling=False)
+
+    def test_watch_with_polling(self):
+        """Тест наблюдения опросом каталога"""
+        self.check_watch(polling=True)
+
+    def test_polling_ignores_existing_files(self):
+        """Тест: файлы, существовавшие до начала наблюдения, не сообщаются"""
+        open(self.path, 'w').close()
+        source = PollingSource(self.temp_dir.name, interval=0.01)
+
+        self.assertEqual(source.wait(0.01), set())
+        with open(self.path, 'w') as f:
+            f.write("changed")
+        self.assertEqual(source.wait(0.01), {self.path})
+
+if __name__ == '__main__':
+    unittest.main()